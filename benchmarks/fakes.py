@@ -0,0 +1,505 @@
+"""Local stand-ins for YouTube, transcripts, Gemini and Notion.
+
+The fakes plug into the same seams the real clients use, so the pipeline
+code under test is the production code:
+
+* YouTube Data API: an httplib2 transport handed out by
+  :class:`FakeYouTubeSession`; requests go through googleapiclient,
+  including batch requests and conditional GETs (``If-None-Match``);
+* transcripts: a ``YouTubeTranscriptApi`` replacement leased by
+  :class:`FakeTranscriptFetcher`;
+* Gemini: a model object with ``generate_content`` and
+  ``generate_content_async``;
+* Notion: a requests transport adapter and an httpx mock transport.
+
+Every service has a :class:`FaultProfile` with a per-call latency and the
+rates at which calls fail with HTTP 429, 504 or another error.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.parser import FeedParser
+import hashlib
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from youtube_summary.config import AppConfig
+from youtube_summary.gemini_client import GeminiSummarizer
+from youtube_summary.notion_client import NotionUploader
+from youtube_summary.registry import ClientRegistry
+from youtube_summary.transcript_client import TranscriptFetcher
+from youtube_summary.youtube_client import YouTubeSession, _metered_http_class
+
+SERVICES = ("youtube", "transcript", "gemini", "notion")
+
+
+@dataclass
+class FaultProfile:
+    """Latency and failure rates of one fake service."""
+
+    latency: float = 0.0
+    jitter: float = 0.2
+    throttle_rate: float = 0.0
+    timeout_rate: float = 0.0
+    error_rate: float = 0.0
+
+
+class FakeService:
+    """Latency, fault injection and call counting shared by the fakes."""
+
+    def __init__(self, name: str, profile: FaultProfile, *, seed: int = 0):
+        self.name = name
+        self.profile = profile
+        self.calls: Counter = Counter()
+        self._random = random.Random(f"{name}:{seed}")
+        self._lock = threading.Lock()
+
+    def _roll(self, operation: str) -> Tuple[float, Optional[int]]:
+        """Count a call and return its delay and injected status, if any."""
+
+        profile = self.profile
+        with self._lock:
+            self.calls[operation] += 1
+            jitter = 1 + self._random.uniform(-profile.jitter, profile.jitter)
+            draw = self._random.random()
+        delay = max(profile.latency * jitter, 0.0)
+        if draw < profile.throttle_rate:
+            return delay, 429
+        draw -= profile.throttle_rate
+        if draw < profile.timeout_rate:
+            return delay, 504
+        draw -= profile.timeout_rate
+        if draw < profile.error_rate:
+            return delay, 500
+        return delay, None
+
+    def call(self, operation: str) -> Optional[int]:
+        delay, status = self._roll(operation)
+        if delay:
+            time.sleep(delay)
+        return status
+
+    async def acall(self, operation: str) -> Optional[int]:
+        delay, status = self._roll(operation)
+        if delay:
+            await asyncio.sleep(delay)
+        return status
+
+
+def _etag(payload: Dict[str, object]) -> str:
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8"))
+    return f'"{digest.hexdigest()}"'
+
+
+_ERROR_REASONS = {429: "rateLimitExceeded", 504: "backendError", 500: "internalError"}
+
+
+class FakeYouTubeServer(FakeService):
+    """In-memory YouTube Data API for ``subscriptions``, ``channels``,
+    ``playlistItems`` and ``videos`` list calls.
+
+    ``videos`` in-window uploads are spread over ``subscriptions`` channels;
+    every channel also has a few older uploads, so paging stops at the
+    window start as it does against the real API.
+    """
+
+    def __init__(
+        self,
+        profile: FaultProfile,
+        *,
+        subscriptions: int,
+        videos: int,
+        end_time: datetime,
+        window: timedelta = timedelta(days=1),
+        older_per_channel: int = 3,
+        seed: int = 0,
+    ):
+        super().__init__("youtube", profile, seed=seed)
+        self.channel_ids = [f"UC{index:06d}" for index in range(subscriptions)]
+        self.uploads: Dict[str, List[Dict[str, object]]] = {}
+        self.videos: Dict[str, Dict[str, object]] = {}
+        step = window / max(videos, 1)
+        per_channel: Dict[str, List[Tuple[str, datetime]]] = {
+            channel_id: [] for channel_id in self.channel_ids
+        }
+        for index in range(videos):
+            channel_id = self.channel_ids[index % subscriptions]
+            published_at = end_time - step * (index + 0.5)
+            per_channel[channel_id].append((f"vid{index:06d}", published_at))
+        for channel_index, channel_id in enumerate(self.channel_ids):
+            uploads = per_channel[channel_id]
+            for older in range(older_per_channel):
+                published_at = end_time - window - timedelta(days=older + 1)
+                uploads.append((f"old{channel_index:06d}{older}", published_at))
+            self.uploads[f"UU{channel_id[2:]}"] = [
+                self._add_video(channel_id, video_id, published_at)
+                for video_id, published_at in uploads
+            ]
+
+    def _add_video(
+        self, channel_id: str, video_id: str, published_at: datetime
+    ) -> Dict[str, object]:
+        published = published_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        snippet = {
+            "publishedAt": published,
+            "title": f"Benchmark video {video_id}",
+            "description": "A talk about pipelines.",
+            "channelTitle": f"Channel {channel_id}",
+        }
+        self.videos[video_id] = {
+            "id": video_id,
+            "snippet": dict(snippet, liveBroadcastContent="none"),
+            "contentDetails": {"duration": "PT20M"},
+        }
+        return {
+            "snippet": snippet,
+            "contentDetails": {"videoId": video_id, "videoPublishedAt": published},
+        }
+
+    def handle(
+        self, method: str, uri: str, body: Optional[str], headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        parsed = urlparse(uri)
+        if "/batch" in parsed.path:
+            return self._handle_batch(body or "", headers)
+        resource = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        status = self.call(f"youtube.{resource}.list")
+        if status is not None:
+            error = {"error": {"code": status, "errors": [{"reason": _ERROR_REASONS[status]}]}}
+            return status, {"content-type": "application/json"}, json.dumps(error).encode()
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        payload = getattr(self, f"_list_{resource}")(params)
+        etag = _etag(payload)
+        payload["etag"] = etag
+        lowered = {key.lower(): value for key, value in headers.items()}
+        if lowered.get("if-none-match") == etag:
+            return 304, {"etag": etag}, b""
+        return 200, {"content-type": "application/json", "etag": etag}, json.dumps(payload).encode()
+
+    def _page(
+        self, items: List[Dict[str, object]], params: Dict[str, str]
+    ) -> Dict[str, object]:
+        size = int(params.get("maxResults", "5"))
+        offset = int(params.get("pageToken", "0") or 0)
+        payload: Dict[str, object] = {"items": items[offset : offset + size]}
+        if offset + size < len(items):
+            payload["nextPageToken"] = str(offset + size)
+        return payload
+
+    def _list_subscriptions(self, params: Dict[str, str]) -> Dict[str, object]:
+        items = [
+            {"snippet": {"resourceId": {"channelId": channel_id}}}
+            for channel_id in self.channel_ids
+        ]
+        return self._page(items, params)
+
+    def _list_channels(self, params: Dict[str, str]) -> Dict[str, object]:
+        return {
+            "items": [
+                {
+                    "id": channel_id,
+                    "contentDetails": {"relatedPlaylists": {"uploads": f"UU{channel_id[2:]}"}},
+                }
+                for channel_id in params.get("id", "").split(",")
+                if channel_id
+            ]
+        }
+
+    def _list_playlistItems(self, params: Dict[str, str]) -> Dict[str, object]:
+        return self._page(self.uploads.get(params.get("playlistId", ""), []), params)
+
+    def _list_videos(self, params: Dict[str, str]) -> Dict[str, object]:
+        ids = [video_id for video_id in params.get("id", "").split(",") if video_id]
+        return {"items": [self.videos[video_id] for video_id in ids if video_id in self.videos]}
+
+    def _handle_batch(
+        self, body: str, headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Answer a multipart/mixed batch with one part per sub-request."""
+
+        self.call("youtube.batch")
+        lowered = {key.lower(): value for key, value in headers.items()}
+        parser = FeedParser()
+        parser.feed(f"content-type: {lowered['content-type']}\r\n\r\n{body}")
+        boundary = "batch_benchmark_boundary"
+        parts: List[str] = []
+        for part in parser.close().get_payload():
+            request_line, rest = part.get_payload().split("\n", 1)
+            method, path, _ = request_line.split(" ", 2)
+            inner = FeedParser()
+            inner.feed(rest)
+            inner_headers = dict(inner.close().items())
+            status, response_headers, content = self.handle(
+                method, f"https://youtube.googleapis.com{path}", None, inner_headers
+            )
+            header_lines = "".join(
+                f"{key}: {value}\r\n" for key, value in response_headers.items()
+            )
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"{header_lines}\r\n{content.decode('utf-8')}\r\n"
+            )
+        content = ("".join(parts) + f"--{boundary}--\r\n").encode("utf-8")
+        return 200, {"content-type": f"multipart/mixed; boundary={boundary}"}, content
+
+
+def fake_youtube_http(server: FakeYouTubeServer):
+    """Return a metered transport whose requests are answered by ``server``."""
+
+    import httplib2
+
+    class _ServerHttp(httplib2.Http):
+        def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            status, response_headers, content = server.handle(
+                method, uri, body, headers or {}
+            )
+            response = httplib2.Response(dict(response_headers, status=str(status)))
+            return response, content
+
+    # _MeteredHttp.request calls super().request, which resolves to
+    # _ServerHttp.request in this MRO instead of opening a connection.
+    class _FakeHttp(_metered_http_class(), _ServerHttp):
+        pass
+
+    return _FakeHttp(None)
+
+
+class FakeYouTubeSession(YouTubeSession):
+    """YouTube session answered by a :class:`FakeYouTubeServer`, without OAuth."""
+
+    def __init__(self, config, server: FakeYouTubeServer):
+        super().__init__(config)
+        self._server = server
+
+    def authenticate(self):
+        with self._lock:
+            if self._service is not None:
+                return self._service
+            self._idle = []
+            self._service = self._build_service(self._new_http()[0])
+            return self._service
+
+    def ensure_fresh(self) -> None:
+        return None
+
+    def _new_http(self):
+        transport = fake_youtube_http(self._server)
+        return transport, transport
+
+
+class FakeTranscriptApi:
+    """Stand-in for ``YouTubeTranscriptApi`` returning generated captions."""
+
+    def __init__(self, service: FakeService, *, snippets: int = 120):
+        self._service = service
+        self._snippets = snippets
+
+    def fetch(self, video_id: str, languages=("en",)):
+        from youtube_transcript_api import (
+            FetchedTranscript,
+            FetchedTranscriptSnippet,
+            RequestBlocked,
+            TranscriptsDisabled,
+            YouTubeRequestFailed,
+        )
+
+        status = self._service.call("transcript.fetch")
+        if status == 429:
+            raise RequestBlocked(video_id)
+        if status == 504:
+            raise YouTubeRequestFailed(video_id, TimeoutError("504 Gateway Timeout"))
+        if status is not None:
+            raise TranscriptsDisabled(video_id)
+        return FetchedTranscript(
+            snippets=[
+                FetchedTranscriptSnippet(
+                    text=f"Sentence {index} of the talk about {video_id}.",
+                    start=index * 5.0,
+                    duration=5.0,
+                )
+                for index in range(self._snippets)
+            ],
+            video_id=video_id,
+            language="English",
+            language_code=list(languages)[0] if languages else "en",
+            is_generated=True,
+        )
+
+
+@dataclass
+class FakeTranscriptFetcher(TranscriptFetcher):
+    """Transcript fetcher whose leased clients are :class:`FakeTranscriptApi`."""
+
+    service: Optional[FakeService] = field(default=None, repr=False)
+    snippets: int = 120
+
+    def _lease_client(self):
+        return nullcontext(FakeTranscriptApi(self.service, snippets=self.snippets))
+
+
+class FakeGeminiModel:
+    """Stand-in for ``genai.GenerativeModel`` raising google.api_core errors."""
+
+    def __init__(self, service: FakeService):
+        self._service = service
+
+    def _respond(self, status: Optional[int], prompt: str):
+        from google.api_core import exceptions
+
+        if status == 429:
+            raise exceptions.ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        if status == 504:
+            raise exceptions.DeadlineExceeded("504 Deadline Exceeded")
+        if status is not None:
+            raise exceptions.InternalServerError("500 An internal error has occurred.")
+        lines = [line for line in prompt.splitlines() if line.startswith("[")][:5]
+        text = "\n".join(f"- 观点 {index}: {line}" for index, line in enumerate(lines))
+        return SimpleNamespace(
+            text=text or "- 没有字幕",
+            usage_metadata=SimpleNamespace(total_token_count=len(prompt) // 4 + 200),
+        )
+
+    def generate_content(self, prompt: str, **kwargs):
+        return self._respond(self._service.call("gemini.generate_content"), prompt)
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        return self._respond(await self._service.acall("gemini.generate_content"), prompt)
+
+
+class FakeNotionServer(FakeService):
+    """Notion pages and block-children endpoints for both HTTP clients."""
+
+    def respond(self, url: str) -> Tuple[int, Dict[str, object]]:
+        operation = "notion.pages.create" if url.endswith("/pages") else "notion.blocks.append"
+        return self._answer(operation, self.call(operation))
+
+    async def arespond(self, url: str) -> Tuple[int, Dict[str, object]]:
+        operation = "notion.pages.create" if url.endswith("/pages") else "notion.blocks.append"
+        return self._answer(operation, await self.acall(operation))
+
+    @staticmethod
+    def _answer(operation: str, status: Optional[int]) -> Tuple[int, Dict[str, object]]:
+        if status is not None:
+            return status, {"object": "error", "status": status, "code": "benchmark_fault"}
+        if operation == "notion.pages.create":
+            return 200, {"id": "benchmark-page", "url": "https://notion.so/benchmark-page"}
+        return 200, {"object": "list", "results": []}
+
+    def adapter(self):
+        """Return a requests transport adapter answering from this server."""
+
+        import requests
+        from requests.adapters import BaseAdapter
+
+        server = self
+
+        class _NotionAdapter(BaseAdapter):
+            def send(self, request, **kwargs):
+                status, payload = server.respond(request.url)
+                response = requests.Response()
+                response.status_code = status
+                response._content = json.dumps(payload).encode("utf-8")
+                response.headers["Content-Type"] = "application/json"
+                response.encoding = "utf-8"
+                response.url = request.url
+                response.request = request
+                return response
+
+            def close(self):
+                return None
+
+        return _NotionAdapter()
+
+    def async_transport(self):
+        import httpx
+
+        async def _handler(request):
+            status, payload = await self.arespond(str(request.url))
+            return httpx.Response(status, json=payload)
+
+        return httpx.MockTransport(_handler)
+
+
+@dataclass
+class FakeBackends:
+    """One fake per external service, sharing the scenario's fault profiles."""
+
+    youtube: FakeYouTubeServer
+    transcript: FakeService
+    gemini: FakeService
+    notion: FakeNotionServer
+
+    @classmethod
+    def create(
+        cls,
+        *,
+        subscriptions: int,
+        videos: int,
+        end_time: datetime,
+        profiles: Dict[str, FaultProfile],
+        seed: int = 0,
+    ) -> "FakeBackends":
+        return cls(
+            youtube=FakeYouTubeServer(
+                profiles["youtube"],
+                subscriptions=subscriptions,
+                videos=videos,
+                end_time=end_time,
+                seed=seed,
+            ),
+            transcript=FakeService("transcript", profiles["transcript"], seed=seed),
+            gemini=FakeService("gemini", profiles["gemini"], seed=seed),
+            notion=FakeNotionServer("notion", profiles["notion"], seed=seed),
+        )
+
+    def calls(self) -> Dict[str, int]:
+        counts: Counter = Counter()
+        for service in (self.youtube, self.transcript, self.gemini, self.notion):
+            counts.update(service.calls)
+        return dict(sorted(counts.items()))
+
+
+class FakeClientRegistry(ClientRegistry):
+    """Client registry whose clients talk to :class:`FakeBackends`."""
+
+    def __init__(self, config: AppConfig, backends: FakeBackends, *, snippets: int = 120):
+        import httpx
+
+        super().__init__(config)
+        self.backends = backends
+        self._youtube = FakeYouTubeSession(config.youtube, backends.youtube)
+        self._transcript_fetcher = FakeTranscriptFetcher(
+            service=backends.transcript,
+            snippets=snippets,
+            compact_window_seconds=config.transcript.compact_window_seconds,
+        )
+        summarizer = GeminiSummarizer(config.gemini)
+        summarizer._model = FakeGeminiModel(backends.gemini)
+        self._summarizer = summarizer
+        uploader = NotionUploader(config.notion)
+        uploader._session.mount("https://", backends.notion.adapter())
+        uploader._async_client = httpx.AsyncClient(
+            headers=uploader._headers(), transport=backends.notion.async_transport()
+        )
+        self._notion_uploader = uploader
+
+
+__all__ = [
+    "FakeBackends",
+    "FakeClientRegistry",
+    "FakeService",
+    "FaultProfile",
+    "SERVICES",
+]
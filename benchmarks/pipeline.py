@@ -0,0 +1,317 @@
+"""Offline end-to-end benchmark of the summary pipeline.
+
+Runs ``run_youtube_summary`` (or its asyncio counterpart) against the local
+fakes in ``benchmarks/fakes.py``, so no credentials, quota or network are
+needed. Each scenario, ``<subscriptions>x<videos>``, runs in a fresh
+interpreter with an empty cache directory and reports:
+
+* ``wall_seconds`` of every pass (later passes start with warm caches);
+* ``peak_rss_mb`` of the scenario process;
+* ``calls``: requests each fake service answered, per pass;
+* ``transcript_tokens``: estimated prompt tokens of the transcripts in the
+  linked (``full``) and the ``compact`` format;
+* ``stages``: mean seconds per video in every pipeline stage, from the
+  run's ``metrics`` summary, plus the failed calls per API operation.
+
+A pass that raises is reported with its ``error`` (class and message) and
+the calls made up to the failure; a scenario process that exits abnormally
+is reported with its return code and the tail of its stderr. Either way
+the remaining scenarios still run.
+
+Settings read from the environment (``SUMMARY_WORKERS``,
+``YOUTUBE_BATCH_REQUESTS``, ``SUMMARY_STREAM_DISCOVERY`` and so on) apply
+as usual, so a change can be compared across commits with identical
+flags. Run from the repository root::
+
+    python benchmarks/pipeline.py --scenarios 10x10,100x100 --workers 4
+    python benchmarks/pipeline.py --mode async --fault gemini:504=0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_SCENARIOS = [
+    f"{subscriptions}x{videos}"
+    for subscriptions in (10, 100, 1000)
+    for videos in (10, 100, 500)
+]
+# Typical per-call latencies in seconds, scaled by --latency-scale.
+DEFAULT_LATENCY = {"youtube": 0.15, "transcript": 0.6, "gemini": 8.0, "notion": 0.3}
+_FAULT_KINDS = {"429": "throttle_rate", "504": "timeout_rate", "error": "error_rate"}
+# Lines of a failed scenario process's stderr kept in its report.
+_STDERR_LINES = 40
+
+
+def _parse_scenario(value: str) -> Tuple[int, int]:
+    subscriptions, _, videos = value.lower().partition("x")
+    return int(subscriptions), int(videos)
+
+
+def _fault_profiles(args: argparse.Namespace):
+    from fakes import SERVICES, FaultProfile
+
+    latency = dict(DEFAULT_LATENCY)
+    for spec in args.latency:
+        service, _, seconds = spec.partition("=")
+        latency[service] = float(seconds)
+    profiles = {
+        service: FaultProfile(latency=latency[service] * args.latency_scale)
+        for service in SERVICES
+    }
+    for spec in args.fault:
+        service, _, rest = spec.partition(":")
+        kind, _, rate = rest.partition("=")
+        setattr(profiles[service], _FAULT_KINDS[kind], float(rate))
+    return profiles
+
+
+def _benchmark_config(cache_directory: str, args: argparse.Namespace):
+    from youtube_summary.config import load_config_from_env
+
+    config = load_config_from_env()
+    config.gemini = replace(
+        config.gemini,
+        api_key="benchmark",
+        requests_per_minute=args.gemini_rpm,
+        tokens_per_minute=None,
+    )
+    config.notion = replace(
+        config.notion, api_key="benchmark", database_id=None, parent_page_id="benchmark"
+    )
+    config.cache = replace(config.cache, directory=cache_directory)
+    return config
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _stage_digest(metrics: Dict[str, object]) -> Dict[str, object]:
+    stages = {
+        name: timing["mean_seconds"]
+        for name, timing in metrics.get("stages", {}).items()  # type: ignore[union-attr]
+    }
+    errors = {
+        operation: entry["errors"]
+        for operation, entry in metrics.get("calls", {}).items()  # type: ignore[union-attr]
+        if entry.get("errors")
+    }
+    return {"mean_seconds": stages, "errors": errors}
+
+
+def run_scenario(scenario: str, args: argparse.Namespace) -> Dict[str, object]:
+    """Run one scenario in this process and return its report."""
+
+    from fakes import FakeBackends, FakeClientRegistry
+    from youtube_summary.metrics import error_class
+    from youtube_summary.youtube import run_youtube_summary, run_youtube_summary_async
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    subscriptions, videos = _parse_scenario(scenario)
+    end_time = datetime.now(timezone.utc).replace(microsecond=0)
+    start_time = end_time - timedelta(days=1)
+    backends = FakeBackends.create(
+        subscriptions=subscriptions,
+        videos=videos,
+        end_time=end_time,
+        profiles=_fault_profiles(args),
+        seed=args.seed,
+    )
+    passes: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory(prefix="summary-benchmark-") as directory:
+        registry = FakeClientRegistry(
+            _benchmark_config(directory, args),
+            backends,
+            snippets=args.transcript_minutes * 12,
+        )
+        options = dict(
+            start=start_time.isoformat(),
+            end=end_time.isoformat(),
+            output_path=Path(directory) / "summaries.md",
+            title=f"Benchmark {scenario}",
+            workers=args.workers,
+            skip_notion=args.skip_notion,
+            registry=registry,
+        )
+        for index in range(max(args.passes, 1)):
+            calls_before = backends.calls()
+            started = time.perf_counter()
+            payload: Optional[Dict[str, object]] = None
+            error: Optional[Exception] = None
+            try:
+                if args.mode == "async":
+                    payload = asyncio.run(run_youtube_summary_async(**options))
+                else:
+                    payload = run_youtube_summary(**options)
+            except Exception as exception:  # pylint: disable=broad-except
+                logging.exception("Pass %d of %s failed", index + 1, scenario)
+                error = exception
+            wall = time.perf_counter() - started
+            calls = {
+                operation: count - calls_before.get(operation, 0)
+                for operation, count in backends.calls().items()
+                if count - calls_before.get(operation, 0)
+            }
+            report: Dict[str, object] = {
+                "pass": index + 1,
+                "wall_seconds": round(wall, 3),
+                "calls": calls,
+            }
+            if payload is not None:
+                report.update(
+                    videos=payload["video_count"],
+                    transcript_tokens=payload["transcript_tokens"],
+                    stages=_stage_digest(payload["metrics"]),
+                )
+            else:
+                report["error"] = {"class": error_class(error), "message": str(error)}
+            passes.append(report)
+        if args.mode == "async":
+            asyncio.run(registry.aclose())
+        else:
+            registry.close()
+    return {
+        "scenario": scenario,
+        "subscriptions": subscriptions,
+        "videos": videos,
+        "mode": args.mode,
+        "workers": args.workers,
+        "peak_rss_mb": _peak_rss_mb(),
+        "passes": passes,
+    }
+
+
+def _spawn(scenario: str, argv: List[str]) -> Dict[str, object]:
+    """Run ``scenario`` in a fresh interpreter and return its report."""
+
+    process = subprocess.run(
+        [sys.executable, "-W", "ignore", __file__, *argv, "--run-scenario", scenario],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    lines = process.stdout.strip().splitlines()
+    if process.returncode == 0 and lines:
+        try:
+            return json.loads(lines[-1])
+        except ValueError:
+            pass
+    stderr = process.stderr.strip().splitlines()[-_STDERR_LINES:]
+    print(f"Scenario {scenario} exited with status {process.returncode}:", file=sys.stderr)
+    print("\n".join(stderr), file=sys.stderr)
+    return {
+        "scenario": scenario,
+        "passes": [],
+        "error": {"returncode": process.returncode, "stderr": stderr},
+    }
+
+
+def _print_table(reports: List[Dict[str, object]]) -> None:
+    header = f"{'scenario':>10} {'pass':>4} {'videos':>6} {'wall s':>8} {'rss MB':>7} {'calls':>7}"
+    print(header, file=sys.stderr)
+    for report in reports:
+        if "error" in report:
+            print(
+                f"{report['scenario']:>10} exited with status "
+                f"{report['error']['returncode']}",  # type: ignore[index]
+                file=sys.stderr,
+            )
+            continue
+        for entry in report["passes"]:  # type: ignore[union-attr]
+            failure = entry.get("error")
+            print(
+                f"{report['scenario']:>10} {entry['pass']:>4} "
+                f"{entry.get('videos', 'failed'):>6} "
+                f"{entry['wall_seconds']:>8.2f} {report['peak_rss_mb']:>7.1f} "
+                f"{sum(entry['calls'].values()):>7}"
+                + (f"  {failure['class']}: {failure['message']}" if failure else ""),
+                file=sys.stderr,
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(DEFAULT_SCENARIOS),
+        help="Comma-separated <subscriptions>x<videos> scenarios (default: the 3x3 grid).",
+    )
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync")
+    parser.add_argument("--workers", type=int, help="Pipeline workers (default: SUMMARY_WORKERS).")
+    parser.add_argument(
+        "--passes", type=int, default=1, help="Runs per scenario sharing one cache directory."
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.02,
+        help="Multiplier for the per-call latencies (1.0 is roughly production).",
+    )
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="SERVICE=SECONDS",
+        help="Override a service's per-call latency before scaling.",
+    )
+    parser.add_argument(
+        "--fault",
+        action="append",
+        default=[],
+        metavar="SERVICE:KIND=RATE",
+        help="Inject failures; KIND is 429, 504 or error, e.g. gemini:504=0.02.",
+    )
+    parser.add_argument(
+        "--gemini-rpm",
+        type=float,
+        help="Gemini requests per minute for the rate limiter (default: unlimited).",
+    )
+    parser.add_argument(
+        "--transcript-minutes",
+        type=int,
+        default=10,
+        help="Length of every fake transcript (one caption per 5 seconds).",
+    )
+    parser.add_argument("--skip-notion", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Also write the reports to this file.")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario, args)))
+        return
+
+    forwarded = [arg for arg in argv if not arg.startswith("--json")]
+    if args.json is not None and str(args.json) in forwarded:
+        forwarded.remove(str(args.json))
+    reports = [_spawn(scenario, forwarded) for scenario in args.scenarios.split(",")]
+    _print_table(reports)
+    print(json.dumps(reports, indent=2))
+    if args.json is not None:
+        args.json.write_text(json.dumps(reports, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
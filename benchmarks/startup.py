@@ -0,0 +1,151 @@
+"""Cold-start benchmark for the HTTP server.
+
+Measures, in fresh interpreter processes:
+
+* ``import``: time to import ``main`` (the FastAPI app and its imports);
+* ``ping``: time from launching ``uvicorn main:app`` to the first successful
+  ``GET /v1/ping``;
+* ``discovery``: time to build the YouTube service from the static discovery
+  document (no network access; credentials are not needed).
+
+Run from the repository root::
+
+    python benchmarks/startup.py --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+import urllib.error
+import urllib.request
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+_DISCOVERY_SNIPPET = """
+import time
+import httplib2
+from youtube_summary.config import YouTubeConfig
+from youtube_summary.youtube_client import YouTubeSession
+session = YouTubeSession(YouTubeConfig(discovery_document={document!r}))
+start = time.perf_counter()
+session._build_service(httplib2.Http())
+print(time.perf_counter() - start)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_snippet(snippet: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", snippet],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_import() -> float:
+    return _run_snippet(_IMPORT_SNIPPET)
+
+
+def measure_discovery(document: Optional[str]) -> float:
+    return _run_snippet(_DISCOVERY_SNIPPET.format(document=document))
+
+
+def measure_ping(timeout: float = 60.0) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/v1/ping"
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited before answering /v1/ping")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"/v1/ping did not answer within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def _summarise(samples: List[float]) -> Dict[str, float]:
+    return {
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Samples per measurement.")
+    parser.add_argument(
+        "--discovery-document",
+        default=os.getenv("YOUTUBE_DISCOVERY_DOCUMENT"),
+        help="Discovery document to build from (defaults to the bundled copy).",
+    )
+    parser.add_argument(
+        "--skip-discovery",
+        action="store_true",
+        help="Do not measure building the YouTube service.",
+    )
+    args = parser.parse_args(argv)
+
+    measurements: Dict[str, Callable[[], float]] = {
+        "import": measure_import,
+        "ping": measure_ping,
+    }
+    if not args.skip_discovery:
+        measurements["discovery"] = lambda: measure_discovery(args.discovery_document)
+
+    report = {
+        name: _summarise([measure() for _ in range(max(args.runs, 1))])
+        for name, measure in measurements.items()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,34 @@
+from contextlib import asynccontextmanager
 import logging
 import os
 from typing import Optional
 
 import uvicorn
-from fastapi import BackgroundTasks, FastAPI, Response
+from fastapi import FastAPI, HTTPException, Response
 
-from youtube_summary.youtube import run_youtube_summary
+from youtube_summary.jobs import JobConflict, JobManager, JobQueueFull
+from youtube_summary.metrics import METRICS
+from youtube_summary.registry import ClientRegistry
 
 
 LOG_PREFIX = "[gemini_summary_log]"
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 进程级客户端注册表：各次请求复用 YouTube 凭据与连接、Gemini 模型、字幕与 Notion 会话以及缓存库
+    app.state.registry = ClientRegistry()
+    # 任务管理器：相同 (start, end, language, title) 的请求合并到同一个任务，并限制并发与排队数量
+    app.state.jobs = JobManager(app.state.registry)
+    try:
+        yield
+    finally:
+        await app.state.jobs.aclose()
+        await app.state.registry.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def index_handle():
@@ -23,35 +40,16 @@ async def ping_handler():
     response = Response(content="ok", status_code=200)
     return response
 
-def _run_summary_task(
-    *,
-    start: Optional[str],
-    end: Optional[str],
-    language: str,
-    max_per_channel: Optional[int],
-    output_path: str,
-    title: Optional[str],
-    skip_gemini: bool,
-    skip_notion: bool,
-) -> None:
-    try:
-        run_youtube_summary(
-            start=start,
-            end=end,
-            language=language,
-            max_per_channel=max_per_channel,
-            output_path=output_path,
-            title=title,
-            skip_gemini=skip_gemini,
-            skip_notion=skip_notion,
-        )
-    except Exception as error:  # pylint: disable=broad-except
-        logger.exception("%s Background summary failed: %s", LOG_PREFIX, error)
-
+# Prometheus 抓取接口：各 API 调用的延迟直方图、重试次数、流量字节数与错误类别，以及流水线各阶段耗时
+@app.get("/metrics")
+async def metrics_handler():
+    return Response(
+        content=METRICS.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 @app.get("/youtube_summary_handle")
 async def youtube_summary_handle(
-    background_tasks: BackgroundTasks,
     start: Optional[str] = None,
     end: Optional[str] = None,
     language: str = "zh-CN",
@@ -60,19 +58,48 @@ async def youtube_summary_handle(
     title: Optional[str] = None,
     skip_gemini: bool = False,
     skip_notion: bool = False,
+    workers: Optional[int] = None,
+    bypass_cache: bool = False,
+    incremental: bool = False,
+    refresh_metadata: bool = False,
+    trace: bool = False,
+    profile: bool = False,
 ):
-    background_tasks.add_task(
-        _run_summary_task,
-        start=start,
-        end=end,
-        language=language,
-        max_per_channel=max_per_channel,
-        output_path=output_path,
-        title=title,
-        skip_gemini=skip_gemini,
-        skip_notion=skip_notion,
-    )
-    return {"status": "accepted"}
+    try:
+        job, created = app.state.jobs.submit(
+            start=start,
+            end=end,
+            language=language,
+            max_per_channel=max_per_channel,
+            output_path=output_path,
+            title=title,
+            skip_gemini=skip_gemini,
+            skip_notion=skip_notion,
+            workers=workers,
+            bypass_cache=bypass_cache,
+            incremental=incremental,
+            refresh_metadata=refresh_metadata,
+            trace=trace,
+            profile=profile,
+        )
+    except JobQueueFull as error:
+        raise HTTPException(status_code=429, detail=str(error)) from error
+    except JobConflict as error:
+        raise HTTPException(status_code=409, detail=str(error)) from error
+    return {
+        "status": "accepted",
+        "job_id": job.id,
+        "coalesced": not created,
+        "status_url": f"/jobs/{job.id}",
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def job_status_handle(job_id: str):
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
 
 if __name__ == "__main__":
     # 目前这里是系统自定义的端口，会在创建实例时随机一个可用端口，若需自定义，参考后面高级操作部分
@@ -0,0 +1,45 @@
+"""Smoke run of the offline benchmark with every fault it can inject."""
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+from youtube_summary import gemini_client
+
+_BENCHMARK = Path(__file__).resolve().parent.parent / "benchmarks" / "pipeline.py"
+
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_pipeline", _BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+@pytest.mark.parametrize("service", ["youtube", "transcript", "gemini", "notion"])
+def test_every_fault_kind_on_every_service_is_reported(mode, service, monkeypatch, capsys):
+    monkeypatch.setattr(gemini_client, "_RETRY_DELAY_SECONDS", 0)
+    benchmark = _load_benchmark()
+    faults = [f"--fault={service}:{kind}=0.1" for kind in benchmark._FAULT_KINDS]
+
+    benchmark.main(
+        [
+            "--run-scenario=5x5",
+            f"--mode={mode}",
+            "--latency-scale=0",
+            "--workers=2",
+            "--passes=3",
+            *faults,
+        ]
+    )
+
+    report = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert [entry["pass"] for entry in report["passes"]] == [1, 2, 3]
+    for entry in report["passes"]:
+        assert entry["calls"]
+        if "error" in entry:
+            assert entry["error"]["class"] and entry["error"]["message"]
+        else:
+            assert entry["videos"] >= 0
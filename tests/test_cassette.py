@@ -0,0 +1,78 @@
+"""Batch request normalisation and response rebinding for cassette replay."""
+from youtube_summary.cassette import _normalise_batch, _rebind_batch
+
+
+def _batch_request(boundary, base_id, token, video_ids):
+    parts = []
+    for index, video_id in enumerate(video_ids, start=1):
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            "MIME-Version: 1.0\r\n"
+            f"Content-ID: <{base_id} + {index}>\r\n"
+            "\r\n"
+            f"GET /youtube/v3/videos?id={video_id}&alt=json HTTP/1.1\r\n"
+            f"authorization: Bearer {token}\r\n"
+            "\r\n"
+        )
+    return "".join(parts) + f"--{boundary}--"
+
+
+def _batch_response(base_id, bodies):
+    parts = []
+    for index, body in enumerate(bodies, start=1):
+        parts.append(
+            "--batch_abc\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{base_id} + {index}>\r\n"
+            "\r\n"
+            f"HTTP/1.1 200 OK\r\n\r\n{body}\r\n"
+        )
+    return ("".join(parts) + "--batch_abc--").encode("utf-8")
+
+
+_RECORDED_ID = "0f8a2b1c-1111-2222-3333-444455556666"
+_REPLAYED_ID = "9e7d6c5b-aaaa-bbbb-cccc-ddddeeeeffff"
+
+
+def test_normalise_ignores_boundary_ids_and_credentials():
+    recorded = _batch_request("===============1234==", _RECORDED_ID, "old", ["a", "b"])
+    replayed = _batch_request("===============9876==", _REPLAYED_ID, "new", ["a", "b"])
+
+    normalised = _normalise_batch(recorded)
+    assert normalised == _normalise_batch(replayed.encode("utf-8"))
+    assert b"Bearer" not in normalised
+    assert _RECORDED_ID.encode() not in normalised
+
+
+def test_normalise_keeps_what_the_batch_asks_for():
+    first = _batch_request("===============1==", _RECORDED_ID, "t", ["a", "b"])
+    reordered = _batch_request("===============1==", _RECORDED_ID, "t", ["b", "a"])
+
+    assert _normalise_batch(first) != _normalise_batch(reordered)
+
+
+def test_normalise_leaves_other_bodies_alone():
+    assert _normalise_batch(None) is None
+    assert _normalise_batch(b'{"id": "a"}') == b'{"id": "a"}'
+
+
+def test_rebind_points_replayed_response_at_new_request():
+    recorded_request = _batch_request("===============1==", _RECORDED_ID, "t", ["a", "b"])
+    replayed_request = _batch_request("===============2==", _REPLAYED_ID, "t", ["a", "b"])
+    response = _batch_response(_RECORDED_ID, ['{"id": "a"}', '{"id": "b"}'])
+    assert _normalise_batch(recorded_request) == _normalise_batch(replayed_request)
+
+    rebound = _rebind_batch(response, replayed_request)
+
+    assert _RECORDED_ID.encode() not in rebound
+    assert f"<response-{_REPLAYED_ID} + 1>".encode() in rebound
+    assert f"<response-{_REPLAYED_ID} + 2>".encode() in rebound
+    assert rebound.replace(_REPLAYED_ID.encode(), _RECORDED_ID.encode()) == response
+
+
+def test_rebind_without_batch_request_returns_content():
+    content = b'{"items": []}'
+
+    assert _rebind_batch(content, b'{"id": "a"}') is content
+    assert _rebind_batch(content, None) is content
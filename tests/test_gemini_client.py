@@ -0,0 +1,198 @@
+"""Transcript chunking, timestamp handling and retries of the Gemini summarizer."""
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from youtube_summary import gemini_client
+from youtube_summary.cache import DiskStore, SummaryCache
+from youtube_summary.config import GeminiConfig
+from youtube_summary.gemini_client import (
+    GeminiSummarizer,
+    TranscriptChunk,
+    _is_compact,
+    _link_timestamps,
+    split_transcript,
+)
+from youtube_summary.rate_limiter import RateLimiter, estimate_tokens
+from youtube_summary.youtube_client import Video
+
+_VIDEO = Video(
+    video_id="abc",
+    title="Title",
+    description="",
+    channel_title="Channel",
+    published_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+)
+_LINK = "https://www.youtube.com/watch?v=abc&t={}s"
+
+
+def test_split_breaks_once_a_line_reaches_the_chunk_length():
+    transcript = "[0s] a\n[299s] b\n[300s] c\n[599s] d\n[600s] e"
+
+    assert split_transcript(transcript, 300) == [
+        TranscriptChunk(0, 0, 299, "[0s] a\n[299s] b"),
+        TranscriptChunk(1, 300, 599, "[300s] c\n[599s] d"),
+        TranscriptChunk(2, 600, 600, "[600s] e"),
+    ]
+
+
+def test_split_measures_chunks_from_their_first_timestamp():
+    transcript = "[10s] a\n[305s] b\n[310s] c"
+
+    assert [chunk.start for chunk in split_transcript(transcript, 300)] == [10, 310]
+
+
+def test_split_keeps_untimed_lines_with_the_line_before():
+    transcript = "intro\n[0s] a\nmore a\n[400s] b\nmore b"
+
+    assert split_transcript(transcript, 300) == [
+        TranscriptChunk(0, 0, 0, "intro\n[0s] a\nmore a"),
+        TranscriptChunk(1, 400, 400, "[400s] b\nmore b"),
+    ]
+
+
+def test_split_linked_transcript():
+    transcript = "\n".join(
+        f"[{seconds}s]({_LINK.format(seconds)}) line" for seconds in (0, 200, 400)
+    )
+
+    chunks = split_transcript(transcript, 300)
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [(0, 200), (400, 400)]
+    assert chunks[1].text == f"[400s]({_LINK.format(400)}) line"
+
+
+def test_split_untimed_transcript_is_one_chunk():
+    assert split_transcript("a\nb", 300) == [TranscriptChunk(0, 0, 0, "a\nb")]
+    assert split_transcript("", 300) == []
+
+
+def test_is_compact_detects_the_format_of_the_first_timestamp():
+    assert _is_compact("[0s] hello")
+    assert _is_compact("intro\n[30s] hello")
+    assert not _is_compact(f"[0s]({_LINK.format(0)}) hello")
+    assert not _is_compact("no timestamps")
+    assert not _is_compact(None)
+
+
+def test_is_compact_with_parentheses_after_the_timestamp():
+    assert _is_compact("[0s] (music)")
+    assert _is_compact("[0s](music) hello")
+    assert not _is_compact(f"[0s]({_LINK.format(0)}) (music)")
+
+
+def test_link_timestamps_links_bare_timestamps():
+    assert _link_timestamps("See [83s] and [5s].", _VIDEO) == (
+        f"See [83s]({_LINK.format(83)}) and [5s]({_LINK.format(5)})."
+    )
+
+
+def test_link_timestamps_leaves_linked_timestamps_alone():
+    text = f"See [83s]({_LINK.format(83)}) and [5s]"
+
+    assert _link_timestamps(text, _VIDEO) == (
+        f"See [83s]({_LINK.format(83)}) and [5s]({_LINK.format(5)})"
+    )
+
+
+def test_link_timestamps_with_parentheses_after_the_timestamp():
+    link = _LINK.format(30)
+
+    assert _link_timestamps("[30s] (applause)", _VIDEO) == f"[30s]({link}) (applause)"
+    assert _link_timestamps("[30s](applause)", _VIDEO) == f"[30s]({link})(applause)"
+
+
+class _FlakyModel:
+    """Fail with a deadline error ``failures`` times, then answer."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("504 Deadline Exceeded")
+        return SimpleNamespace(text="summary", usage_metadata=None)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return self.generate_content(prompt, **kwargs)
+
+
+@pytest.fixture
+def flaky_summarizer(monkeypatch):
+    monkeypatch.setattr(gemini_client, "_RETRY_DELAY_SECONDS", 0)
+    prompt = "x" * 4000
+    limiter = RateLimiter(tokens_per_minute=estimate_tokens(prompt) * 2)
+    summarizer = GeminiSummarizer(GeminiConfig(api_key="key"), rate_limiter=limiter)
+    summarizer._model = _FlakyModel(failures=3)
+    return summarizer, limiter, prompt
+
+
+def test_failed_attempts_refund_their_tokens(flaky_summarizer):
+    summarizer, limiter, prompt = flaky_summarizer
+
+    assert summarizer._generate(_VIDEO, prompt) == ("summary", 0.0)
+    # Only the successful attempt's estimate is still reserved.
+    assert limiter._reserve(estimate_tokens(prompt)) == 0.0
+
+
+def test_failed_async_attempts_refund_their_tokens(flaky_summarizer):
+    summarizer, limiter, prompt = flaky_summarizer
+
+    assert asyncio.run(summarizer._generate_async(_VIDEO, prompt)) == ("summary", 0.0)
+    assert limiter._reserve(estimate_tokens(prompt)) == 0.0
+
+
+class _CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(text="[0s] point", usage_metadata=None)
+
+
+def _long_transcript_summarizer(cache, **config):
+    config = GeminiConfig(api_key="key", requests_per_minute=None, **config)
+    summarizer = GeminiSummarizer(config, cache=cache)
+    summarizer._model = _CountingModel()
+    return summarizer
+
+
+@pytest.fixture
+def summary_cache(tmp_path):
+    return SummaryCache(DiskStore(tmp_path / "summaries.sqlite3"))
+
+
+_LONG_TRANSCRIPT = "\n".join(f"[{seconds}s] line {seconds}" for seconds in range(0, 600, 30))
+_CHUNKED = {"long_transcript_chars": 100, "chunk_seconds": 120}
+
+
+def test_chunked_summary_is_served_from_cache(summary_cache):
+    first = _long_transcript_summarizer(summary_cache, **_CHUNKED)
+    first.summarize(_VIDEO, transcript=_LONG_TRANSCRIPT)
+    again = _long_transcript_summarizer(summary_cache, **_CHUNKED)
+
+    assert again.summarize(_VIDEO, transcript=_LONG_TRANSCRIPT).from_cache
+    assert again._model.calls == 0
+
+
+def test_changing_chunk_seconds_misses_the_summary_cache(summary_cache):
+    first = _long_transcript_summarizer(summary_cache, **_CHUNKED)
+    first.summarize(_VIDEO, transcript=_LONG_TRANSCRIPT)
+    rechunked = _long_transcript_summarizer(
+        summary_cache, long_transcript_chars=100, chunk_seconds=300
+    )
+
+    assert not rechunked.summarize(_VIDEO, transcript=_LONG_TRANSCRIPT).from_cache
+    assert rechunked._model.calls == 3
+
+
+def test_crossing_the_long_transcript_threshold_misses_the_summary_cache(summary_cache):
+    single = _long_transcript_summarizer(summary_cache, long_transcript_chars=None)
+    single.summarize(_VIDEO, transcript=_LONG_TRANSCRIPT)
+    chunked = _long_transcript_summarizer(summary_cache, **_CHUNKED)
+
+    assert not chunked.summarize(_VIDEO, transcript=_LONG_TRANSCRIPT).from_cache
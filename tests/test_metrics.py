@@ -0,0 +1,73 @@
+"""Prometheus rendering of the API and stage metrics."""
+from youtube_summary.metrics import Metrics
+
+
+def _samples(text):
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def test_render_lists_every_metric_with_help_and_type():
+    text = Metrics().render()
+
+    assert "# TYPE youtube_summary_request_seconds histogram" in text
+    assert "# TYPE youtube_summary_requests_total counter" in text
+    assert "# HELP youtube_summary_stage_cpu_seconds_total" in text
+    assert _samples(text) == []
+    assert text.endswith("\n")
+
+
+def test_render_counters():
+    metrics = Metrics()
+    metrics.record_outcome("gemini", "generate_content", "ok")
+    metrics.record_outcome("gemini", "generate_content", "ok")
+    metrics.record_outcome("youtube", "videos.list", "HttpError:403")
+    metrics.record_retry("gemini", "generate_content")
+    metrics.record_bytes("notion", sent=120, received=0)
+
+    samples = _samples(metrics.render())
+    assert (
+        'youtube_summary_requests_total{operation="generate_content",'
+        'outcome="ok",service="gemini"} 2'
+    ) in samples
+    assert (
+        'youtube_summary_requests_total{operation="videos.list",'
+        'outcome="HttpError:403",service="youtube"} 1'
+    ) in samples
+    assert (
+        'youtube_summary_retries_total{operation="generate_content",service="gemini"} 1'
+    ) in samples
+    assert 'youtube_summary_bytes_total{direction="sent",service="notion"} 120' in samples
+    assert not any('direction="received"' in sample for sample in samples)
+
+
+def test_render_cumulative_histogram_buckets():
+    metrics = Metrics()
+    metrics.observe_stage("summarise", 0.03, cpu_seconds=0.5)
+    metrics.observe_stage("summarise", 200.0)
+
+    samples = _samples(metrics.render())
+    prefix = 'youtube_summary_stage_seconds_bucket{stage="summarise",le='
+    assert f'{prefix}"0.025"}} 0' in samples
+    assert f'{prefix}"0.05"}} 1' in samples
+    assert f'{prefix}"120"}} 1' in samples
+    assert f'{prefix}"+Inf"}} 2' in samples
+    assert 'youtube_summary_stage_seconds_sum{stage="summarise"} 200.03' in samples
+    assert 'youtube_summary_stage_seconds_count{stage="summarise"} 2' in samples
+    assert 'youtube_summary_stage_cpu_seconds_total{stage="summarise"} 0.5' in samples
+
+
+def test_render_escapes_label_values():
+    metrics = Metrics()
+    metrics.record_outcome("notion", 'say "hi"\\now', "ok")
+
+    assert 'operation="say \\"hi\\"\\\\now"' in metrics.render()
+
+
+def test_child_metrics_forward_to_parent():
+    parent = Metrics()
+    first, second = Metrics(parent=parent), Metrics(parent=parent)
+    first.record_outcome("gemini", "generate_content", "ok")
+    second.record_outcome("gemini", "generate_content", "ok")
+
+    assert 'service="gemini"} 1' in first.render()
+    assert 'service="gemini"} 2' in parent.render()
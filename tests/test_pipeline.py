@@ -0,0 +1,175 @@
+"""Ordering, backpressure and error propagation of the pipeline stages."""
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from youtube_summary.metrics import Metrics
+from youtube_summary.pipeline import astage, stage
+from youtube_summary.profiling import RunProfiler, current_profiler, profile_run
+
+
+class _Source:
+    """Iterate ``range(count)``, counting how many items were pulled."""
+
+    def __init__(self, count, fail_at=None):
+        self.count = count
+        self.fail_at = fail_at
+        self.pulled = 0
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        for item in range(self.count):
+            if item == self.fail_at:
+                raise RuntimeError(f"upstream failed at {item}")
+            with self._lock:
+                self.pulled += 1
+            yield item
+
+    async def __aiter__(self):
+        for item in self:
+            yield item
+
+
+def _slow_for_early_items(item):
+    # Earlier items finish last, so any reordering would show.
+    time.sleep(0.01 * (8 - item % 8))
+    return item * 10
+
+
+async def _aslow_for_early_items(item):
+    await asyncio.sleep(0.01 * (8 - item % 8))
+    return item * 10
+
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_stage_keeps_input_order_with_several_workers():
+    results = list(stage(_Source(16), _slow_for_early_items, name="test", workers=4))
+
+    assert results == [item * 10 for item in range(16)]
+
+
+def test_astage_keeps_input_order_with_several_workers():
+    results = asyncio.run(
+        _collect(astage(_Source(16), _aslow_for_early_items, name="test", workers=4))
+    )
+
+    assert results == [item * 10 for item in range(16)]
+
+
+def test_astage_accepts_plain_functions():
+    results = asyncio.run(_collect(astage(_Source(5), lambda item: item + 1, name="test")))
+
+    assert results == [1, 2, 3, 4, 5]
+
+
+def test_stage_stops_pulling_when_the_consumer_stalls():
+    source = _Source(1000)
+    results = stage(source, lambda item: item, name="test", workers=2, buffer=2)
+
+    assert next(results) == 0
+    time.sleep(0.2)
+    # One consumed, ``buffer`` queued, and at most ``workers`` in flight
+    # plus one waiting to be queued.
+    assert source.pulled <= 1 + 2 + 2 + 1
+    results.close()
+
+
+def test_astage_stops_pulling_when_the_consumer_stalls():
+    source = _Source(1000)
+
+    async def run():
+        results = astage(source, lambda item: item, name="test", workers=2, buffer=2)
+        assert await results.__anext__() == 0
+        await asyncio.sleep(0.1)
+        pulled = source.pulled
+        await results.aclose()
+        return pulled
+
+    assert asyncio.run(run()) <= 1 + 2 + 2 + 1
+
+
+def _fail_on_three(item):
+    if item == 3:
+        raise ValueError("bad item")
+    return item
+
+
+async def _afail_on_three(item):
+    return _fail_on_three(item)
+
+
+def test_stage_reraises_errors_after_earlier_results():
+    results = []
+    with pytest.raises(ValueError, match="bad item"):
+        for item in stage(_Source(10), _fail_on_three, name="test", workers=2):
+            results.append(item)
+
+    assert results == [0, 1, 2]
+
+
+def test_astage_reraises_errors_after_earlier_results():
+    async def run(results):
+        async for item in astage(_Source(10), _afail_on_three, name="test", workers=2):
+            results.append(item)
+
+    results = []
+    with pytest.raises(ValueError, match="bad item"):
+        asyncio.run(run(results))
+
+    assert results == [0, 1, 2]
+
+
+def test_stage_reraises_upstream_errors():
+    with pytest.raises(RuntimeError, match="upstream failed at 2"):
+        list(stage(_Source(5, fail_at=2), lambda item: item, name="test"))
+
+
+def test_astage_reraises_upstream_errors():
+    with pytest.raises(RuntimeError, match="upstream failed at 2"):
+        asyncio.run(_collect(astage(_Source(5, fail_at=2), lambda item: item, name="test")))
+
+
+def test_stages_record_per_item_timings():
+    metrics = Metrics()
+    list(stage(_Source(3), lambda item: item, name="sync", metrics=metrics))
+    asyncio.run(_collect(astage(_Source(2), lambda item: item, name="async", metrics=metrics)))
+
+    stages = metrics.summary()["stages"]
+    assert stages["sync"]["count"] == 3
+    assert stages["async"]["count"] == 2
+    assert "cpu_seconds" in stages["sync"]
+
+
+_CALLER = contextvars.ContextVar("caller", default=None)
+
+
+def test_stage_runs_func_in_the_callers_context():
+    token = _CALLER.set("run")
+    try:
+        results = list(stage([1, 2, 3], lambda item: _CALLER.get(), name="test", workers=2))
+    finally:
+        _CALLER.reset(token)
+
+    assert results == ["run", "run", "run"]
+
+
+def test_stage_workers_see_the_run_profiler(tmp_path):
+    profiler = RunProfiler(tmp_path / "out.md")
+    with profile_run(profiler):
+        seen = list(stage([1, 2], lambda item: current_profiler(), name="test", workers=2))
+
+    assert seen == [profiler, profiler]
+
+
+def test_astage_runs_func_in_the_callers_context():
+    async def run():
+        _CALLER.set("run")
+        return await _collect(astage(_Source(2), lambda item: _CALLER.get(), name="test"))
+
+    assert asyncio.run(run()) == ["run", "run"]
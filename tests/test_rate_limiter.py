@@ -0,0 +1,43 @@
+"""Token budget reservations of the rate limiter."""
+import pytest
+
+from youtube_summary.rate_limiter import RateLimiter, estimate_tokens
+
+
+def test_reservation_beyond_the_budget_waits():
+    limiter = RateLimiter(tokens_per_minute=600)
+
+    assert limiter.acquire(600) == 0.0
+    assert limiter._reserve(60) == pytest.approx(6.0, abs=0.1)
+
+
+def test_refund_returns_the_tokens_of_a_failed_request():
+    limiter = RateLimiter(tokens_per_minute=600)
+    for _ in range(3):
+        limiter.acquire(200)
+        limiter.refund(200)
+
+    assert limiter.acquire(600) == 0.0
+
+
+def test_record_usage_charges_the_difference_to_the_estimate():
+    limiter = RateLimiter(tokens_per_minute=600)
+    limiter.acquire(100)
+    limiter.record_usage(100, 400)
+
+    assert limiter._reserve(200) == 0.0
+    assert limiter._reserve(60) > 0.0
+
+
+def test_refund_keeps_the_request_counted():
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=600)
+    limiter.acquire(100)
+    limiter.refund(100)
+
+    assert limiter._reserve(0) == pytest.approx(60.0, abs=0.1)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("ab") == 1
+    assert estimate_tokens("a" * 400) == 100
@@ -0,0 +1,46 @@
+"""Per-video span tracing."""
+import pytest
+
+from youtube_summary.tracing import Tracer, trace_span
+
+
+def _fail_in_span(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("summarise", "video", attempt=1):
+            raise ValueError("boom")
+
+
+def test_tracer_groups_events_per_video():
+    tracer = Tracer()
+    tracer.label("video", "Title")
+    tracer.instant("discovered", "video", channel="Channel")
+    with tracer.span("transcript", "video") as attrs:
+        attrs["available"] = True
+    _fail_in_span(tracer)
+
+    (video,) = tracer.to_dict()["videos"]
+    assert video["video_id"] == "video"
+    assert video["title"] == "Title"
+    assert [event["name"] for event in video["events"]] == [
+        "discovered",
+        "transcript",
+        "summarise",
+    ]
+    assert video["events"][1]["available"] is True
+    assert video["events"][2]["error"] == "ValueError"
+    assert video["events"][2]["attempt"] == 1
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    tracer.label("video", "Title")
+    tracer.instant("discovered", "video")
+    tracer.record("gemini.queue_wait", "video", 0.0, tracer.now())
+    with tracer.span("transcript", "video") as attrs:
+        attrs["available"] = True
+    with trace_span(tracer, "gemini.request", "video"):
+        pass
+    _fail_in_span(tracer)
+
+    assert tracer.to_dict()["videos"] == []
+    assert tracer.to_chrome_trace()["traceEvents"] == []
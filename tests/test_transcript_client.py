@@ -0,0 +1,67 @@
+"""Compact and linked transcript formats."""
+from youtube_summary.transcript_client import TranscriptFetcher, build_timestamp_url
+
+
+def _snippet(text, start=None):
+    snippet = {"text": text}
+    if start is not None:
+        snippet["start"] = start
+    return snippet
+
+
+def test_compact_merges_snippets_within_a_window():
+    snippets = [_snippet("one", 0.4), _snippet("two", 12.9), _snippet("three", 29.99)]
+
+    assert TranscriptFetcher._format_compact(snippets, 30) == "[0s] one two three"
+
+
+def test_compact_window_starts_at_the_first_snippet_past_the_boundary():
+    snippets = [
+        _snippet("a", 5),
+        _snippet("b", 34),
+        _snippet("c", 35),
+        _snippet("d", 64),
+        _snippet("e", 65),
+    ]
+
+    assert TranscriptFetcher._format_compact(snippets, 30) == "[5s] a b\n[35s] c d\n[65s] e"
+
+
+def test_compact_keeps_untimed_snippets_with_the_window_they_follow():
+    snippets = [
+        _snippet("intro"),
+        _snippet("first", 10),
+        _snippet("aside"),
+        _snippet("second", 45),
+    ]
+
+    assert TranscriptFetcher._format_compact(snippets, 30) == (
+        "intro\n[10s] first aside\n[45s] second"
+    )
+
+
+def test_compact_normalises_whitespace_and_drops_empty_snippets():
+    snippets = [_snippet("  many\n  spaces ", 0), _snippet("   ", 1), _snippet("end", 2)]
+
+    assert TranscriptFetcher._format_compact(snippets, 30) == "[0s] many spaces end"
+    assert TranscriptFetcher._format_compact([_snippet(" ", 0)], 30) is None
+
+
+def test_compact_separates_parenthesised_text_from_the_timestamp():
+    snippets = [_snippet("(music)", 0), _snippet("(applause)", 40)]
+
+    assert TranscriptFetcher._format_compact(snippets, 30) == "[0s] (music)\n[40s] (applause)"
+
+
+def test_linked_format_links_timed_lines_only():
+    fetcher = TranscriptFetcher()
+    snippets = [_snippet("intro"), _snippet("(music)", 83.6), _snippet(" ", 90)]
+
+    assert fetcher._format_full(snippets, "abc") == (
+        "intro\n[83s](https://www.youtube.com/watch?v=abc&t=83s) (music)"
+    )
+
+
+def test_build_timestamp_url_appends_to_existing_query():
+    assert build_timestamp_url("abc", None, 7) == "https://www.youtube.com/watch?v=abc&t=7s"
+    assert build_timestamp_url("abc", "https://youtu.be/abc", 7) == "https://youtu.be/abc?t=7s"
@@ -0,0 +1,91 @@
+"""Commit semantics of the per-channel watermark store."""
+from datetime import datetime, timedelta, timezone
+import json
+
+from youtube_summary.watermark import Watermark, WatermarkStore
+
+_NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _store(tmp_path):
+    return WatermarkStore(tmp_path / "watermarks.json")
+
+
+def test_observations_stay_pending_until_commit(tmp_path):
+    store = _store(tmp_path)
+    store.observe("channel", "video", _NOW)
+
+    assert store.get("channel") is None
+    assert not store.path.exists()
+    assert store.commit() == 1
+    assert store.get("channel") == Watermark("video", _NOW)
+
+
+def test_commit_keeps_the_newest_observation_per_channel(tmp_path):
+    store = _store(tmp_path)
+    store.observe("channel", "older", _NOW - timedelta(hours=1))
+    store.observe("channel", "newest", _NOW)
+    store.observe("channel", "old", _NOW - timedelta(hours=2))
+    store.commit()
+
+    assert store.get("channel").video_id == "newest"
+
+
+def test_commit_never_moves_a_watermark_backwards(tmp_path):
+    store = _store(tmp_path)
+    store.observe("channel", "new", _NOW)
+    store.commit()
+    store.observe("channel", "old", _NOW - timedelta(days=1))
+
+    assert store.commit() == 0
+    assert store.get("channel").video_id == "new"
+
+
+def test_commit_persists_and_reloads(tmp_path):
+    store = _store(tmp_path)
+    store.observe("a", "video-a", _NOW)
+    store.observe("b", "video-b", _NOW - timedelta(minutes=5))
+    store.commit()
+
+    reloaded = _store(tmp_path)
+    assert reloaded.get("a") == Watermark("video-a", _NOW)
+    assert reloaded.get("b") == Watermark("video-b", _NOW - timedelta(minutes=5))
+    assert not (tmp_path / "watermarks.json.tmp").exists()
+
+
+def test_uncommitted_observations_are_not_persisted(tmp_path):
+    store = _store(tmp_path)
+    store.observe("channel", "video", _NOW)
+
+    assert _store(tmp_path).get("channel") is None
+
+
+def test_held_channels_keep_their_committed_watermark(tmp_path):
+    store = _store(tmp_path)
+    store.observe("held", "first", _NOW - timedelta(days=1))
+    store.commit()
+    store.observe("held", "failed", _NOW)
+    store.observe("held", "ok", _NOW - timedelta(hours=1))
+    store.observe("other", "video", _NOW)
+    store.hold("failed")
+
+    assert store.commit() == 1
+    assert store.get("held").video_id == "first"
+    assert store.get("other").video_id == "video"
+
+
+def test_holds_apply_to_one_commit_only(tmp_path):
+    store = _store(tmp_path)
+    store.observe("channel", "failed", _NOW)
+    store.hold("failed")
+    store.commit()
+    store.observe("channel", "retried", _NOW)
+
+    assert store.commit() == 1
+    assert store.get("channel").video_id == "retried"
+
+
+def test_unreadable_file_is_ignored(tmp_path):
+    (tmp_path / "watermarks.json").write_text(json.dumps({"channel": {}}), encoding="utf-8")
+
+    assert _store(tmp_path).get("channel") is None
@@ -1,10 +1,42 @@
-"""Utilities for summarising YouTube subscription videos."""
+"""Utilities for summarising YouTube subscription videos.
+
+Public names are resolved lazily (PEP 562) so that importing the package,
+for example to start the HTTP server, does not load the Google client
+libraries until a stage actually needs them.
+"""
+
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "AppConfig": ".config",
+    "Document": ".document",
+    "GeminiConfig": ".config",
+    "GeminiSummarizer": ".gemini_client",
+    "NotionConfig": ".config",
+    "NotionUploader": ".notion_client",
+    "Video": ".youtube_client",
+    "YouTubeClient": ".youtube_client",
+    "YouTubeConfig": ".config",
+    "build_markdown_document": ".document",
+    "load_config_from_env": ".config",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "youtube":
+        return import_module(".youtube", __name__)
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-from .config import AppConfig, GeminiConfig, NotionConfig, YouTubeConfig, load_config_from_env
-from .document import Document, build_markdown_document
-from .gemini_client import GeminiSummarizer
-from .notion_client import NotionUploader
-from .youtube_client import Video, YouTubeClient
 
 __all__ = [
     "AppConfig",
@@ -0,0 +1,326 @@
+"""Persistent caches backed by SQLite."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import zlib
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+)
+"""
+_EVICT_EVERY = 50
+
+
+def hash_text(*parts: str) -> str:
+    """Return a stable SHA-256 hex digest of the given text fragments."""
+
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class DiskStore:
+    """Key/value store with zlib-compressed values and LRU/age eviction.
+
+    A single connection is shared between threads and guarded by a lock, so
+    one store can be used from every pipeline worker.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._max_bytes = max_bytes
+        self._max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(_SCHEMA)
+        self.evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at, expires_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at, expires_at = row
+            expired = (expires_at is not None and expires_at <= now) or (
+                self._max_age_seconds is not None
+                and created_at + self._max_age_seconds <= now
+            )
+            with self._connection:
+                if expired:
+                    self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    return None
+                self._connection.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return zlib.decompress(value)
+
+    def set(self, key: str, value: bytes, *, ttl_seconds: Optional[float] = None) -> None:
+        now = time.time()
+        compressed = zlib.compress(value)
+        expires_at = now + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, value, size, created_at, accessed_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, compressed, len(compressed), now, now, expires_at),
+                )
+            self._writes += 1
+            due = self._writes % _EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones over the size budget."""
+
+        now = time.time()
+        removed = 0
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,),
+            )
+            removed += cursor.rowcount
+            if self._max_age_seconds is not None:
+                cursor = self._connection.execute(
+                    "DELETE FROM entries WHERE created_at <= ?",
+                    (now - self._max_age_seconds,),
+                )
+                removed += cursor.rowcount
+            if self._max_bytes is not None:
+                (total,) = self._connection.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+                if total > self._max_bytes:
+                    rows = self._connection.execute(
+                        "SELECT key, size FROM entries ORDER BY accessed_at ASC"
+                    ).fetchall()
+                    stale = []
+                    for key, size in rows:
+                        if total <= self._max_bytes:
+                            break
+                        stale.append((key,))
+                        total -= size
+                    self._connection.executemany(
+                        "DELETE FROM entries WHERE key = ?", stale
+                    )
+                    removed += len(stale)
+        if removed:
+            logger.info("%s Evicted %d entries from %s.", LOG_PREFIX, removed, self.path)
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CacheStats:
+    """Thread-safe named counters, hits and misses by default."""
+
+    def __init__(self, *names: str) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {name: 0 for name in names or ("hits", "misses")}
+
+    def record(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class SummaryCache:
+    """Content-addressed cache of Gemini summaries.
+
+    Entries are keyed by video ID, model, language and a hash of the
+    instruction text and transcript, so a change to any of them produces a
+    fresh summary. With ``bypass`` enabled lookups always miss but newly
+    generated summaries are still stored.
+    """
+
+    def __init__(self, store: DiskStore, *, bypass: bool = False):
+        self._store = store
+        self._bypass = bypass
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(
+        video_id: str,
+        *,
+        model: str,
+        language: Optional[str],
+        instructions: str,
+        transcript: Optional[str],
+    ) -> str:
+        content_hash = hash_text(instructions, transcript or "")
+        return hash_text(video_id, model, language or "", content_hash)
+
+    def get(self, key: str) -> Optional[str]:
+        if self._bypass:
+            self.stats.record("bypassed")
+            return None
+        value = self._store.get(key)
+        if value is None:
+            self.stats.record("misses")
+            return None
+        self.stats.record("hits")
+        return json.loads(value.decode("utf-8"))["summary"]
+
+    def set(self, key: str, summary: str) -> None:
+        payload = json.dumps({"summary": summary}, ensure_ascii=False)
+        self._store.set(key, payload.encode("utf-8"))
+
+
+@dataclass
+class CachedTranscript:
+    """A cached transcript lookup.
+
+    ``snippets`` holds the raw caption snippets for a successful lookup;
+    ``missing_reason`` is set instead for a cached negative result.
+    """
+
+    snippets: Optional[List[Dict[str, object]]] = None
+    missing_reason: Optional[str] = None
+
+
+class TranscriptCache:
+    """Persistent store of raw transcript snippets keyed by video and languages.
+
+    Negative results (no transcript, transcripts disabled) are cached with a
+    TTL so known failures return immediately without going through the proxy.
+    """
+
+    def __init__(self, store: DiskStore, *, negative_ttl_seconds: float):
+        self._store = store
+        self._negative_ttl_seconds = negative_ttl_seconds
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(video_id: str, languages: Sequence[str]) -> str:
+        return hash_text("transcript", video_id, ",".join(languages))
+
+    def get(self, key: str) -> Optional[CachedTranscript]:
+        value = self._store.get(key)
+        if value is None:
+            self.stats.record("misses")
+            return None
+        payload = json.loads(value.decode("utf-8"))
+        if payload.get("missing_reason"):
+            self.stats.record("negative_hits")
+            return CachedTranscript(missing_reason=payload["missing_reason"])
+        self.stats.record("hits")
+        return CachedTranscript(snippets=payload.get("snippets", []))
+
+    def set_snippets(self, key: str, snippets: List[Dict[str, object]]) -> None:
+        payload = json.dumps({"snippets": snippets}, ensure_ascii=False)
+        self._store.set(key, payload.encode("utf-8"))
+
+    def set_missing(self, key: str, reason: str) -> None:
+        payload = json.dumps({"missing_reason": reason})
+        self._store.set(
+            key, payload.encode("utf-8"), ttl_seconds=self._negative_ttl_seconds
+        )
+
+
+class MetadataCache:
+    """TTL cache for slowly changing YouTube metadata.
+
+    Values are stored with the time they were fetched so callers can report
+    the age of what they served. Entries older than ``ttl_seconds`` are
+    treated as missing but are not deleted, since the next fetch replaces
+    them anyway.
+    """
+
+    def __init__(self, store: DiskStore, *, ttl_seconds: float):
+        self._store = store
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Tuple[object, float]]:
+        """Return ``(value, age_seconds)`` for a fresh entry, else ``None``."""
+
+        raw = self._store.get(key)
+        if raw is None:
+            return None
+        payload = json.loads(raw.decode("utf-8"))
+        age = max(time.time() - float(payload["stored_at"]), 0.0)
+        if age > self.ttl_seconds:
+            return None
+        return payload["value"], age
+
+    def set(self, key: str, value: object) -> None:
+        payload = json.dumps({"stored_at": time.time(), "value": value})
+        self._store.set(key, payload.encode("utf-8"))
+
+
+class EtagCache:
+    """Last seen ``etag`` and body for each conditional API request."""
+
+    def __init__(self, store: DiskStore):
+        self._store = store
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(uri: str) -> str:
+        return hash_text("etag", uri)
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, object]]]:
+        raw = self._store.get(key)
+        if raw is None:
+            return None
+        payload = json.loads(raw.decode("utf-8"))
+        return payload["etag"], payload["body"]
+
+    def set(self, key: str, etag: str, body: Dict[str, object]) -> None:
+        payload = json.dumps({"etag": etag, "body": body}, ensure_ascii=False)
+        self._store.set(key, payload.encode("utf-8"))
+
+
+__all__ = [
+    "CacheStats",
+    "CachedTranscript",
+    "DiskStore",
+    "EtagCache",
+    "MetadataCache",
+    "SummaryCache",
+    "TranscriptCache",
+    "hash_text",
+]
@@ -0,0 +1,617 @@
+"""Record and replay API traffic for reproducible offline runs."""
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import Counter, deque
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from functools import lru_cache, reduce
+import gzip
+import hashlib
+import importlib
+import json
+import logging
+from pathlib import Path
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+    from youtube_summary.config import AppConfig
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+# Placeholder credentials for replays, which never reach the real APIs.
+REPLAY_API_KEY = "cassette-replay"
+# Services whose request bodies are left out of the match key. Notion
+# appends are batched by a flush timer, so their bodies depend on timing.
+_BODYLESS_SERVICES = {"notion"}
+# Response headers that no longer apply once the body is stored decoded.
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_BATCH_BOUNDARY = re.compile(rb"=+\d+==")
+# Batch parts are tagged "<{uuid} + {id}>", answered as "<response-{uuid} + {id}>".
+_BATCH_REQUEST_ID = re.compile(rb"Content-ID: <([0-9a-f-]{36}) ?\+")
+_BATCH_RESPONSE_ID = re.compile(rb"<response-[0-9a-f-]{36}( ?\+)")
+_BATCH_ID = re.compile(rb"<(response-)?[0-9a-f-]{36}( ?\+)")
+_BATCH_AUTHORIZATION = re.compile(rb"^authorization:[^\r\n]*\r?\n", re.IGNORECASE | re.MULTILINE)
+
+
+class CassetteMiss(LookupError):
+    """Raised when a replayed run makes a request the cassette does not hold."""
+
+
+@dataclass
+class Interaction:
+    """One recorded request and its response or error."""
+
+    service: str
+    key: str
+    request: str
+    status: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    message: str = ""
+
+    def to_dict(self) -> Dict[str, object]:
+        payload: Dict[str, object] = {
+            "service": self.service,
+            "key": self.key,
+            "request": self.request,
+            "elapsed": round(self.elapsed, 4),
+        }
+        if self.error is not None:
+            payload.update(error=self.error, message=self.message)
+            return payload
+        payload.update(status=self.status, headers=self.headers)
+        try:
+            payload["body"] = self.body.decode("utf-8")
+        except UnicodeDecodeError:
+            payload["body_base64"] = base64.b64encode(self.body).decode("ascii")
+        return payload
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "Interaction":
+        if "body_base64" in data:
+            body = base64.b64decode(str(data["body_base64"]))
+        else:
+            body = str(data.get("body", "")).encode("utf-8")
+        return cls(
+            service=str(data["service"]),
+            key=str(data["key"]),
+            request=str(data.get("request", "")),
+            status=int(data.get("status", 0)),  # type: ignore[arg-type]
+            headers=dict(data.get("headers") or {}),  # type: ignore[arg-type]
+            body=body,
+            elapsed=float(data.get("elapsed", 0.0)),  # type: ignore[arg-type]
+            error=data.get("error"),  # type: ignore[arg-type]
+            message=str(data.get("message", "")),
+        )
+
+    def raise_error(self) -> None:
+        """Re-raise a recorded exception, if this interaction failed."""
+
+        if self.error is None:
+            return
+        module_name, _, qualname = self.error.partition(":")
+        try:
+            error_type = reduce(getattr, qualname.split("."), importlib.import_module(module_name))
+            error = error_type(self.message)
+        except Exception:  # pylint: disable=broad-except
+            error = ConnectionError(f"{self.error}: {self.message}")
+        raise error
+
+
+class Cassette:
+    """Compressed log of API interactions, recorded live or replayed offline.
+
+    The clients hand every YouTube, transcript, Gemini and Notion request to
+    the cassette through their transport seams. While recording, the real
+    request is made and its response (or exception) and latency are kept.
+    When replaying, the response recorded for the same request is returned
+    after sleeping for the recorded latency times ``latency_scale``; no
+    network access takes place. Requests are matched on service, method,
+    URL and body, and identical requests replay their responses in the
+    recorded order; once those run out the last one is repeated.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        replaying: bool = False,
+        latency_scale: float = 1.0,
+        metadata: Optional[Dict[str, object]] = None,
+    ):
+        self.path = Path(path)
+        self.replaying = replaying
+        self.latency_scale = max(latency_scale, 0.0)
+        self.metadata: Dict[str, object] = dict(metadata or {})
+        self._lock = threading.Lock()
+        self._recorded: List[Interaction] = []
+        self._pending: Dict[Tuple[str, str], Deque[Interaction]] = {}
+        self._last: Dict[Tuple[str, str], Interaction] = {}
+        self._used: Counter = Counter()
+        self._repeats = 0
+        self._misses = 0
+
+    @classmethod
+    def load(cls, path: Path | str, *, latency_scale: float = 1.0) -> "Cassette":
+        """Open a recorded cassette for replay."""
+
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            header = json.loads(handle.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}: {header.get('version')}")
+            interactions = [Interaction.from_dict(json.loads(line)) for line in handle if line.strip()]
+        cassette = cls(
+            path, replaying=True, latency_scale=latency_scale, metadata=header.get("metadata")
+        )
+        for interaction in interactions:
+            slot = (interaction.service, interaction.key)
+            cassette._pending.setdefault(slot, deque()).append(interaction)
+        return cassette
+
+    def save(self) -> Path:
+        """Write the recorded interactions to :attr:`path` as gzipped JSON lines."""
+
+        with self._lock:
+            interactions = list(self._recorded)
+        header = {
+            "version": CASSETTE_VERSION,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "metadata": self.metadata,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as handle:
+            handle.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for interaction in interactions:
+                handle.write(json.dumps(interaction.to_dict(), ensure_ascii=False) + "\n")
+        logger.info(
+            "%s Saved %d recorded interactions to %s.", LOG_PREFIX, len(interactions), self.path
+        )
+        return self.path
+
+    def key(self, service: str, method: str, url: str, body=None, *extra: Optional[str]) -> str:
+        """Return the match key of a request."""
+
+        parts = [service, method.upper(), url]
+        if service not in _BODYLESS_SERVICES:
+            parts.append(_canonical_body(body).decode("utf-8", "replace"))
+        parts.extend(value or "" for value in extra)
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def record(self, interaction: Interaction) -> None:
+        with self._lock:
+            self._recorded.append(interaction)
+            self._used[interaction.service] += 1
+
+    def record_error(
+        self, service: str, key: str, request: str, error: BaseException, elapsed: float
+    ) -> None:
+        error_type = type(error)
+        message = getattr(error, "message", None)
+        self.record(
+            Interaction(
+                service,
+                key,
+                request,
+                elapsed=elapsed,
+                error=f"{error_type.__module__}:{error_type.__qualname__}",
+                message=message if isinstance(message, str) else str(error),
+            )
+        )
+
+    def replay(self, service: str, key: str, request: str) -> Interaction:
+        """Return the next recorded interaction for a request."""
+
+        slot = (service, key)
+        with self._lock:
+            pending = self._pending.get(slot)
+            if pending:
+                interaction = self._last[slot] = pending.popleft()
+            elif slot in self._last:
+                interaction = self._last[slot]
+                self._repeats += 1
+            else:
+                self._misses += 1
+                raise CassetteMiss(f"No recorded {service} response for {request}")
+            self._used[service] += 1
+        return interaction
+
+    def delay(self, interaction: Interaction) -> float:
+        """Return how long a replayed interaction should take."""
+
+        return interaction.elapsed * self.latency_scale
+
+    def summary(self) -> Dict[str, object]:
+        """Return the mode, path and interaction counts per service."""
+
+        with self._lock:
+            payload: Dict[str, object] = {
+                "mode": "replay" if self.replaying else "record",
+                "path": str(self.path),
+                "interactions": dict(sorted(self._used.items())),
+            }
+            if self.replaying:
+                payload.update(
+                    latency_scale=self.latency_scale,
+                    unused=sum(len(pending) for pending in self._pending.values()),
+                    repeated=self._repeats,
+                    misses=self._misses,
+                )
+        return payload
+
+    def httplib2_request(
+        self, send: Callable, uri: str, method: str, body, headers, *args, **kwargs
+    ):
+        """Record or replay one httplib2 request made through ``send``."""
+
+        import httplib2
+
+        headers = headers or {}
+        normalised = {name.lower(): value for name, value in headers.items()}
+        request = f"{method} {uri}"
+        key = self.key("youtube", method, uri, _normalise_batch(body), normalised.get("if-none-match"))
+        if self.replaying:
+            interaction = self.replay("youtube", key, request)
+            time.sleep(self.delay(interaction))
+            interaction.raise_error()
+            response = httplib2.Response({**interaction.headers, "status": str(interaction.status)})
+            return response, _rebind_batch(interaction.body, body)
+
+        started = time.perf_counter()
+        try:
+            response, content = send(uri, method, body, headers, *args, **kwargs)
+        except Exception as error:
+            self.record_error("youtube", key, request, error, time.perf_counter() - started)
+            raise
+        self.record(
+            Interaction(
+                "youtube",
+                key,
+                request,
+                status=response.status,
+                headers={name: value for name, value in response.items() if name != "status"},
+                body=content or b"",
+                elapsed=time.perf_counter() - started,
+            )
+        )
+        return response, content
+
+    def mount(self, session: "requests.Session", service: str) -> None:
+        """Route every adapter of a requests session through the cassette."""
+
+        adapter_class = _cassette_adapter_class()
+        for prefix, adapter in list(session.adapters.items()):
+            session.mount(prefix, adapter_class(self, service, adapter))
+
+    def httpx_transport(
+        self, transport: "httpx.AsyncBaseTransport", service: str
+    ) -> "httpx.AsyncBaseTransport":
+        """Wrap an httpx transport so its traffic goes through the cassette."""
+
+        return _cassette_transport_class()(self, service, transport)
+
+    def wrap_model(self, model, service: str = "gemini"):
+        """Wrap a Gemini model so ``generate_content`` goes through the cassette."""
+
+        return _CassetteModel(self, service, model)
+
+
+def _canonical_body(body) -> bytes:
+    """Return ``body`` as bytes, re-serialising JSON so clients agree on it."""
+
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        return bytes(body)
+    return json.dumps(parsed, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode(
+        "utf-8"
+    )
+
+
+def _normalise_batch(body) -> Optional[bytes]:
+    """Strip the random boundary, IDs and credentials from a batch request body."""
+
+    if not body:
+        return body
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if b"Content-ID:" not in body:
+        return body
+    body = _BATCH_BOUNDARY.sub(b"=", body)
+    body = _BATCH_AUTHORIZATION.sub(b"", body)
+    return _BATCH_ID.sub(lambda match: b"<" + (match.group(1) or b"") + match.group(2), body)
+
+
+def _rebind_batch(content: bytes, body) -> bytes:
+    """Point the Content-IDs of a replayed batch response at the new request."""
+
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    match = _BATCH_REQUEST_ID.search(body or b"")
+    if match is None:
+        return content
+    base_id = match.group(1)
+    return _BATCH_RESPONSE_ID.sub(lambda found: b"<response-" + base_id + found.group(1), content)
+
+
+def _kept_headers(headers) -> Dict[str, str]:
+    return {
+        name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS
+    }
+
+
+@lru_cache(maxsize=None)
+def _cassette_adapter_class() -> type:
+    """Return the requests adapter class, importing requests on first use."""
+
+    import requests
+    from requests.adapters import BaseAdapter
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    class _CassetteAdapter(BaseAdapter):
+        """requests adapter that records through, or replays instead of, ``inner``."""
+
+        def __init__(self, cassette: Cassette, service: str, inner: BaseAdapter):
+            super().__init__()
+            self.cassette = cassette
+            self.service = service
+            self.inner = inner
+
+        def send(self, request, **kwargs):
+            cassette = self.cassette
+            description = f"{request.method} {request.url}"
+            key = cassette.key(self.service, request.method, request.url, request.body)
+            if cassette.replaying:
+                interaction = cassette.replay(self.service, key, description)
+                time.sleep(cassette.delay(interaction))
+                interaction.raise_error()
+                response = requests.Response()
+                response.status_code = interaction.status
+                response.headers = CaseInsensitiveDict(interaction.headers)
+                response.encoding = get_encoding_from_headers(response.headers)
+                response._content = interaction.body  # pylint: disable=protected-access
+                response.url = request.url
+                response.request = request
+                response.connection = self
+                return response
+
+            started = time.perf_counter()
+            try:
+                response = self.inner.send(request, **kwargs)
+                content = response.content
+            except Exception as error:
+                cassette.record_error(
+                    self.service, key, description, error, time.perf_counter() - started
+                )
+                raise
+            cassette.record(
+                Interaction(
+                    self.service,
+                    key,
+                    description,
+                    status=response.status_code,
+                    headers=_kept_headers(response.headers),
+                    body=content or b"",
+                    elapsed=time.perf_counter() - started,
+                )
+            )
+            return response
+
+        def close(self) -> None:
+            self.inner.close()
+
+    return _CassetteAdapter
+
+
+@lru_cache(maxsize=None)
+def _cassette_transport_class() -> type:
+    """Return the httpx transport class, importing httpx on first use."""
+
+    import httpx
+
+    class _CassetteTransport(httpx.AsyncBaseTransport):
+        """httpx transport that records through, or replays instead of, ``inner``."""
+
+        def __init__(self, cassette: Cassette, service: str, inner: httpx.AsyncBaseTransport):
+            self.cassette = cassette
+            self.service = service
+            self.inner = inner
+
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            cassette = self.cassette
+            url = str(request.url)
+            description = f"{request.method} {url}"
+            key = cassette.key(self.service, request.method, url, await request.aread())
+            if cassette.replaying:
+                interaction = cassette.replay(self.service, key, description)
+                await asyncio.sleep(cassette.delay(interaction))
+                interaction.raise_error()
+                return httpx.Response(
+                    interaction.status,
+                    headers=interaction.headers,
+                    content=interaction.body,
+                    request=request,
+                )
+
+            started = time.perf_counter()
+            try:
+                response = await self.inner.handle_async_request(request)
+                content = await response.aread()
+            except Exception as error:
+                cassette.record_error(
+                    self.service, key, description, error, time.perf_counter() - started
+                )
+                raise
+            cassette.record(
+                Interaction(
+                    self.service,
+                    key,
+                    description,
+                    status=response.status_code,
+                    headers=_kept_headers(response.headers),
+                    body=content,
+                    elapsed=time.perf_counter() - started,
+                )
+            )
+            return response
+
+        async def aclose(self) -> None:
+            await self.inner.aclose()
+
+    return _CassetteTransport
+
+
+class _CassetteModel:
+    """Gemini model proxy that records or replays ``generate_content`` calls.
+
+    The synchronous and asyncio calls share match keys, so a cassette
+    recorded by the CLI also replays through the HTTP service's pipeline.
+    """
+
+    def __init__(self, cassette: Cassette, service: str, model):
+        self._cassette = cassette
+        self._service = service
+        self._model = model
+
+    def __getattr__(self, name: str):
+        return getattr(self._model, name)
+
+    def _key(self, prompt) -> Tuple[str, str]:
+        description = f"generate_content {self._model.model_name}"
+        return self._cassette.key(self._service, "POST", self._model.model_name, prompt), description
+
+    def _replayed(self, interaction: Interaction, response_type):
+        from google.generativeai import protos
+
+        interaction.raise_error()
+        result = protos.GenerateContentResponse(json.loads(interaction.body))
+        return response_type.from_response(result)
+
+    def _record(self, key: str, description: str, response, started: float) -> None:
+        self._cassette.record(
+            Interaction(
+                self._service,
+                key,
+                description,
+                status=200,
+                body=json.dumps(response.to_dict(), ensure_ascii=False).encode("utf-8"),
+                elapsed=time.perf_counter() - started,
+            )
+        )
+
+    def generate_content(self, prompt, **kwargs):
+        from google.generativeai.types import GenerateContentResponse
+
+        key, description = self._key(prompt)
+        if self._cassette.replaying:
+            interaction = self._cassette.replay(self._service, key, description)
+            time.sleep(self._cassette.delay(interaction))
+            return self._replayed(interaction, GenerateContentResponse)
+        started = time.perf_counter()
+        try:
+            response = self._model.generate_content(prompt, **kwargs)
+        except Exception as error:
+            self._cassette.record_error(
+                self._service, key, description, error, time.perf_counter() - started
+            )
+            raise
+        self._record(key, description, response, started)
+        return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        from google.generativeai.types import AsyncGenerateContentResponse
+
+        key, description = self._key(prompt)
+        if self._cassette.replaying:
+            interaction = self._cassette.replay(self._service, key, description)
+            await asyncio.sleep(self._cassette.delay(interaction))
+            return self._replayed(interaction, AsyncGenerateContentResponse)
+        started = time.perf_counter()
+        try:
+            response = await self._model.generate_content_async(prompt, **kwargs)
+        except Exception as error:
+            self._cassette.record_error(
+                self._service, key, description, error, time.perf_counter() - started
+            )
+            raise
+        self._record(key, description, response, started)
+        return response
+
+
+def cassette_config(config: "AppConfig", cassette: Cassette, cache_directory: str) -> "AppConfig":
+    """Return ``config`` adjusted for a run that records or replays ``cassette``.
+
+    Both modes use ``cache_directory``, normally an empty temporary
+    directory, so every request of the recorded run is captured and the
+    replay issues the same requests. Recording stores the settings that
+    shape requests in the cassette metadata; replaying restores them and
+    swaps credentials for placeholders, since no request leaves the process.
+    """
+
+    config = replace(config, cache=replace(config.cache, directory=cache_directory))
+    if not cassette.replaying:
+        cassette.metadata["config"] = {
+            "youtube_batch_requests": config.youtube.batch_requests,
+            "gemini_model": config.gemini.model,
+            "gemini_long_transcript_chars": config.gemini.long_transcript_chars,
+            "gemini_chunk_seconds": config.gemini.chunk_seconds,
+            "transcript_compact_seconds": config.transcript.compact_window_seconds,
+            "notion_enabled": bool(
+                config.notion.api_key
+                and (config.notion.database_id or config.notion.parent_page_id)
+            ),
+            "notion_database_id": config.notion.database_id,
+            "notion_parent_page_id": config.notion.parent_page_id,
+        }
+        return config
+
+    recorded: Dict[str, object] = dict(cassette.metadata.get("config") or {})  # type: ignore[arg-type]
+    config.youtube = replace(
+        config.youtube,
+        batch_requests=bool(recorded.get("youtube_batch_requests", config.youtube.batch_requests)),
+    )
+    config.gemini = replace(
+        config.gemini,
+        api_key=REPLAY_API_KEY,
+        model=str(recorded.get("gemini_model") or config.gemini.model),
+        long_transcript_chars=recorded.get(  # type: ignore[arg-type]
+            "gemini_long_transcript_chars", config.gemini.long_transcript_chars
+        ),
+        chunk_seconds=int(
+            recorded.get("gemini_chunk_seconds") or config.gemini.chunk_seconds  # type: ignore[arg-type]
+        ),
+    )
+    config.notion = replace(
+        config.notion,
+        api_key=REPLAY_API_KEY if recorded.get("notion_enabled") else None,
+        database_id=recorded.get("notion_database_id"),  # type: ignore[arg-type]
+        parent_page_id=recorded.get("notion_parent_page_id"),  # type: ignore[arg-type]
+    )
+    config.transcript = replace(
+        config.transcript,
+        webshare_username=None,
+        webshare_password=None,
+        # Cassettes without the setting were recorded with linked lines.
+        compact_window_seconds=recorded.get("transcript_compact_seconds"),  # type: ignore[arg-type]
+    )
+    return config
+
+
+__all__ = ["Cassette", "CassetteMiss", "Interaction", "cassette_config"]
@@ -3,12 +3,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import os
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from youtube_transcript_api.proxies import WebshareProxyConfig
+if TYPE_CHECKING:
+    from youtube_transcript_api.proxies import WebshareProxyConfig
 
 
 YOUTUBE_READONLY_SCOPE = "https://www.googleapis.com/auth/youtube.readonly"
+# Defaults of youtube_transcript_api's WebshareProxyConfig, repeated here so
+# loading the configuration does not import the transcript library.
+WEBSHARE_DEFAULT_DOMAIN = "p.webshare.io"
+WEBSHARE_DEFAULT_PORT = 80
 
 
 @dataclass
@@ -18,6 +23,9 @@ class YouTubeConfig:
     client_secrets_file: str = "client_secret.json"
     token_file: str = "token.json"
     scopes: List[str] = field(default_factory=lambda: [YOUTUBE_READONLY_SCOPE])
+    discovery_workers: int = 1
+    batch_requests: bool = False
+    discovery_document: Optional[str] = None
 
 
 @dataclass
@@ -27,6 +35,13 @@ class GeminiConfig:
     api_key: Optional[str] = None
     model: str = "gemini-1.5-flash"
     request_timeout: Optional[float] = None
+    requests_per_minute: Optional[float] = 20.0
+    tokens_per_minute: Optional[float] = None
+    # Transcripts longer than this many characters are summarised in
+    # time-aligned chunks of ``chunk_seconds`` that are merged afterwards.
+    long_transcript_chars: Optional[int] = 100_000
+    chunk_seconds: int = 1200
+    chunk_workers: int = 4
 
 
 @dataclass
@@ -44,10 +59,13 @@ class TranscriptConfig:
 
     webshare_username: Optional[str] = None
     webshare_password: Optional[str] = None
-    webshare_domain: str = WebshareProxyConfig.DEFAULT_DOMAIN_NAME
-    webshare_port: int = WebshareProxyConfig.DEFAULT_PORT
+    webshare_domain: str = WEBSHARE_DEFAULT_DOMAIN
+    webshare_port: int = WEBSHARE_DEFAULT_PORT
     webshare_locations: List[str] = field(default_factory=list)
     webshare_retries: int = 10
+    # Captions are merged into one line per window of this many seconds,
+    # without per-line jump URLs; ``None`` keeps one linked line per caption.
+    compact_window_seconds: Optional[int] = 30
 
     def build_proxy_config(self) -> Optional[WebshareProxyConfig]:
         """Return a Webshare proxy configuration when credentials are available."""
@@ -55,6 +73,8 @@ class TranscriptConfig:
         if not self.webshare_username or not self.webshare_password:
             return None
 
+        from youtube_transcript_api.proxies import WebshareProxyConfig
+
         return WebshareProxyConfig(
             proxy_username=self.webshare_username,
             proxy_password=self.webshare_password,
@@ -65,6 +85,32 @@ class TranscriptConfig:
         )
 
 
+@dataclass
+class CacheConfig:
+    """Configuration for the on-disk caches."""
+
+    directory: str = ".cache/youtube_summary"
+    summary_enabled: bool = True
+    summary_max_bytes: int = 64 * 1024 * 1024
+    summary_max_age_days: float = 30.0
+    transcript_enabled: bool = True
+    transcript_max_bytes: int = 256 * 1024 * 1024
+    transcript_negative_ttl_hours: float = 6.0
+    metadata_ttl_hours: float = 24.0
+    etag_max_bytes: int = 64 * 1024 * 1024
+
+
+@dataclass
+class PipelineConfig:
+    """Execution settings for the summarisation pipeline."""
+
+    workers: int = 1
+    stream_discovery: bool = False
+    discovery_reorder_buffer: int = 50
+    max_concurrent_jobs: int = 1
+    max_queued_jobs: int = 10
+
+
 @dataclass
 class AppConfig:
     """Aggregate configuration for the CLI application."""
@@ -73,15 +119,26 @@ class AppConfig:
     gemini: GeminiConfig = field(default_factory=GeminiConfig)
     notion: NotionConfig = field(default_factory=NotionConfig)
     transcript: TranscriptConfig = field(default_factory=TranscriptConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
 
 
 def load_config_from_env() -> AppConfig:
     """Load configuration values from environment variables."""
 
     
+    try:
+        discovery_workers = max(int(os.getenv("YOUTUBE_DISCOVERY_WORKERS", "1")), 1)
+    except ValueError:
+        discovery_workers = 1
+
     youtube = YouTubeConfig(
         client_secrets_file=os.getenv("YOUTUBE_CLIENT_SECRETS", "client_secret.json"),
         token_file=os.getenv("YOUTUBE_TOKEN_FILE", "token.json"),
+        discovery_workers=discovery_workers,
+        batch_requests=os.getenv("YOUTUBE_BATCH_REQUESTS", "").lower()
+        in ("1", "true", "yes"),
+        discovery_document=os.getenv("YOUTUBE_DISCOVERY_DOCUMENT") or None,
     )
 
     timeout_env = os.getenv("GEMINI_TIMEOUT")
@@ -90,10 +147,40 @@ def load_config_from_env() -> AppConfig:
     except ValueError:
         timeout_value = 300.0
 
+    try:
+        rpm_value: Optional[float] = float(os.getenv("GEMINI_RPM", "20"))
+    except ValueError:
+        rpm_value = 20.0
+    tpm_env = os.getenv("GEMINI_TPM")
+    try:
+        tpm_value: Optional[float] = float(tpm_env) if tpm_env else None
+    except ValueError:
+        tpm_value = None
+
+    try:
+        long_transcript_chars: Optional[int] = int(
+            os.getenv("GEMINI_LONG_TRANSCRIPT_CHARS", "100000")
+        )
+    except ValueError:
+        long_transcript_chars = 100_000
+    try:
+        chunk_seconds = max(int(os.getenv("GEMINI_CHUNK_SECONDS", "1200")), 60)
+    except ValueError:
+        chunk_seconds = 1200
+    try:
+        chunk_workers = max(int(os.getenv("GEMINI_CHUNK_WORKERS", "4")), 1)
+    except ValueError:
+        chunk_workers = 4
+
     gemini = GeminiConfig(
         api_key=os.getenv("GEMINI_API_KEY"),
         model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
         request_timeout=timeout_value,
+        requests_per_minute=rpm_value,
+        tokens_per_minute=tpm_value,
+        long_transcript_chars=long_transcript_chars or None,
+        chunk_seconds=chunk_seconds,
+        chunk_workers=chunk_workers,
     )
 
     webshare_locations_env = os.getenv("WEBSHARE_LOCATIONS")
@@ -103,23 +190,29 @@ def load_config_from_env() -> AppConfig:
         else []
     )
     try:
-        webshare_port = int(os.getenv("WEBSHARE_PORT", str(WebshareProxyConfig.DEFAULT_PORT)))
+        webshare_port = int(os.getenv("WEBSHARE_PORT", str(WEBSHARE_DEFAULT_PORT)))
     except ValueError:
-        webshare_port = WebshareProxyConfig.DEFAULT_PORT
+        webshare_port = WEBSHARE_DEFAULT_PORT
     try:
         webshare_retries = int(os.getenv("WEBSHARE_RETRIES", "10"))
     except ValueError:
         webshare_retries = 10
 
+    try:
+        compact_window_seconds = max(int(os.getenv("TRANSCRIPT_COMPACT_SECONDS", "30")), 0)
+    except ValueError:
+        compact_window_seconds = 30
+
     transcript = TranscriptConfig(
         webshare_username=os.getenv("WEBSHARE_USERNAME"),
         webshare_password=os.getenv("WEBSHARE_PASSWORD"),
         webshare_domain=os.getenv(
-            "WEBSHARE_DOMAIN", WebshareProxyConfig.DEFAULT_DOMAIN_NAME
+            "WEBSHARE_DOMAIN", WEBSHARE_DEFAULT_DOMAIN
         ),
         webshare_port=webshare_port,
         webshare_locations=webshare_locations,
         webshare_retries=webshare_retries,
+        compact_window_seconds=compact_window_seconds or None,
     )
 
     notion = NotionConfig(
@@ -128,18 +221,94 @@ def load_config_from_env() -> AppConfig:
         parent_page_id= os.getenv("NOTION_PARENT_PAGE_ID"),
     )
 
+    try:
+        workers = max(int(os.getenv("SUMMARY_WORKERS", "1")), 1)
+    except ValueError:
+        workers = 1
+
+    stream_discovery = os.getenv("SUMMARY_STREAM_DISCOVERY", "").lower() in ("1", "true", "yes")
+
+    try:
+        discovery_reorder_buffer = max(
+            int(os.getenv("SUMMARY_DISCOVERY_REORDER_BUFFER", "50")), 0
+        )
+    except ValueError:
+        discovery_reorder_buffer = 50
+
+    try:
+        max_concurrent_jobs = max(int(os.getenv("SUMMARY_MAX_CONCURRENT_JOBS", "1")), 1)
+    except ValueError:
+        max_concurrent_jobs = 1
+
+    try:
+        max_queued_jobs = max(int(os.getenv("SUMMARY_MAX_QUEUED_JOBS", "10")), 0)
+    except ValueError:
+        max_queued_jobs = 10
+
+    pipeline = PipelineConfig(
+        workers=workers,
+        stream_discovery=stream_discovery,
+        discovery_reorder_buffer=discovery_reorder_buffer,
+        max_concurrent_jobs=max_concurrent_jobs,
+        max_queued_jobs=max_queued_jobs,
+    )
+
+    try:
+        summary_max_bytes = int(os.getenv("SUMMARY_CACHE_MAX_MB", "64")) * 1024 * 1024
+    except ValueError:
+        summary_max_bytes = 64 * 1024 * 1024
+    try:
+        summary_max_age_days = float(os.getenv("SUMMARY_CACHE_MAX_AGE_DAYS", "30"))
+    except ValueError:
+        summary_max_age_days = 30.0
+
+    try:
+        transcript_max_bytes = (
+            int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "256")) * 1024 * 1024
+        )
+    except ValueError:
+        transcript_max_bytes = 256 * 1024 * 1024
+    try:
+        transcript_negative_ttl_hours = float(
+            os.getenv("TRANSCRIPT_NEGATIVE_TTL_HOURS", "6")
+        )
+    except ValueError:
+        transcript_negative_ttl_hours = 6.0
+
+    try:
+        metadata_ttl_hours = float(os.getenv("YOUTUBE_METADATA_TTL_HOURS", "24"))
+    except ValueError:
+        metadata_ttl_hours = 24.0
+
+    cache = CacheConfig(
+        directory=os.getenv("CACHE_DIR", ".cache/youtube_summary"),
+        summary_enabled=os.getenv("SUMMARY_CACHE_DISABLED", "").lower()
+        not in ("1", "true", "yes"),
+        summary_max_bytes=summary_max_bytes,
+        summary_max_age_days=summary_max_age_days,
+        transcript_enabled=os.getenv("TRANSCRIPT_CACHE_DISABLED", "").lower()
+        not in ("1", "true", "yes"),
+        transcript_max_bytes=transcript_max_bytes,
+        transcript_negative_ttl_hours=transcript_negative_ttl_hours,
+        metadata_ttl_hours=metadata_ttl_hours,
+    )
+
     return AppConfig(
         youtube=youtube,
         gemini=gemini,
         notion=notion,
         transcript=transcript,
+        pipeline=pipeline,
+        cache=cache,
     )
 
 
 __all__ = [
     "AppConfig",
+    "CacheConfig",
     "GeminiConfig",
     "NotionConfig",
+    "PipelineConfig",
     "TranscriptConfig",
     "YouTubeConfig",
     "YOUTUBE_READONLY_SCOPE",
@@ -3,7 +3,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, List, Optional
+from pathlib import Path
+from typing import IO, Iterable, List, Optional
 
 from youtube_summary.gemini_client import GeminiSummary
 
@@ -14,15 +15,12 @@ class Document:
     body: str
 
 
-def build_markdown_document(
+def _header_lines(
     title: str,
-    summaries: Iterable[GeminiSummary],
     *,
     start_time: datetime,
     end_time: Optional[datetime],
-) -> Document:
-    """Create a Markdown document for the provided summaries."""
-
+) -> List[str]:
     lines: List[str] = [f"# {title}", ""]
     if end_time:
         lines.append(
@@ -31,18 +29,93 @@ def build_markdown_document(
     else:
         lines.append(f"Time window starting from {start_time.isoformat()}")
     lines.append("")
+    return lines
+
+
+def _entry_lines(entry: GeminiSummary) -> List[str]:
+    return [
+        f"## {entry.video.title}",
+        f"订阅号：{entry.video.channel_title}",
+        f"*Published:* {entry.video.published_at.isoformat()}",
+        f"*Link:* {entry.video.url}",
+        "",
+        entry.summary,
+        "",
+    ]
+
+
+def build_markdown_document(
+    title: str,
+    summaries: Iterable[GeminiSummary],
+    *,
+    start_time: datetime,
+    end_time: Optional[datetime],
+) -> Document:
+    """Create a Markdown document for the provided summaries."""
 
+    lines = _header_lines(title, start_time=start_time, end_time=end_time)
     for entry in summaries:
-        lines.append(f"## {entry.video.title}")
-        lines.append(f"订阅号：{entry.video.channel_title}")
-        lines.append(f"*Published:* {entry.video.published_at.isoformat()}")
-        lines.append(f"*Link:* {entry.video.url}")
-        lines.append("")
-        lines.append(entry.summary)
-        lines.append("")
+        lines.extend(_entry_lines(entry))
 
     body = "\n".join(lines).strip() + "\n"
     return Document(title=title, body=body)
 
 
-__all__ = ["Document", "build_markdown_document"]
+class MarkdownDocumentWriter:
+    """Write the Markdown document incrementally as summaries arrive.
+
+    The output matches :func:`build_markdown_document` but each entry is
+    flushed to disk as soon as it is written, so partial results are visible
+    while the run is still in progress.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        title: str,
+        *,
+        start_time: datetime,
+        end_time: Optional[datetime],
+    ):
+        self.path = path
+        self.entry_count = 0
+        self._handle: Optional[IO[str]] = path.open("w", encoding="utf-8")
+        self._pending_blank = False
+        self._write_lines(
+            _header_lines(title, start_time=start_time, end_time=end_time)
+        )
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if self._handle is None:
+            raise ValueError("MarkdownDocumentWriter is already closed.")
+        # Trailing blank lines are deferred so the closed document ends with a
+        # single newline, exactly like build_markdown_document.
+        text = "\n".join(lines)
+        stripped = text.rstrip("\n")
+        if stripped:
+            if self._pending_blank:
+                self._handle.write("\n")
+            self._handle.write(stripped + "\n")
+            self._pending_blank = text != stripped
+        self._handle.flush()
+
+    def write(self, entry: GeminiSummary) -> GeminiSummary:
+        """Append ``entry`` to the document and return it unchanged."""
+
+        self._write_lines(_entry_lines(entry))
+        self.entry_count += 1
+        return entry
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self) -> "MarkdownDocumentWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+__all__ = ["Document", "MarkdownDocumentWriter", "build_markdown_document"]
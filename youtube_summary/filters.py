@@ -0,0 +1,96 @@
+"""Staged rules for dropping videos that should not be summarised."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+# Fields available from a playlistItems snippet.
+PLAYLIST_FIELDS: FrozenSet[str] = frozenset({"title", "description"})
+# Fields available once videos.list details have been fetched.
+DETAILS_FIELDS: FrozenSet[str] = PLAYLIST_FIELDS | frozenset(
+    {"live_broadcast_content", "duration_seconds"}
+)
+
+
+@dataclass(frozen=True)
+class FilterRule:
+    """A rejection rule and the video fields it needs to decide."""
+
+    name: str
+    fields: FrozenSet[str]
+    rejects: Callable[[Mapping[str, object]], bool]
+
+
+def _has_short_hashtag(record: Mapping[str, object]) -> bool:
+    text = f"{record.get('title', '')} {record.get('description', '')}".lower()
+    return "#short" in text
+
+
+def _is_short_duration(record: Mapping[str, object]) -> bool:
+    duration = record.get("duration_seconds")
+    return duration is not None and int(duration) <= 480  # type: ignore[arg-type]
+
+
+def _is_shorts_broadcast(record: Mapping[str, object]) -> bool:
+    return str(record.get("live_broadcast_content", "")).lower() == "shorts"
+
+
+def _is_live_or_upcoming(record: Mapping[str, object]) -> bool:
+    return str(record.get("live_broadcast_content", "")).lower() in ("live", "upcoming")
+
+
+DEFAULT_RULES: List[FilterRule] = [
+    FilterRule("short_hashtag", frozenset({"title", "description"}), _has_short_hashtag),
+    FilterRule("short_duration", frozenset({"duration_seconds"}), _is_short_duration),
+    FilterRule("shorts_broadcast", frozenset({"live_broadcast_content"}), _is_shorts_broadcast),
+    FilterRule("live_or_upcoming", frozenset({"live_broadcast_content"}), _is_live_or_upcoming),
+]
+
+
+class FilterEngine:
+    """Evaluate rules at the earliest stage that provides their fields.
+
+    Discovery calls :meth:`check` first with the playlist fields, which runs
+    only the cheap rules, and again with the detail fields for the videos
+    that survived. A rule is never evaluated twice for the same video.
+    Rejections are counted per stage and rule.
+    """
+
+    def __init__(self, rules: Optional[Iterable[FilterRule]] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self._lock = threading.Lock()
+        self._rejections: Dict[str, Dict[str, int]] = {}
+
+    def check(
+        self,
+        record: Mapping[str, object],
+        *,
+        stage: str,
+        available: FrozenSet[str],
+        already_checked: FrozenSet[str] = frozenset(),
+    ) -> Optional[str]:
+        """Return the name of the first rule rejecting ``record``, if any."""
+
+        for rule in self.rules:
+            if not rule.fields <= available or rule.fields <= already_checked:
+                continue
+            if rule.rejects(record):
+                with self._lock:
+                    counts = self._rejections.setdefault(stage, {})
+                    counts[rule.name] = counts.get(rule.name, 0) + 1
+                return rule.name
+        return None
+
+    def rejection_counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {stage: dict(counts) for stage, counts in self._rejections.items()}
+
+
+__all__ = [
+    "DEFAULT_RULES",
+    "DETAILS_FIELDS",
+    "FilterEngine",
+    "FilterRule",
+    "PLAYLIST_FIELDS",
+]
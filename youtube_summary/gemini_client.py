@@ -1,20 +1,40 @@
 """Interface for sending summarisation requests to Gemini."""
 from __future__ import annotations
 
+import asyncio
+import copy
 from dataclasses import dataclass
 import logging
+import re
+import threading
 import time
-from typing import Optional
-
-import google.generativeai as genai
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from youtube_summary.cache import SummaryCache
+from youtube_summary.cassette import Cassette
 from youtube_summary.config import GeminiConfig
+from youtube_summary.metrics import METRICS, Metrics
+from youtube_summary.pipeline import map_in_threads, to_thread
+from youtube_summary.rate_limiter import RateLimiter, estimate_tokens
+from youtube_summary.tracing import Tracer, trace_span
+from youtube_summary.transcript_client import build_timestamp_url
 from youtube_summary.youtube_client import Video
 
 
 LOG_PREFIX = "[gemini_summary_log]"
 logger = logging.getLogger(__name__)
 
+# Requests failing with one of these markers are retried after a pause.
+_DEADLINE_TOKENS = ("504", "Deadline Exceeded")
+_ATTEMPTS = 5
+_RETRY_DELAY_SECONDS = 3
+# Transcript lines start with "[83s](https://...&t=83s)", or with a bare
+# "[83s]" in the compact format. A timestamp only counts as linked when a
+# URL follows it, so "[30s](applause)" is still a bare timestamp.
+_TIMESTAMP_LINE = re.compile(r"^\[(\d+)s\](\(https?://)?", re.MULTILINE)
+_TIMESTAMP = re.compile(r"\[\d+s\]")
+_BARE_TIMESTAMP = re.compile(r"\[(\d+)s\](?!\(https?://)")
+
 
 def _log_error(message: str, *args) -> None:
     logger.error("%s " + message, LOG_PREFIX, *args)
@@ -24,21 +44,157 @@ def _log_info(message: str, *args) -> None:
     logger.info("%s " + message, LOG_PREFIX, *args)
 
 
+SUMMARY_INSTRUCTIONS = (
+    "用通俗易懂的语言，按视频内容顺序列出里面的所有观点。"
+    "每条观点结尾必须附上可直接跳转的时间戳链接（格式 [83s](https://www.youtube.com/watch?v=...&t=83s)），只保留最开始的一个时间戳。"
+    "可直接复用字幕行里已有的 Markdown 链接。全程使用中文回答。"
+)
+
+COMPACT_SUMMARY_INSTRUCTIONS = (
+    "用通俗易懂的语言，按视频内容顺序列出里面的所有观点。"
+    "每条观点结尾必须附上时间戳（格式 [83s]，只写秒数，不要写链接），只保留最开始的一个时间戳。"
+    "直接复用字幕行开头的 [秒数s]。全程使用中文回答。"
+)
+
+CHUNK_INSTRUCTIONS = (
+    "下面是一个长视频中按时间截取的一段字幕。用通俗易懂的语言，按内容顺序列出这一段里的所有观点。"
+    "每条观点结尾必须附上可直接跳转的时间戳链接（格式 [83s](https://www.youtube.com/watch?v=...&t=83s)），只保留最开始的一个时间戳。"
+    "直接复用字幕行里已有的 Markdown 链接，不要编造时间戳。全程使用中文回答。"
+)
+
+COMPACT_CHUNK_INSTRUCTIONS = (
+    "下面是一个长视频中按时间截取的一段字幕。用通俗易懂的语言，按内容顺序列出这一段里的所有观点。"
+    "每条观点结尾必须附上时间戳（格式 [83s]，只写秒数，不要写链接），只保留最开始的一个时间戳。"
+    "直接复用字幕行开头的 [秒数s]，不要编造时间戳。全程使用中文回答。"
+)
+
+REDUCE_INSTRUCTIONS = (
+    "下面是同一个长视频按时间顺序分段整理出的观点列表。把它们合并成一份完整的总结："
+    "按视频内容顺序列出所有观点，合并重复的观点。"
+    "每条观点结尾保留原有的时间戳（[83s] 或时间戳链接）并原样复制，不要修改或编造；合并的观点只保留最早的一个时间戳。全程使用中文回答。"
+)
+
+
+@dataclass
+class TranscriptChunk:
+    """A time-aligned slice of a timestamped transcript."""
+
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def split_transcript(transcript: str, chunk_seconds: int) -> List[TranscriptChunk]:
+    """Split timestamped transcript lines into chunks spanning ``chunk_seconds`` each.
+
+    Chunks only break before a timestamped line, so every chunk starts with
+    a timestamp; lines without one stay with the line before them.
+    """
+
+    chunks: List[TranscriptChunk] = []
+    lines: List[str] = []
+    start: Optional[int] = None
+    end = 0
+    for line in transcript.splitlines():
+        match = _TIMESTAMP_LINE.match(line)
+        if match:
+            seconds = int(match.group(1))
+            if start is not None and seconds >= start + chunk_seconds:
+                chunks.append(TranscriptChunk(len(chunks), start, end, "\n".join(lines)))
+                lines = []
+                start = None
+            if start is None:
+                start = seconds
+            end = seconds
+        lines.append(line)
+    if lines:
+        chunks.append(TranscriptChunk(len(chunks), start or 0, end, "\n".join(lines)))
+    return chunks
+
+
 @dataclass
 class GeminiSummary:
     video: Video
     summary: str
+    limiter_wait_seconds: float = 0.0
+    from_cache: bool = False
+    failed: bool = False
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"video": self.video.to_dict(), "summary": self.summary}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "GeminiSummary":
+        return cls(
+            video=Video.from_dict(data["video"]),  # type: ignore[arg-type]
+            summary=str(data["summary"]),
+        )
 
 
 class GeminiSummarizer:
     """Wrapper around the Gemini API for generating video summaries."""
 
-    def __init__(self, config: GeminiConfig):
+    def __init__(
+        self,
+        config: GeminiConfig,
+        *,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[SummaryCache] = None,
+        metrics: Optional[Metrics] = None,
+        cassette: Optional[Cassette] = None,
+    ):
         if not config.api_key:
             raise ValueError("A Gemini API key must be provided via GEMINI_API_KEY.")
         self._config = config
-        genai.configure(api_key=config.api_key)
-        self._model = genai.GenerativeModel(model_name=config.model)
+        self._cache = cache
+        self._metrics = metrics or METRICS
+        self._tracer: Optional[Tracer] = None
+        self._cassette = cassette
+        self._rate_limiter = rate_limiter or RateLimiter(
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+        )
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._origin = self
+
+    def _get_model(self):
+        """Create the Gemini model on first use.
+
+        google-generativeai is slow to import, so it is loaded only once a
+        summary actually has to be generated rather than on construction.
+        Copies made by :meth:`with_options` share the model of the instance
+        they were derived from.
+        """
+
+        if self._origin is not self:
+            return self._origin._get_model()
+        with self._model_lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self._config.api_key)
+                model = genai.GenerativeModel(model_name=self._config.model)
+                if self._cassette is not None:
+                    model = self._cassette.wrap_model(model)
+                self._model = model
+            return self._model
+
+    def with_options(
+        self,
+        *,
+        cache: Optional[SummaryCache] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+    ) -> "GeminiSummarizer":
+        """Return a summarizer with its own cache, metrics and tracer sharing this model and limiter."""
+
+        summarizer = copy.copy(self)
+        summarizer._cache = cache
+        summarizer._metrics = metrics or METRICS
+        summarizer._tracer = tracer
+        return summarizer
 
     def summarize(
         self,
@@ -47,15 +203,268 @@ class GeminiSummarizer:
         transcript: Optional[str] = None,
         language: Optional[str] = None,
     ) -> GeminiSummary:
-        """Summarise a single video using Gemini."""
+        """Summarise a single video using Gemini.
+
+        Transcripts longer than ``long_transcript_chars`` are summarised in
+        time-aligned chunks, concurrently, and the chunk summaries merged by
+        a final request; each request is retried on its own.
+        """
+
+        cache_key, cached = self._lookup(video, transcript, language)
+        if cached is not None:
+            return cached
+
+        chunks = self._chunks(transcript)
+        if chunks:
+            results = map_in_threads(
+                lambda chunk: self._summarize_chunk(video, chunk, len(chunks), language),
+                chunks,
+                workers=self._config.chunk_workers,
+                name="gemini-chunk",
+            )
+            text, limiter_wait = self._generate(
+                video, self._build_reduce_prompt(video, chunks, results), part="reduce"
+            )
+            text = self._reduced_text(video, text, chunks, results)
+            limiter_wait += sum(wait for _, wait in results)
+        else:
+            text, limiter_wait = self._generate(video, self._build_prompt(video, transcript))
+        return self._finish(video, transcript, text, cache_key, limiter_wait)
+
+    async def summarize_async(
+        self,
+        video: Video,
+        *,
+        transcript: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> GeminiSummary:
+        """Asyncio counterpart of :meth:`summarize` using ``generate_content_async``.
+
+        Summary cache reads and writes run on worker threads.
+        """
+
+        cache_key, cached = await to_thread(self._lookup, video, transcript, language)
+        if cached is not None:
+            return cached
+
+        chunks = self._chunks(transcript)
+        if chunks:
+            slots = asyncio.Semaphore(self._config.chunk_workers)
+
+            async def _summarize_chunk(chunk: TranscriptChunk) -> Tuple[str, float]:
+                async with slots:
+                    return await self._summarize_chunk_async(video, chunk, len(chunks), language)
+
+            # Let every chunk finish, and land in the cache, before failing.
+            outcomes = await asyncio.gather(
+                *(_summarize_chunk(chunk) for chunk in chunks), return_exceptions=True
+            )
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            results: List[Tuple[str, float]] = outcomes  # type: ignore[assignment]
+            text, limiter_wait = await self._generate_async(
+                video, self._build_reduce_prompt(video, chunks, results), part="reduce"
+            )
+            text = self._reduced_text(video, text, chunks, results)
+            limiter_wait += sum(wait for _, wait in results)
+        else:
+            text, limiter_wait = await self._generate_async(
+                video, self._build_prompt(video, transcript)
+            )
+        return await to_thread(self._finish, video, transcript, text, cache_key, limiter_wait)
+
+    def _generate(
+        self, video: Video, prompt: str, *, part: Optional[str] = None
+    ) -> Tuple[str, float]:
+        """Send one prompt, retrying deadline errors; return the text and limiter wait.
+
+        Every attempt reserves the prompt's estimated tokens; a failed
+        attempt refunds them.
+        """
+
+        estimated_tokens = estimate_tokens(prompt)
+        limiter_wait = 0.0
+        for attempt in range(_ATTEMPTS):
+            with self._trace_wait(video, part):
+                limiter_wait += self._rate_limiter.acquire(estimated_tokens)
+            try:
+                with self._trace_request(video, attempt, part), self._metrics.call(
+                    "gemini", "generate_content"
+                ) as call:
+                    call.sent = len(prompt.encode("utf-8"))
+                    response = self._get_model().generate_content(
+                        prompt, **self._request_kwargs()
+                    )
+                break
+            except Exception as error:  # pylint: disable=broad-except
+                # Only the successful attempt is reconciled in _response_text.
+                self._rate_limiter.refund(estimated_tokens)
+                if not self._should_retry(_label(video, part), attempt, error):
+                    raise
+                self._metrics.record_retry("gemini", "generate_content")
+                time.sleep(_RETRY_DELAY_SECONDS)
+        text = self._response_text(_label(video, part), response, estimated_tokens, attempt)
+        return text, limiter_wait
+
+    async def _generate_async(
+        self, video: Video, prompt: str, *, part: Optional[str] = None
+    ) -> Tuple[str, float]:
+        """Asyncio counterpart of :meth:`_generate`."""
+
+        estimated_tokens = estimate_tokens(prompt)
+        limiter_wait = 0.0
+        for attempt in range(_ATTEMPTS):
+            with self._trace_wait(video, part):
+                limiter_wait += await self._rate_limiter.acquire_async(estimated_tokens)
+            try:
+                with self._trace_request(video, attempt, part), self._metrics.call(
+                    "gemini", "generate_content"
+                ) as call:
+                    call.sent = len(prompt.encode("utf-8"))
+                    response = await self._get_model().generate_content_async(
+                        prompt, **self._request_kwargs()
+                    )
+                break
+            except Exception as error:  # pylint: disable=broad-except
+                # Only the successful attempt is reconciled in _response_text.
+                self._rate_limiter.refund(estimated_tokens)
+                if not self._should_retry(_label(video, part), attempt, error):
+                    raise
+                self._metrics.record_retry("gemini", "generate_content")
+                await asyncio.sleep(_RETRY_DELAY_SECONDS)
+        text = self._response_text(_label(video, part), response, estimated_tokens, attempt)
+        return text, limiter_wait
 
-        instructions = (
-            "用通俗易懂的语言，按视频内容顺序列出里面的所有观点。"
-            "每条观点结尾必须附上可直接跳转的时间戳链接（格式 [83s](https://www.youtube.com/watch?v=...&t=83s)），只保留最开始的一个时间戳。"
-            "可直接复用字幕行里已有的 Markdown 链接。全程使用中文回答。"
+    def _chunks(self, transcript: Optional[str]) -> List[TranscriptChunk]:
+        """Return the chunks of a transcript long enough for map-reduce, otherwise none."""
+
+        threshold = self._config.long_transcript_chars
+        if not transcript or not threshold or len(transcript) <= threshold:
+            return []
+        chunks = split_transcript(transcript, self._config.chunk_seconds)
+        if len(chunks) < 2:
+            return []
+        _log_info(
+            "Transcript has %d characters; summarising it in %d chunks.",
+            len(transcript),
+            len(chunks),
+        )
+        return chunks
+
+    def _summarize_chunk(
+        self,
+        video: Video,
+        chunk: TranscriptChunk,
+        count: int,
+        language: Optional[str],
+    ) -> Tuple[str, float]:
+        chunk_key, cached = self._lookup_chunk(video, chunk, language)
+        if cached is not None:
+            return cached, 0.0
+        text, limiter_wait = self._generate(
+            video,
+            self._build_chunk_prompt(video, chunk, count),
+            part=_chunk_part(chunk, count),
+        )
+        return self._store_chunk(chunk_key, text), limiter_wait
+
+    async def _summarize_chunk_async(
+        self,
+        video: Video,
+        chunk: TranscriptChunk,
+        count: int,
+        language: Optional[str],
+    ) -> Tuple[str, float]:
+        chunk_key, cached = await to_thread(self._lookup_chunk, video, chunk, language)
+        if cached is not None:
+            return cached, 0.0
+        text, limiter_wait = await self._generate_async(
+            video,
+            self._build_chunk_prompt(video, chunk, count),
+            part=_chunk_part(chunk, count),
         )
+        return await to_thread(self._store_chunk, chunk_key, text), limiter_wait
+
+    def _lookup(
+        self,
+        video: Video,
+        transcript: Optional[str],
+        language: Optional[str],
+    ) -> Tuple[Optional[str], Optional[GeminiSummary]]:
+        """Return the cache key for the request and a cached summary, if any."""
+
+        if self._cache is None:
+            return None, None
+        cache_key = SummaryCache.make_key(
+            video.video_id,
+            model=self._config.model,
+            language=language,
+            instructions=self._summary_instructions(transcript),
+            transcript=transcript,
+        )
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        _log_info("Gemini summary cache hit for %s.", video.video_id)
+        return cache_key, GeminiSummary(video=video, summary=cached, from_cache=True)
+
+    def _summary_instructions(self, transcript: Optional[str]) -> str:
+        """Return everything besides the transcript that shapes the final summary.
+
+        Transcripts long enough to be summarised in chunks are keyed by the
+        chunk and reduce instructions and ``chunk_seconds``, so changing the
+        chunking, or crossing ``long_transcript_chars``, misses the cache.
+        """
+
+        compact = _is_compact(transcript)
+        threshold = self._config.long_transcript_chars
+        if not transcript or not threshold or len(transcript) <= threshold:
+            return COMPACT_SUMMARY_INSTRUCTIONS if compact else SUMMARY_INSTRUCTIONS
+        return "\n".join(
+            (
+                COMPACT_CHUNK_INSTRUCTIONS if compact else CHUNK_INSTRUCTIONS,
+                REDUCE_INSTRUCTIONS,
+                f"chunk_seconds={self._config.chunk_seconds}",
+            )
+        )
+
+    def _lookup_chunk(
+        self,
+        video: Video,
+        chunk: TranscriptChunk,
+        language: Optional[str],
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Return the cache key and cached summary of one transcript chunk.
+
+        Chunk summaries are cached on their own, so a rerun after a failed
+        chunk only requests the chunks that are still missing.
+        """
+
+        if self._cache is None:
+            return None, None
+        chunk_key = SummaryCache.make_key(
+            video.video_id,
+            model=self._config.model,
+            language=language,
+            instructions=(
+                COMPACT_CHUNK_INSTRUCTIONS if _is_compact(chunk.text) else CHUNK_INSTRUCTIONS
+            ),
+            transcript=chunk.text,
+        )
+        return chunk_key, self._cache.get(chunk_key)
+
+    def _store_chunk(self, chunk_key: Optional[str], text: str) -> str:
+        summary = text.strip()
+        if chunk_key is not None and self._cache is not None:
+            self._cache.set(chunk_key, summary)
+        return summary
+
+    @staticmethod
+    def _build_prompt(video: Video, transcript: Optional[str]) -> str:
+        compact = _is_compact(transcript)
         prompt = (
-            f"{instructions}\n"
+            f"{COMPACT_SUMMARY_INSTRUCTIONS if compact else SUMMARY_INSTRUCTIONS}\n"
             f"视频标题: {video.title}\n"
             f"视频频道: {video.channel_title}\n"
             f"视频link: {video.url}\n"
@@ -66,53 +475,195 @@ class GeminiSummarizer:
             excerpt = transcript
             # if len(excerpt) > 15000:
             #     excerpt = f"{excerpt[:15000]}…"
-            prompt += (
-                "字幕每行格式为 [秒数s](跳转链接) 内容，总结时直接引用该链接。\n"
-                f"视频内容:\n{excerpt}"
-            )
+            prompt += f"{_line_format(compact)}\n视频内容:\n{excerpt}"
+        return prompt
+
+    @staticmethod
+    def _build_chunk_prompt(video: Video, chunk: TranscriptChunk, count: int) -> str:
+        compact = _is_compact(chunk.text)
+        return (
+            f"{COMPACT_CHUNK_INSTRUCTIONS if compact else CHUNK_INSTRUCTIONS}\n"
+            f"视频标题: {video.title}\n"
+            f"视频频道: {video.channel_title}\n"
+            f"视频link: {video.url}\n"
+            f"片段: 第 {chunk.index + 1}/{count} 段（{chunk.start}s–{chunk.end}s）\n"
+            f"{_line_format(compact)}\n"
+            f"片段字幕:\n{chunk.text}"
+        )
+
+    @staticmethod
+    def _build_reduce_prompt(
+        video: Video,
+        chunks: Sequence[TranscriptChunk],
+        results: Sequence[Tuple[str, float]],
+    ) -> str:
+        return (
+            f"{REDUCE_INSTRUCTIONS}\n"
+            f"视频标题: {video.title}\n"
+            f"视频频道: {video.channel_title}\n"
+            f"视频link: {video.url}\n"
+            f"分段观点:\n{_join_chunk_summaries(chunks, results)}"
+        )
+
+    @staticmethod
+    def _reduced_text(
+        video: Video,
+        text: str,
+        chunks: Sequence[TranscriptChunk],
+        results: Sequence[Tuple[str, float]],
+    ) -> str:
+        """Return the merged summary, or the chunk summaries if merging lost every timestamp."""
+
+        if _TIMESTAMP.search(text) or not any(
+            _TIMESTAMP.search(summary) for summary, _ in results
+        ):
+            return text
+        _log_error(
+            "Merged Gemini summary for %s has no timestamps; using the chunk summaries.",
+            video.video_id,
+        )
+        return _join_chunk_summaries(chunks, results)
+
+    def _trace_wait(self, video: Video, part: Optional[str] = None):
+        return trace_span(
+            self._tracer, "gemini.rate_limit_wait", video.video_id, **_part_attrs(part)
+        )
 
-        request_kwargs = {}
+    def _trace_request(self, video: Video, attempt: int, part: Optional[str] = None):
+        return trace_span(
+            self._tracer,
+            "gemini.request",
+            video.video_id,
+            attempt=attempt + 1,
+            **_part_attrs(part),
+        )
+
+    def _request_kwargs(self) -> Dict[str, object]:
+        request_kwargs: Dict[str, object] = {}
         if self._config.request_timeout:
             request_kwargs["request_options"] = {
                 "timeout": self._config.request_timeout
             }
+        return request_kwargs
 
-        deadline_tokens = ("504", "Deadline Exceeded")
-        attempts = 5
-        for attempt in range(attempts):
-            try:
-                response = self._model.generate_content(prompt, **request_kwargs)
-                if attempt > 0:
-                    _log_info(
-                        "Gemini request succeeded for %s after %d retries.",
-                        video.video_id,
-                        attempt,
-                    )
-                break
-            except Exception as error:  # pylint: disable=broad-except
-                should_retry = any(token in str(error) for token in deadline_tokens)
-                if attempt < attempts - 1 and should_retry:
-                    _log_error(
-                        "Gemini request hit %s on attempt %d for %s; retrying.",
-                        error,
-                        attempt + 1,
-                        video.video_id,
-                    )
-                    time.sleep(3)
-                    continue
-                _log_error(
-                    "Gemini request failed for %s: %s",
-                    video.video_id,
-                    error,
-                )
-                raise
+    @staticmethod
+    def _should_retry(label: str, attempt: int, error: Exception) -> bool:
+        """Log a failed attempt and decide whether it is worth retrying."""
+
+        retryable = any(token in str(error) for token in _DEADLINE_TOKENS)
+        if attempt < _ATTEMPTS - 1 and retryable:
+            _log_error(
+                "Gemini request hit %s on attempt %d for %s; retrying.",
+                error,
+                attempt + 1,
+                label,
+            )
+            return True
+        _log_error(
+            "Gemini request failed for %s: %s",
+            label,
+            error,
+        )
+        return False
+
+    def _response_text(
+        self, label: str, response, estimated_tokens: int, attempt: int
+    ) -> str:
+        if attempt > 0:
+            _log_info(
+                "Gemini request succeeded for %s after %d retries.",
+                label,
+                attempt,
+            )
+        usage = getattr(response, "usage_metadata", None)
+        self._rate_limiter.record_usage(
+            estimated_tokens, getattr(usage, "total_token_count", None)
+        )
         text = response.text if hasattr(response, "text") else str(response)
-        summary = text.strip().replace("\n\n", "\n")
+        self._metrics.record_bytes("gemini", received=len(text.encode("utf-8")))
+        return text
+
+    def _finish(
+        self,
+        video: Video,
+        transcript: Optional[str],
+        text: str,
+        cache_key: Optional[str],
+        limiter_wait: float,
+    ) -> GeminiSummary:
+        if limiter_wait > 0:
+            _log_info(
+                "Gemini request for %s waited %.2fs on the rate limiter.",
+                video.video_id,
+                limiter_wait,
+            )
+        summary = _link_timestamps(text.strip().replace("\n\n", "\n"), video)
         if not transcript:
             summary += "!!!未获取到字幕!!!"
-            
+        if cache_key is not None and self._cache is not None:
+            self._cache.set(cache_key, summary)
+
+        return GeminiSummary(
+            video=video,
+            summary=summary,
+            limiter_wait_seconds=limiter_wait,
+        )
+
+
+def _is_compact(transcript: Optional[str]) -> bool:
+    """Whether ``transcript`` uses bare ``[83s]`` offsets instead of jump links."""
+
+    match = _TIMESTAMP_LINE.search(transcript or "")
+    return match is not None and match.group(2) is None
+
+
+def _line_format(compact: bool) -> str:
+    if compact:
+        return "字幕每行格式为 [秒数s] 内容，秒数为该行在视频中的起始时间，总结时直接引用该时间戳。"
+    return "字幕每行格式为 [秒数s](跳转链接) 内容，总结时直接引用该链接。"
+
+
+def _link_timestamps(text: str, video: Video) -> str:
+    """Turn bare ``[83s]`` timestamps in a summary into jump links to ``video``."""
+
+    return _BARE_TIMESTAMP.sub(
+        lambda match: (
+            f"{match.group(0)}"
+            f"({build_timestamp_url(video.video_id, video.url, int(match.group(1)))})"
+        ),
+        text,
+    )
+
+
+def _label(video: Video, part: Optional[str]) -> str:
+    return f"{video.video_id} ({part})" if part else video.video_id
+
+
+def _part_attrs(part: Optional[str]) -> Dict[str, object]:
+    return {"part": part} if part else {}
+
+
+def _chunk_part(chunk: TranscriptChunk, count: int) -> str:
+    return f"chunk {chunk.index + 1}/{count}"
+
 
-        return GeminiSummary(video=video, summary=summary)
+def _join_chunk_summaries(
+    chunks: Sequence[TranscriptChunk], results: Sequence[Tuple[str, float]]
+) -> str:
+    return "\n\n".join(
+        f"### 第 {chunk.index + 1} 段（{chunk.start}s–{chunk.end}s）\n{summary}"
+        for chunk, (summary, _) in zip(chunks, results)
+    )
 
 
-__all__ = ["GeminiSummarizer", "GeminiSummary"]
+__all__ = [
+    "CHUNK_INSTRUCTIONS",
+    "COMPACT_CHUNK_INSTRUCTIONS",
+    "COMPACT_SUMMARY_INSTRUCTIONS",
+    "GeminiSummarizer",
+    "GeminiSummary",
+    "REDUCE_INSTRUCTIONS",
+    "SUMMARY_INSTRUCTIONS",
+    "TranscriptChunk",
+    "split_transcript",
+]
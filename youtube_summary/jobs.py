@@ -0,0 +1,190 @@
+"""In-process job manager for summary runs started over HTTP."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import logging
+from typing import Dict, Optional, Tuple
+import uuid
+
+from youtube_summary.progress import RunProgress
+from youtube_summary.registry import ClientRegistry
+from youtube_summary.youtube import run_youtube_summary_async
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+JobKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+# Parameters that only tune how a run executes; a request may join a job
+# even when these differ.
+_TUNING_PARAMS = frozenset({"workers"})
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when a new job would exceed the running and queued job limits."""
+
+
+class JobConflict(RuntimeError):
+    """Raised when a request matches an active job's key but not its other parameters."""
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+@dataclass
+class Job:
+    """A summary run tracked by :class:`JobManager`."""
+
+    id: str
+    key: JobKey
+    params: Dict[str, object]
+    progress: RunProgress = field(default_factory=RunProgress)
+    status: str = "queued"
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, object]:
+        payload: Dict[str, object] = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+        }
+        payload.update(self.progress.snapshot())
+        if self.result is not None:
+            payload["result"] = self.result
+        if self.error is not None:
+            payload["error"] = self.error
+        return payload
+
+
+class JobManager:
+    """Run summary jobs on the event loop with coalescing and a bounded queue.
+
+    Requests for the same (start, end, language, title) share the job that is
+    already queued or running for them instead of starting a second pipeline;
+    if any other parameter (apart from ``workers``) differs, the request
+    raises :class:`JobConflict` rather than silently joining.
+    At most ``max_concurrent`` jobs run at once and at most ``max_queued``
+    more wait for a slot; further submissions raise :class:`JobQueueFull`.
+    The most recent ``max_finished`` finished jobs stay available to
+    :meth:`get`.
+    """
+
+    def __init__(
+        self,
+        registry: ClientRegistry,
+        *,
+        max_concurrent: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        max_finished: int = 100,
+    ):
+        pipeline_config = registry.config.pipeline
+        self._registry = registry
+        self._max_concurrent = max(max_concurrent or pipeline_config.max_concurrent_jobs, 1)
+        self._max_queued = max(
+            max_queued if max_queued is not None else pipeline_config.max_queued_jobs, 0
+        )
+        self._max_finished = max(max_finished, 0)
+        self._slots = asyncio.Semaphore(self._max_concurrent)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[JobKey, Job] = {}
+
+    def submit(self, **params) -> Tuple[Job, bool]:
+        """Start or join a job; return it and whether it was newly created.
+
+        ``params`` are the keyword arguments of
+        :func:`~youtube_summary.youtube.run_youtube_summary_async`. Must be
+        called from the running event loop.
+        """
+
+        key: JobKey = (
+            params.get("start"),
+            params.get("end"),
+            params.get("language"),
+            params.get("title"),
+        )
+        job = self._active.get(key)
+        if job is not None:
+            conflicts = sorted(
+                name
+                for name in set(params) | set(job.params)
+                if name not in _TUNING_PARAMS
+                and params.get(name) != job.params.get(name)
+            )
+            if conflicts:
+                raise JobConflict(
+                    f"job {job.id} is already running for this window with different "
+                    f"{', '.join(conflicts)}"
+                )
+            logger.info("%s Coalescing request onto job %s.", LOG_PREFIX, job.id)
+            return job, False
+        if len(self._active) >= self._max_concurrent + self._max_queued:
+            raise JobQueueFull(
+                f"{len(self._active)} jobs already running or queued"
+            )
+
+        job = Job(id=uuid.uuid4().hex, key=key, params=params)
+        self._jobs[job.id] = job
+        self._active[key] = job
+        job.task = asyncio.create_task(self._run(job), name=f"summary-job-{job.id}")
+        self._prune()
+        logger.info("%s Queued job %s.", LOG_PREFIX, job.id)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: Job) -> None:
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = datetime.now(timezone.utc)
+                job.result = await run_youtube_summary_async(
+                    **job.params, registry=self._registry, progress=job.progress
+                )
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            job.progress.enter("failed")
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            logger.exception("%s Summary job %s failed: %s", LOG_PREFIX, job.id, error)
+            job.status = "failed"
+            job.error = str(error)
+            job.progress.enter("failed")
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            job.task = None
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(len(finished) - self._max_finished, 0)]:
+            del self._jobs[job_id]
+
+    async def aclose(self) -> None:
+        """Cancel queued and running jobs and wait for them to stop."""
+
+        tasks = [job.task for job in self._active.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+__all__ = ["Job", "JobConflict", "JobManager", "JobQueueFull"]
@@ -0,0 +1,93 @@
+"""Append-only journal of completed summaries for resumable runs."""
+from __future__ import annotations
+
+from datetime import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Dict, Optional
+
+from youtube_summary.cache import hash_text
+from youtube_summary.gemini_client import GeminiSummary
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+
+def make_run_id(title: str, start_time: datetime, end: Optional[str]) -> str:
+    """Return the journal key for a run.
+
+    The requested ``end`` is used as given rather than the resolved end
+    time, because an open-ended run defaults its end to "now" and would
+    otherwise never match the interrupted invocation.
+    """
+
+    return hash_text(title, start_time.isoformat(), end or "open")[:16]
+
+
+class RunJournal:
+    """Record each finished summary as soon as it completes.
+
+    The journal is a JSON-lines file. A re-invocation with the same run id
+    loads the recorded summaries so only the remaining videos are processed.
+    The file is removed once the run has been committed.
+    """
+
+    def __init__(self, path: Path, run_id: str):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._completed: Dict[str, GeminiSummary] = {}
+        if path.exists():
+            self._load()
+        self.resumed_count = len(self._completed)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def open(cls, directory: Path, run_id: str) -> "RunJournal":
+        return cls(directory / f"{run_id}.jsonl", run_id)
+
+    def _load(self) -> None:
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    entry = GeminiSummary.from_dict(record["summary"])
+                except (ValueError, KeyError, TypeError):
+                    # A crash mid-write can leave a truncated final line.
+                    continue
+                self._completed[entry.video.video_id] = entry
+        if self._completed:
+            logger.info(
+                "%s Resuming run %s with %d journaled summaries.",
+                LOG_PREFIX,
+                self.run_id,
+                len(self._completed),
+            )
+
+    def get(self, video_id: str) -> Optional[GeminiSummary]:
+        with self._lock:
+            return self._completed.get(video_id)
+
+    def record(self, entry: GeminiSummary) -> None:
+        line = json.dumps({"summary": entry.to_dict()}, ensure_ascii=False)
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._completed[entry.video.video_id] = entry
+
+    def finish(self) -> None:
+        """Delete the journal after the run has been committed."""
+
+        with self._lock:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+__all__ = ["RunJournal", "make_run_id"]
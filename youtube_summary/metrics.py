@@ -0,0 +1,248 @@
+"""Latency, retry, byte and error metrics for the API clients and stages."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds; Gemini calls regularly take tens of seconds.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_REQUEST_SECONDS = "youtube_summary_request_seconds"
+_REQUESTS_TOTAL = "youtube_summary_requests_total"
+_RETRIES_TOTAL = "youtube_summary_retries_total"
+_BYTES_TOTAL = "youtube_summary_bytes_total"
+_STAGE_SECONDS = "youtube_summary_stage_seconds"
+_STAGE_CPU_SECONDS = "youtube_summary_stage_cpu_seconds_total"
+
+_DEFINITIONS = {
+    _REQUEST_SECONDS: ("histogram", "Latency of YouTube, transcript, Gemini and Notion API calls."),
+    _REQUESTS_TOTAL: ("counter", "API calls by outcome: ok or the error class."),
+    _RETRIES_TOTAL: ("counter", "API calls repeated after a transient failure."),
+    _BYTES_TOTAL: ("counter", "Payload bytes sent to and received from the APIs."),
+    _STAGE_SECONDS: ("histogram", "Time a pipeline stage spent on one video."),
+    _STAGE_CPU_SECONDS: ("counter", "CPU time pipeline stages spent on their videos."),
+}
+
+
+def error_class(error: BaseException) -> str:
+    """Return the class name of ``error`` with its HTTP status, if it has one."""
+
+    name = type(error).__name__
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(error, "code", None)
+    return f"{name}:{status}" if isinstance(status, int) else name
+
+
+@dataclass
+class CallRecord:
+    """Outcome and payload sizes of one API call, filled in by the caller."""
+
+    outcome: str = "ok"
+    sent: int = 0
+    received: int = 0
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(LATENCY_BUCKETS, value)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms.
+
+    The process-wide :data:`METRICS` instance backs the ``/metrics`` route.
+    Each run records into its own instance created with ``parent=METRICS``,
+    which forwards every observation to the parent, so :meth:`summary`
+    describes that run alone while the parent keeps the process totals.
+    """
+
+    def __init__(self, parent: Optional["Metrics"] = None):
+        self._parent = parent
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def _increment(self, name: str, labels: Labels, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+        if self._parent is not None:
+            self._parent._increment(name, labels, amount)
+
+    def _observe(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = _Histogram()
+            histogram.observe(value)
+        if self._parent is not None:
+            self._parent._observe(name, labels, value)
+
+    @contextmanager
+    def call(self, service: str, operation: str) -> Iterator[CallRecord]:
+        """Time an API call and record its outcome and payload sizes.
+
+        An exception leaving the block sets the outcome to its
+        :func:`error_class` unless the caller already chose one.
+        """
+
+        record = CallRecord()
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as error:
+            if record.outcome == "ok":
+                record.outcome = error_class(error)
+            raise
+        finally:
+            labels = (("operation", operation), ("service", service))
+            self._observe(_REQUEST_SECONDS, labels, time.perf_counter() - started)
+            self.record_outcome(service, operation, record.outcome)
+            self.record_bytes(service, sent=record.sent, received=record.received)
+
+    def record_outcome(self, service: str, operation: str, outcome: str) -> None:
+        """Count a call whose latency is not measured separately, e.g. in a batch."""
+
+        labels = (("operation", operation), ("outcome", outcome), ("service", service))
+        self._increment(_REQUESTS_TOTAL, labels)
+
+    def record_retry(self, service: str, operation: str) -> None:
+        self._increment(_RETRIES_TOTAL, (("operation", operation), ("service", service)))
+
+    def record_bytes(self, service: str, *, sent: int = 0, received: int = 0) -> None:
+        if sent:
+            self._increment(_BYTES_TOTAL, (("direction", "sent"), ("service", service)), sent)
+        if received:
+            self._increment(
+                _BYTES_TOTAL, (("direction", "received"), ("service", service)), received
+            )
+
+    def observe_stage(
+        self, stage: str, seconds: float, cpu_seconds: Optional[float] = None
+    ) -> None:
+        self._observe(_STAGE_SECONDS, (("stage", stage),), seconds)
+        if cpu_seconds is not None:
+            self._increment(_STAGE_CPU_SECONDS, (("stage", stage),), cpu_seconds)
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (list(value.buckets), value.count, value.total)
+                for key, value in self._histograms.items()
+            }
+
+        lines: List[str] = []
+        for name, (kind, description) in _DEFINITIONS.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for (metric, labels), (buckets, count, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += bucket
+                    bucket_labels = labels + (("le", _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, object]:
+        """Return a JSON-serialisable digest of the recorded metrics.
+
+        ``calls`` is keyed by ``<service>.<operation>`` and holds the call
+        count, latency totals, retries, ``not_modified`` answers to
+        conditional requests and ``errors`` by outcome;
+        ``bytes`` and ``stages`` give payload sizes per service and the
+        per-video time spent in each pipeline stage, with the stage's total
+        ``cpu_seconds``.
+        """
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (value.count, value.total, value.max)
+                for key, value in self._histograms.items()
+            }
+
+        calls: Dict[str, Dict[str, object]] = {}
+        stages: Dict[str, Dict[str, object]] = {}
+        for (name, labels), (count, total, maximum) in sorted(histograms.items()):
+            values = dict(labels)
+            timing = {
+                "count": count,
+                "total_seconds": round(total, 3),
+                "mean_seconds": round(total / count, 3) if count else 0.0,
+                "max_seconds": round(maximum, 3),
+            }
+            if name == _REQUEST_SECONDS:
+                calls[f"{values['service']}.{values['operation']}"] = timing
+            elif name == _STAGE_SECONDS:
+                stages[values["stage"]] = timing
+
+        transferred: Dict[str, Dict[str, int]] = {}
+        for (name, labels), value in sorted(counters.items()):
+            values = dict(labels)
+            if name == _BYTES_TOTAL:
+                transferred.setdefault(values["service"], {})[values["direction"]] = int(value)
+                continue
+            if name == _STAGE_CPU_SECONDS:
+                stages.setdefault(values["stage"], {})["cpu_seconds"] = round(value, 3)
+                continue
+            entry = calls.setdefault(f"{values['service']}.{values['operation']}", {})
+            if name == _RETRIES_TOTAL:
+                entry["retries"] = int(value)
+            elif name == _REQUESTS_TOTAL and values["outcome"] == "not_modified":
+                # Conditional requests answered from the ETag cache succeed.
+                entry["not_modified"] = int(value)
+            elif name == _REQUESTS_TOTAL and values["outcome"] != "ok":
+                entry.setdefault("errors", {})[values["outcome"]] = int(value)
+        return {"calls": dict(sorted(calls.items())), "bytes": transferred, "stages": stages}
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    rendered = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + rendered + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+METRICS = Metrics()
+
+__all__ = ["CallRecord", "LATENCY_BUCKETS", "METRICS", "Metrics", "error_class"]
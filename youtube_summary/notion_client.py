@@ -4,18 +4,23 @@ from __future__ import annotations
 from dataclasses import dataclass
 import logging
 import re
-from typing import Iterable, List, Optional
-
-import requests
+import time
+from typing import Iterable, List, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
+from youtube_summary.cassette import Cassette
 from youtube_summary.config import NotionConfig
 from youtube_summary.gemini_client import GeminiSummary
+from youtube_summary.metrics import METRICS, CallRecord, Metrics
+from youtube_summary.tracing import Tracer
 
 LOG_PREFIX = "[gemini_summary_log]"
 logger = logging.getLogger(__name__)
 
 NOTION_API_VERSION = "2022-06-28"
+MAX_CHILDREN_PER_REQUEST = 100
+CONNECTION_POOL_SIZE = 8
+_PAGES_ENDPOINT = "https://api.notion.com/v1/pages"
 
 
 @dataclass
@@ -29,7 +34,7 @@ class NotionResult:
 class NotionUploader:
     """Upload generated summaries to a Notion database or page."""
 
-    def __init__(self, config: NotionConfig):
+    def __init__(self, config: NotionConfig, *, cassette: Optional[Cassette] = None):
         if not config.api_key:
             raise ValueError("A Notion integration token must be provided via NOTION_API_KEY.")
         if not config.database_id and not config.parent_page_id:
@@ -37,24 +42,56 @@ class NotionUploader:
                 "Provide either NOTION_DATABASE_ID or NOTION_PARENT_PAGE_ID to store the summaries."
             )
 
+        import requests
+        from requests.adapters import HTTPAdapter
+
         self._config = config
+        # The uploader may be shared by concurrent runs; keep enough pooled
+        # keep-alive connections to Notion for all of them.
         self._session = requests.Session()
-        self._session.headers.update(
-            {
-                "Authorization": f"Bearer {config.api_key}",
-                "Content-Type": "application/json",
-                "Notion-Version": NOTION_API_VERSION,
-            }
+        self._session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=CONNECTION_POOL_SIZE),
         )
+        self._session.headers.update(self._headers())
+        self._cassette = cassette
+        if cassette is not None:
+            cassette.mount(self._session, "notion")
+        self._async_client = None
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self._config.api_key}",
+            "Content-Type": "application/json",
+            "Notion-Version": NOTION_API_VERSION,
+        }
 
-    def upload(self, title: str, entries: Iterable[GeminiSummary]) -> NotionResult:
-        """Create a page in Notion with the provided summaries."""
+    def _get_async_client(self):
+        """Return the httpx client used by the asyncio upload path."""
 
-        blocks = _build_blocks(entries)
-        max_children = 100
-        first_batch = blocks[:max_children]
-        remaining = blocks[max_children:]
+        if self._async_client is None:
+            import httpx
+
+            limits = httpx.Limits(max_keepalive_connections=CONNECTION_POOL_SIZE)
+            transport = None
+            if self._cassette is not None:
+                transport = self._cassette.httpx_transport(
+                    httpx.AsyncHTTPTransport(limits=limits), "notion"
+                )
+            self._async_client = httpx.AsyncClient(
+                headers=self._headers(),
+                timeout=60,
+                limits=limits,
+                transport=transport,
+            )
+        return self._async_client
 
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _page_payload(self, title: str, children: List[dict]) -> dict:
         payload = {
             "properties": {
                 "title": {
@@ -66,24 +103,77 @@ class NotionUploader:
                     ]
                 }
             },
-            "children": first_batch,
+            "children": children,
         }
 
         if self._config.database_id:
             payload["parent"] = {"database_id": self._config.database_id}
         else:
             payload["parent"] = {"page_id": self._config.parent_page_id}
+        return payload
+
+    def _create_page(
+        self, title: str, children: List[dict], *, metrics: Metrics = METRICS
+    ) -> NotionResult:
+        with metrics.call("notion", "pages.create") as call:
+            response = self._session.post(
+                _PAGES_ENDPOINT,
+                json=self._page_payload(title, children),
+                timeout=60,
+            )
+            _meter_response(call, response)
+        return _page_result(response)
+
+    async def _create_page_async(
+        self, title: str, children: List[dict], *, metrics: Metrics = METRICS
+    ) -> NotionResult:
+        with metrics.call("notion", "pages.create") as call:
+            response = await self._get_async_client().post(
+                _PAGES_ENDPOINT, json=self._page_payload(title, children)
+            )
+            _meter_response(call, response)
+        return _page_result(response)
+
+    def _append_blocks(
+        self, page: NotionResult, blocks: List[dict], *, metrics: Metrics = METRICS
+    ) -> NotionResult:
+        append_endpoint = _children_endpoint(page)
+        for chunk in _chunk_blocks(blocks):
+            with metrics.call("notion", "blocks.append") as call:
+                append_response = self._session.post(
+                    append_endpoint,
+                    json={"children": chunk},
+                    timeout=60,
+                )
+                _meter_response(call, append_response)
+            if append_response.status_code >= 400:
+                return _append_failure(page, append_response)
+        return page
+
+    async def _append_blocks_async(
+        self, page: NotionResult, blocks: List[dict], *, metrics: Metrics = METRICS
+    ) -> NotionResult:
+        append_endpoint = _children_endpoint(page)
+        for chunk in _chunk_blocks(blocks):
+            with metrics.call("notion", "blocks.append") as call:
+                append_response = await self._get_async_client().post(
+                    append_endpoint, json={"children": chunk}
+                )
+                _meter_response(call, append_response)
+            if append_response.status_code >= 400:
+                return _append_failure(page, append_response)
+        return page
 
-        response = self._session.post(
-            "https://api.notion.com/v1/pages", json=payload, timeout=60
-        )
-        if not response.ok:
-            logger.error("%s Notion page creation failed: %s", LOG_PREFIX, response.text)
-            return NotionResult(success=False, error=response.text)
+    def upload(self, title: str, entries: Iterable[GeminiSummary]) -> NotionResult:
+        """Create a page in Notion with the provided summaries."""
+
+        blocks = _build_blocks(entries)
+        first_batch = blocks[:MAX_CHILDREN_PER_REQUEST]
+        remaining = blocks[MAX_CHILDREN_PER_REQUEST:]
 
-        data = response.json()
-        page_id = data.get("id")
-        page_url = data.get("url")
+        result = self._create_page(title, first_batch)
+        if not result.success:
+            return result
 
         if remaining:
             logger.info(
@@ -91,32 +181,240 @@ class NotionUploader:
                 LOG_PREFIX,
                 len(remaining),
             )
-            append_endpoint = f"https://api.notion.com/v1/blocks/{page_id}/children"
-            for index in range(0, len(remaining), max_children):
-                chunk = remaining[index : index + max_children]
-                append_response = self._session.post(
-                    append_endpoint,
-                    json={"children": chunk},
-                    timeout=60,
-                )
-                if not append_response.ok:
-                    logger.error(
-                        "%s Failed to append blocks to Notion page %s: %s",
-                        LOG_PREFIX,
-                        page_id,
-                        append_response.text,
-                    )
-                    return NotionResult(
-                        success=False,
-                        page_id=page_id,
-                        url=page_url,
-                        error=append_response.text,
-                    )
+            result = self._append_blocks(result, remaining)
+            if not result.success:
+                return result
 
         logger.info(
             "%s Notion page ready with %d blocks.", LOG_PREFIX, len(blocks)
         )
-        return NotionResult(success=True, page_id=page_id, url=page_url)
+        return result
+
+    def open_page(
+        self,
+        title: str,
+        *,
+        flush_interval: float = 5.0,
+        metrics: Metrics = METRICS,
+        tracer: Optional[Tracer] = None,
+    ) -> "NotionPageStream":
+        """Return a stream that creates the page on first use and appends entries."""
+
+        return NotionPageStream(
+            self, title, flush_interval=flush_interval, metrics=metrics, tracer=tracer
+        )
+
+    def open_page_async(
+        self,
+        title: str,
+        *,
+        flush_interval: float = 5.0,
+        metrics: Metrics = METRICS,
+        tracer: Optional[Tracer] = None,
+    ) -> "AsyncNotionPageStream":
+        """Asyncio counterpart of :meth:`open_page` backed by httpx."""
+
+        return AsyncNotionPageStream(
+            self, title, flush_interval=flush_interval, metrics=metrics, tracer=tracer
+        )
+
+
+def _meter_response(call: CallRecord, response) -> None:
+    """Record the status and payload sizes of a requests or httpx response."""
+
+    if response.status_code >= 400:
+        call.outcome = f"HTTPError:{response.status_code}"
+    request = response.request
+    body = getattr(request, "body", None)
+    if body is None:
+        body = getattr(request, "content", b"")
+    call.sent = len(body or b"")
+    call.received = len(response.content or b"")
+
+
+def _page_result(response) -> NotionResult:
+    """Turn a page creation response from requests or httpx into a result."""
+
+    if response.status_code >= 400:
+        logger.error("%s Notion page creation failed: %s", LOG_PREFIX, response.text)
+        return NotionResult(success=False, error=response.text)
+
+    data = response.json()
+    return NotionResult(success=True, page_id=data.get("id"), url=data.get("url"))
+
+
+def _append_failure(page: NotionResult, response) -> NotionResult:
+    logger.error(
+        "%s Failed to append blocks to Notion page %s: %s",
+        LOG_PREFIX,
+        page.page_id,
+        response.text,
+    )
+    return NotionResult(
+        success=False,
+        page_id=page.page_id,
+        url=page.url,
+        error=response.text,
+    )
+
+
+def _children_endpoint(page: NotionResult) -> str:
+    return f"https://api.notion.com/v1/blocks/{page.page_id}/children"
+
+
+def _chunk_blocks(blocks: List[dict]) -> Iterable[List[dict]]:
+    for index in range(0, len(blocks), MAX_CHILDREN_PER_REQUEST):
+        yield blocks[index : index + MAX_CHILDREN_PER_REQUEST]
+
+
+class _PageStreamBuffer:
+    """Buffering shared by :class:`NotionPageStream` and :class:`AsyncNotionPageStream`.
+
+    Subclasses only perform the requests; deciding when to flush, what to
+    send and what to record afterwards happens here.
+    """
+
+    def __init__(
+        self,
+        uploader: NotionUploader,
+        title: str,
+        *,
+        flush_interval: float,
+        metrics: Metrics = METRICS,
+        tracer: Optional[Tracer] = None,
+    ):
+        self._uploader = uploader
+        self._title = title
+        self._flush_interval = flush_interval
+        self._metrics = metrics
+        self._tracer = tracer
+        self._pending: List[dict] = []
+        self._pending_videos: List[str] = []
+        self._block_count = 0
+        self._last_flush = time.monotonic()
+        self.result: Optional[NotionResult] = None
+
+    def _page_created(self, result: NotionResult) -> NotionResult:
+        self.result = result
+        if result.success:
+            logger.info("%s Notion page created: %s", LOG_PREFIX, result.url)
+        return result
+
+    def _queue(self, entry: GeminiSummary) -> bool:
+        """Buffer ``entry``'s blocks and return whether a flush is due."""
+
+        self._pending.extend(_build_blocks([entry]))
+        self._pending_videos.append(entry.video.video_id)
+        due = time.monotonic() - self._last_flush >= self._flush_interval
+        return len(self._pending) >= MAX_CHILDREN_PER_REQUEST or due
+
+    def _take(self, page: NotionResult) -> Optional[Tuple[List[dict], List[str]]]:
+        """Return the buffered blocks and their videos to send, clearing the buffer."""
+
+        blocks, self._pending = self._pending, []
+        videos, self._pending_videos = self._pending_videos, []
+        if not blocks or not page.success:
+            return None
+        return blocks, videos
+
+    def _appended(self, result: NotionResult, blocks: List[dict], videos: List[str]) -> None:
+        self.result = result
+        self._block_count += len(blocks)
+        self._last_flush = time.monotonic()
+        _trace_landed(self._tracer, result, videos)
+
+    def _closed(self, result: NotionResult) -> NotionResult:
+        if result.success:
+            logger.info(
+                "%s Notion page ready with %d blocks.", LOG_PREFIX, self._block_count
+            )
+        return result
+
+
+class NotionPageStream(_PageStreamBuffer):
+    """Append summaries to a Notion page as they become available.
+
+    Blocks are buffered and flushed once a full request worth of children has
+    accumulated or ``flush_interval`` seconds have passed since the previous
+    flush. After the first failed request further entries are dropped and the
+    error is reported by :meth:`close`.
+    """
+
+    def _ensure_page(self) -> NotionResult:
+        if self.result is not None:
+            return self.result
+        return self._page_created(
+            self._uploader._create_page(  # pylint: disable=protected-access
+                self._title, [], metrics=self._metrics
+            )
+        )
+
+    def append(self, entry: GeminiSummary) -> GeminiSummary:
+        """Queue ``entry`` for upload and return it unchanged."""
+
+        if self._ensure_page().success and self._queue(entry):
+            self.flush()
+        return entry
+
+    def flush(self) -> None:
+        page = self._ensure_page()
+        batch = self._take(page)
+        if batch is None:
+            return
+        blocks, videos = batch
+        result = self._uploader._append_blocks(  # pylint: disable=protected-access
+            page, blocks, metrics=self._metrics
+        )
+        self._appended(result, blocks, videos)
+
+    def close(self) -> NotionResult:
+        self.flush()
+        return self._closed(self._ensure_page())
+
+
+class AsyncNotionPageStream(_PageStreamBuffer):
+    """Asyncio counterpart of :class:`NotionPageStream` with the same buffering."""
+
+    async def _ensure_page(self) -> NotionResult:
+        if self.result is not None:
+            return self.result
+        return self._page_created(
+            await self._uploader._create_page_async(  # pylint: disable=protected-access
+                self._title, [], metrics=self._metrics
+            )
+        )
+
+    async def append(self, entry: GeminiSummary) -> GeminiSummary:
+        """Queue ``entry`` for upload and return it unchanged."""
+
+        if (await self._ensure_page()).success and self._queue(entry):
+            await self.flush()
+        return entry
+
+    async def flush(self) -> None:
+        page = await self._ensure_page()
+        batch = self._take(page)
+        if batch is None:
+            return
+        blocks, videos = batch
+        result = await self._uploader._append_blocks_async(  # pylint: disable=protected-access
+            page, blocks, metrics=self._metrics
+        )
+        self._appended(result, blocks, videos)
+
+    async def close(self) -> NotionResult:
+        await self.flush()
+        return self._closed(await self._ensure_page())
+
+
+def _trace_landed(
+    tracer: Optional[Tracer], result: NotionResult, video_ids: List[str]
+) -> None:
+    if tracer is None or not result.success:
+        return
+    now = tracer.now()
+    for video_id in video_ids:
+        tracer.record("notion.landed", video_id, now, page_id=result.page_id)
 
 
 def _chunk_text(text: str, *, limit: int = 1990) -> List[str]:
@@ -387,4 +685,4 @@ def _build_summary_blocks(summary: Optional[str]) -> List[dict]:
     return blocks
 
 
-__all__ = ["NotionUploader", "NotionResult"]
+__all__ = ["AsyncNotionPageStream", "NotionPageStream", "NotionUploader", "NotionResult"]
@@ -0,0 +1,315 @@
+"""Queue-connected pipeline stages used by the summary run."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextlib
+import contextvars
+from dataclasses import dataclass
+import inspect
+import queue
+import threading
+import time
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterable,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+from youtube_summary.metrics import Metrics
+from youtube_summary.profiling import current_profiler, profile_thread
+
+InputT = TypeVar("InputT")
+OutputT = TypeVar("OutputT")
+
+_DONE = object()
+_PUT_TIMEOUT = 0.5
+
+
+@dataclass
+class _StageFailure:
+    error: BaseException
+
+
+class _CpuTally:
+    """CPU seconds spent on one :func:`astage` item across threads."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+
+# Tally of the astage item running in the current context; to_thread adds to it.
+_ITEM_CPU: "contextvars.ContextVar[Optional[_CpuTally]]" = contextvars.ContextVar(
+    "pipeline_item_cpu", default=None
+)
+
+
+def stage(
+    upstream: Iterable[InputT],
+    func: Callable[[InputT], OutputT],
+    *,
+    name: str,
+    workers: int = 1,
+    buffer: int = 4,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[OutputT]:
+    """Apply ``func`` to items from ``upstream`` on a background thread.
+
+    Up to ``workers`` items are processed at once and results are emitted in
+    input order through a bounded queue of ``buffer`` items. A full queue stops
+    the stage from pulling more input, so a slow downstream stage applies
+    backpressure all the way to the source. Exceptions raised by ``func`` or
+    the upstream iterator are re-raised in the consumer. The wall and CPU
+    time spent in ``func`` per item are recorded in ``metrics`` under the
+    stage ``name``. The producer thread and every call to ``func`` run in
+    a copy of the caller's context and are profiled when the run is.
+    """
+
+    workers = max(workers, 1)
+    output: "queue.Queue[object]" = queue.Queue(maxsize=max(buffer, 1))
+    stopped = threading.Event()
+    profiler = current_profiler()
+
+    def _call(item: InputT) -> OutputT:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            with profile_thread(profiler):
+                return func(item)
+        finally:
+            if metrics is not None:
+                metrics.observe_stage(
+                    name,
+                    time.perf_counter() - started,
+                    time.thread_time() - cpu_started,
+                )
+
+    def _put(item: object) -> bool:
+        while not stopped.is_set():
+            try:
+                output.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            with profile_thread(profiler), ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix=name
+            ) as executor:
+                pending: Deque[Future] = deque()
+                for item in upstream:
+                    if stopped.is_set():
+                        break
+                    pending.append(
+                        executor.submit(contextvars.copy_context().run, _call, item)
+                    )
+                    if len(pending) >= workers:
+                        if not _put(pending.popleft().result()):
+                            break
+                while pending and not stopped.is_set():
+                    if not _put(pending.popleft().result()):
+                        break
+                for future in pending:
+                    future.cancel()
+        except BaseException as error:  # pylint: disable=broad-except
+            _put(_StageFailure(error))
+        finally:
+            _put(_DONE)
+
+    producer = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(_produce,),
+        name=f"{name}-stage",
+        daemon=True,
+    )
+    producer.start()
+
+    try:
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield item  # type: ignore[misc]
+    finally:
+        stopped.set()
+
+
+async def astage(
+    upstream: AsyncIterable[InputT],
+    func: Callable[[InputT], Union[OutputT, Awaitable[OutputT]]],
+    *,
+    name: str,
+    workers: int = 1,
+    buffer: int = 4,
+    metrics: Optional[Metrics] = None,
+) -> AsyncIterator[OutputT]:
+    """Asyncio counterpart of :func:`stage`.
+
+    Up to ``workers`` calls to ``func`` run concurrently as tasks on the
+    event loop; ordering, the bounded ``buffer`` and error propagation
+    behave as in :func:`stage`. ``func`` may be a coroutine function or a
+    plain function; plain functions run on the event loop and must not block.
+    Per-item time is recorded in ``metrics`` as in :func:`stage`; the CPU
+    time counts the item's own steps on the event loop plus the calls it
+    hands to :func:`to_thread`.
+    """
+
+    workers = max(workers, 1)
+    output: "asyncio.Queue[object]" = asyncio.Queue(maxsize=max(buffer, 1))
+
+    async def _call(item: InputT) -> OutputT:
+        started = time.perf_counter()
+        # Each call runs in its own task, so the tally is local to this item.
+        tally = _CpuTally()
+        _ITEM_CPU.set(tally)
+        try:
+            cpu_started = time.thread_time()
+            result = func(item)
+            tally.seconds += time.thread_time() - cpu_started
+            if inspect.isawaitable(result):
+                return await _ChargedAwaitable(result, tally)
+            return result  # type: ignore[return-value]
+        finally:
+            if metrics is not None:
+                metrics.observe_stage(name, time.perf_counter() - started, tally.seconds)
+
+    async def _produce() -> None:
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            async for item in upstream:
+                pending.append(asyncio.ensure_future(_call(item)))
+                if len(pending) >= workers:
+                    await output.put(await pending.popleft())
+            while pending:
+                await output.put(await pending.popleft())
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            await output.put(_StageFailure(error))
+        finally:
+            for future in pending:
+                future.cancel()
+        await output.put(_DONE)
+
+    producer = asyncio.get_running_loop().create_task(
+        _produce(), name=f"{name}-stage"
+    )
+    try:
+        while True:
+            item = await output.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield item  # type: ignore[misc]
+    finally:
+        producer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await producer
+
+
+class _ChargedAwaitable:
+    """Await ``awaitable``, adding the thread CPU time of each of its steps to ``tally``."""
+
+    def __init__(self, awaitable: Awaitable[OutputT], tally: _CpuTally):
+        self._awaitable = awaitable
+        self._tally = tally
+
+    def __await__(self) -> Generator[object, object, OutputT]:
+        iterator = self._awaitable.__await__()
+        send: Callable[..., object] = iterator.send
+        value: object = None
+        while True:
+            started = time.thread_time()
+            try:
+                yielded = send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._tally.seconds += time.thread_time() - started
+            try:
+                value = yield yielded
+                send = iterator.send
+            except GeneratorExit:
+                iterator.close()
+                raise
+            except BaseException as error:  # pylint: disable=broad-except
+                value = error
+                send = iterator.throw
+
+
+def _call_in_thread(func: Callable[..., OutputT], args: tuple, kwargs: dict) -> OutputT:
+    tally = _ITEM_CPU.get()
+    started = time.thread_time()
+    try:
+        with profile_thread(current_profiler()):
+            return func(*args, **kwargs)
+    finally:
+        if tally is not None:
+            tally.seconds += time.thread_time() - started
+
+
+async def to_thread(func: Callable[..., OutputT], /, *args, **kwargs) -> OutputT:
+    """Run ``func`` on a worker thread like :func:`asyncio.to_thread`.
+
+    The call's CPU time is charged to the current :func:`astage` item and
+    the call is profiled when the run is.
+    """
+
+    return await asyncio.to_thread(_call_in_thread, func, args, kwargs)
+
+
+def map_in_threads(
+    func: Callable[[InputT], OutputT],
+    items: Sequence[InputT],
+    *,
+    workers: int,
+    name: str,
+) -> List[OutputT]:
+    """Apply ``func`` to ``items`` on up to ``workers`` threads; return results in order.
+
+    Each call runs in a copy of the caller's context and is profiled when
+    the run is. Every call finishes before the first exception, if any, is
+    re-raised.
+    """
+
+    profiler = current_profiler()
+
+    def _call(item: InputT) -> OutputT:
+        with profile_thread(profiler):
+            return func(item)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix=name) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _call, item) for item in items
+        ]
+    return [future.result() for future in futures]
+
+
+async def iterate_in_thread(iterable: Iterable[InputT]) -> AsyncIterator[InputT]:
+    """Drive a blocking iterator from worker threads, one item at a time."""
+
+    iterator = iter(iterable)
+    while True:
+        item = await to_thread(next, iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item  # type: ignore[misc]
+
+
+__all__ = ["astage", "iterate_in_thread", "map_in_threads", "stage", "to_thread"]
@@ -0,0 +1,345 @@
+"""Opt-in cProfile, stack sampling and allocation profiling for one run."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+import cProfile
+import io
+import logging
+from pathlib import Path
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from typing import AsyncContextManager, AsyncIterator, ContextManager, Dict, Iterator, List, Optional
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+# Before Python 3.12 a cProfile.Profile only sees the thread that enabled it,
+# so worker threads get their own profiles, merged when the run finishes.
+_PER_THREAD_PROFILES = sys.version_info < (3, 12)
+# Frames kept per allocation traceback.
+_MEMORY_FRAMES = 10
+_REPORT_LIMIT = 40
+
+_CURRENT: ContextVar[Optional["RunProfiler"]] = ContextVar(
+    "youtube_summary_profiler", default=None
+)
+# Only one run at a time can own cProfile's hooks.
+_CPROFILE_LOCK = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(_MEMORY_FRAMES)
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class _StackSampler(threading.Thread):
+    """Sample the Python stack of every thread at a fixed interval.
+
+    Samples are wall-clock: threads waiting on a queue, lock or socket are
+    counted where they wait, which shows where a run spends its time rather
+    than only where it burns CPU.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if ident == own_ident:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                # Pool threads differ only by a numeric suffix; fold them together.
+                stack.append(re.sub(r"[_-]\d+$", "", names.get(ident) or str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class RunProfiler:
+    """Profile one summary run and write the artefacts next to its output.
+
+    :meth:`profiling` enables cProfile on the calling thread and makes the
+    profiler current for the run's context; pipeline stages then profile
+    the worker threads they run on (see :func:`profile_thread`). A sampler
+    thread records the stacks of all threads, and ``tracemalloc`` snapshots
+    taken at the start and end show where memory grew. In the HTTP service
+    the event loop and sampler also see any other requests served meanwhile.
+    """
+
+    def __init__(self, output_path: Path | str, *, sample_interval: float = 0.005):
+        output_file = Path(output_path)
+        self.paths = {
+            "pstats": output_file.with_suffix(".profile.pstats"),
+            "report": output_file.with_suffix(".profile.txt"),
+            "stacks": output_file.with_suffix(".stacks.folded"),
+            "memory": output_file.with_suffix(".memory.txt"),
+        }
+        self._sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._owner: Optional[int] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._thread_profiles: Dict[int, cProfile.Profile] = {}
+        self._active = threading.local()
+        self._sampler: Optional[_StackSampler] = None
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._end_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_memory = 0
+        self._wall = 0.0
+        self._cpu = 0.0
+
+    @contextmanager
+    def profiling(self) -> Iterator["RunProfiler"]:
+        """Profile the enclosed block; must be left on the thread that entered it."""
+
+        token = _CURRENT.set(self)
+        self._start()
+        try:
+            yield self
+        finally:
+            self._stop()
+            _CURRENT.reset(token)
+
+    @asynccontextmanager
+    async def aprofiling(self) -> AsyncIterator["RunProfiler"]:
+        """:meth:`profiling` for a coroutine on the event loop.
+
+        The ``tracemalloc`` snapshots are taken on a worker thread so the
+        loop keeps serving other jobs while they are copied.
+        """
+
+        token = _CURRENT.set(self)
+        await asyncio.to_thread(self._snapshot_start)
+        self._start_timing()
+        try:
+            yield self
+        finally:
+            self._stop_timing()
+            await asyncio.to_thread(self._snapshot_end)
+            _CURRENT.reset(token)
+
+    def _start(self) -> None:
+        self._snapshot_start()
+        self._start_timing()
+
+    def _stop(self) -> None:
+        self._stop_timing()
+        self._snapshot_end()
+
+    def _snapshot_start(self) -> None:
+        _acquire_tracemalloc()
+        tracemalloc.reset_peak()
+        self._start_snapshot = tracemalloc.take_snapshot()
+
+    def _snapshot_end(self) -> None:
+        self._end_snapshot = tracemalloc.take_snapshot()
+        self._peak_memory = tracemalloc.get_traced_memory()[1]
+        _release_tracemalloc()
+
+    def _start_timing(self) -> None:
+        self._owner = threading.get_ident()
+        if _CPROFILE_LOCK.acquire(blocking=False):
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            logger.warning(
+                "%s Another run is being profiled; skipping cProfile for this one.", LOG_PREFIX
+            )
+        self._sampler = _StackSampler(self._sample_interval)
+        self._sampler.start()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def _stop_timing(self) -> None:
+        self._wall = time.perf_counter() - self._wall
+        self._cpu = time.process_time() - self._cpu
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self._profile is not None:
+            self._profile.disable()
+            _CPROFILE_LOCK.release()
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Profile the enclosed block on the current worker thread."""
+
+        if (
+            not _PER_THREAD_PROFILES
+            or self._profile is None
+            or threading.get_ident() == self._owner
+            or getattr(self._active, "profiling", False)
+        ):
+            yield
+            return
+        with self._lock:
+            profile = self._thread_profiles.setdefault(threading.get_ident(), cProfile.Profile())
+        self._active.profiling = True
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active.profiling = False
+
+    def write(self, stages: Optional[Dict[str, Dict[str, object]]] = None) -> Dict[str, object]:
+        """Write the artefacts and return the ``profile`` and ``profile_paths`` payload.
+
+        ``stages`` is the ``stages`` entry of the run's metrics summary,
+        used for the per-stage wall and CPU split.
+        """
+
+        split = {
+            name: {
+                "wall_seconds": timing.get("total_seconds", 0.0),
+                "cpu_seconds": timing.get("cpu_seconds", 0.0),
+            }
+            for name, timing in (stages or {}).items()
+        }
+        written: Dict[str, str] = {}
+        stats = self._merged_stats()
+        if stats is not None:
+            self.paths["pstats"].parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(self.paths["pstats"]))
+            written["pstats"] = str(self.paths["pstats"].resolve())
+        self.paths["report"].write_text(self._report(stats, split), encoding="utf-8")
+        written["report"] = str(self.paths["report"].resolve())
+        if self._sampler is not None:
+            self.paths["stacks"].write_text(
+                "".join(f"{stack} {count}\n" for stack, count in self._sampler.stacks.items()),
+                encoding="utf-8",
+            )
+            written["stacks"] = str(self.paths["stacks"].resolve())
+        self.paths["memory"].write_text(self._memory_report(), encoding="utf-8")
+        written["memory"] = str(self.paths["memory"].resolve())
+        logger.info("%s Saved profile of the run to %s", LOG_PREFIX, written["report"])
+
+        profile = {
+            "wall_seconds": round(self._wall, 3),
+            "cpu_seconds": round(self._cpu, 3),
+            "stages": split,
+            "samples": self._sampler.samples if self._sampler is not None else 0,
+            "peak_traced_memory_bytes": self._peak_memory,
+        }
+        return {"profile": profile, "profile_paths": written}
+
+    def _merged_stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = [self._profile, *self._thread_profiles.values()]
+        stats: Optional[pstats.Stats] = None
+        for profile in profiles:
+            if profile is None:
+                continue
+            profile.create_stats()
+            if not profile.stats:  # type: ignore[attr-defined]
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+    def _report(
+        self, stats: Optional[pstats.Stats], split: Dict[str, Dict[str, object]]
+    ) -> str:
+        lines = [
+            f"Run wall time: {self._wall:.3f}s, process CPU time: {self._cpu:.3f}s",
+            "",
+            f"{'stage':<12} {'wall s':>10} {'cpu s':>10}",
+        ]
+        for name, timing in split.items():
+            lines.append(f"{name:<12} {timing['wall_seconds']:>10.3f} {timing['cpu_seconds']:>10.3f}")
+        lines.append("")
+        if stats is None:
+            lines.append("cProfile was not captured for this run.")
+            return "\n".join(lines) + "\n"
+        for order in ("cumulative", "tottime"):
+            stream = io.StringIO()
+            stats.stream = stream  # type: ignore[attr-defined]
+            stats.sort_stats(order).print_stats(_REPORT_LIMIT)
+            lines.append(f"Top {_REPORT_LIMIT} functions by {order} time:")
+            lines.append(stream.getvalue())
+        return "\n".join(lines)
+
+    def _memory_report(self) -> str:
+        lines = [f"Peak traced memory: {self._peak_memory / (1024 * 1024):.1f} MiB", ""]
+        if self._start_snapshot is None or self._end_snapshot is None:
+            return "\n".join(lines) + "\n"
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        start = self._start_snapshot.filter_traces(filters)
+        end = self._end_snapshot.filter_traces(filters)
+        lines.append(f"Top {_REPORT_LIMIT} allocation sites by growth during the run:")
+        lines.extend(str(stat) for stat in end.compare_to(start, "lineno")[:_REPORT_LIMIT])
+        lines.append("")
+        lines.append(f"Top {_REPORT_LIMIT} allocation sites still held at the end of the run:")
+        lines.extend(str(stat) for stat in end.statistics("lineno")[:_REPORT_LIMIT])
+        return "\n".join(lines) + "\n"
+
+
+def current_profiler() -> Optional[RunProfiler]:
+    """Return the profiler of the run executing in this context, if any."""
+
+    return _CURRENT.get()
+
+
+def profile_run(profiler: Optional[RunProfiler]) -> ContextManager[object]:
+    """:meth:`RunProfiler.profiling` that does nothing when ``profiler`` is ``None``."""
+
+    return profiler.profiling() if profiler is not None else nullcontext()
+
+
+def aprofile_run(profiler: Optional[RunProfiler]) -> AsyncContextManager[object]:
+    """:meth:`RunProfiler.aprofiling` that does nothing when ``profiler`` is ``None``."""
+
+    return profiler.aprofiling() if profiler is not None else nullcontext()
+
+
+def profile_thread(profiler: Optional[RunProfiler]) -> ContextManager[None]:
+    """:meth:`RunProfiler.thread` that does nothing when ``profiler`` is ``None``."""
+
+    return profiler.thread() if profiler is not None else nullcontext()
+
+
+__all__ = ["RunProfiler", "aprofile_run", "current_profiler", "profile_run", "profile_thread"]
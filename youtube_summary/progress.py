@@ -0,0 +1,74 @@
+"""Progress reporting for summary runs."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, TypeVar
+
+ItemT = TypeVar("ItemT")
+
+_FINAL_PHASES = frozenset({"done", "failed"})
+
+
+class RunProgress:
+    """Thread-safe record of a run's current phase and per-stage counts.
+
+    The pipeline moves the run through its phases with :meth:`enter` and
+    counts the items leaving each stage by wrapping the stage output with
+    :meth:`count` or :meth:`acount`. :meth:`snapshot` reports the current
+    phase, the counts and the seconds spent in every phase so far; the
+    final ``done`` and ``failed`` phases are not timed.
+    """
+
+    def __init__(self, phase: str = "queued"):
+        self._lock = threading.Lock()
+        self._phase = phase
+        self._phase_started = time.monotonic()
+        self._durations: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+
+    @property
+    def phase(self) -> str:
+        with self._lock:
+            return self._phase
+
+    def enter(self, phase: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._phase_started
+            self._durations[self._phase] = self._durations.get(self._phase, 0.0) + elapsed
+            self._phase = phase
+            self._phase_started = now
+
+    def advance(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def count(self, name: str, items: Iterable[ItemT]) -> Iterator[ItemT]:
+        for item in items:
+            self.advance(name)
+            yield item
+
+    async def acount(self, name: str, items: AsyncIterable[ItemT]) -> AsyncIterator[ItemT]:
+        async for item in items:
+            self.advance(name)
+            yield item
+
+    def snapshot(self) -> Dict[str, object]:
+        now = time.monotonic()
+        with self._lock:
+            durations = dict(self._durations)
+            if self._phase not in _FINAL_PHASES:
+                durations[self._phase] = durations.get(self._phase, 0.0) + (
+                    now - self._phase_started
+                )
+            return {
+                "stage": self._phase,
+                "progress": dict(self._counts),
+                "timings": {
+                    phase: round(seconds, 3) for phase, seconds in durations.items()
+                },
+            }
+
+
+__all__ = ["RunProgress"]
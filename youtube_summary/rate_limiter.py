@@ -0,0 +1,131 @@
+"""Token-bucket rate limiting for outbound API calls."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import threading
+import time
+from typing import List, Optional
+
+
+@dataclass
+class _Bucket:
+    capacity: float
+    refill_per_second: float
+    level: float
+    updated_at: float
+
+    def refill(self, now: float) -> None:
+        elapsed = max(now - self.updated_at, 0.0)
+        self.level = min(self.capacity, self.level + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return the seconds to wait for it."""
+
+        amount = min(amount, self.capacity)
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.refill_per_second
+
+
+class RateLimiter:
+    """Enforce requests-per-minute and tokens-per-minute budgets.
+
+    Callers reserve capacity under a lock and then sleep outside of it, so a
+    single limiter can be shared by worker threads and asyncio tasks alike.
+    Reservations are granted in arrival order; a reservation that overdraws a
+    bucket simply waits until the bucket has refilled.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        now = time.monotonic()
+        self._lock = threading.Lock()
+        self._requests = _make_bucket(requests_per_minute, now)
+        self._tokens = _make_bucket(tokens_per_minute, now)
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    def _reserve(self, tokens: int) -> float:
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            waits: List[float] = []
+            if self._requests is not None:
+                self._requests.refill(now)
+                waits.append(self._requests.reserve(1))
+            if self._tokens is not None and tokens > 0:
+                self._tokens.refill(now)
+                waits.append(self._tokens.reserve(tokens))
+            return max(waits, default=0.0)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request and ``tokens`` tokens are available.
+
+        Returns the number of seconds spent waiting on the limiter.
+        """
+
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """Asyncio counterpart of :meth:`acquire`."""
+
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def refund(self, tokens: int) -> None:
+        """Return the tokens reserved for a request that failed.
+
+        The request itself still counts against the requests-per-minute
+        budget.
+        """
+
+        self.record_usage(tokens, 0)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Reconcile an earlier token estimate with the usage the API reported."""
+
+        if self._tokens is None or actual_tokens is None:
+            return
+        delta = actual_tokens - estimated_tokens
+        if not delta:
+            return
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level - delta)
+
+
+def _make_bucket(per_minute: Optional[float], now: float) -> Optional[_Bucket]:
+    if not per_minute or per_minute <= 0:
+        return None
+    return _Bucket(
+        capacity=float(per_minute),
+        refill_per_second=float(per_minute) / 60.0,
+        level=float(per_minute),
+        updated_at=now,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used when reserving budget before a request."""
+
+    if not text:
+        return 0
+    return max(len(text.encode("utf-8")) // 4, 1)
+
+
+__all__ = ["RateLimiter", "estimate_tokens"]
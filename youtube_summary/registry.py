@@ -0,0 +1,116 @@
+"""Process-lifetime clients shared by summary runs."""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+import threading
+from typing import Dict, Optional
+
+from youtube_summary.cache import DiskStore
+from youtube_summary.cassette import Cassette
+from youtube_summary.config import AppConfig, load_config_from_env
+from youtube_summary.gemini_client import GeminiSummarizer
+from youtube_summary.notion_client import NotionUploader
+from youtube_summary.transcript_client import TranscriptFetcher
+from youtube_summary.youtube_client import YouTubeSession
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """Warm API clients and cache stores reused across summary runs.
+
+    The HTTP server creates one registry in its lifespan and hands it to
+    every run. The runs then share one YouTube session (credentials,
+    service resource and pooled transports), one Gemini model and rate
+    limiter, a pool of transcript clients, one Notion session and the
+    SQLite stores. Each run only builds the cheap wrappers that carry its
+    own options and statistics. Clients are created on first use. With a
+    ``cassette`` every client records its traffic to it or replays from it.
+    """
+
+    def __init__(
+        self, config: Optional[AppConfig] = None, *, cassette: Optional[Cassette] = None
+    ):
+        self.config = config or load_config_from_env()
+        self.cassette = cassette
+        self._lock = threading.Lock()
+        self._youtube: Optional[YouTubeSession] = None
+        self._summarizer: Optional[GeminiSummarizer] = None
+        self._transcript_fetcher: Optional[TranscriptFetcher] = None
+        self._notion_uploader: Optional[NotionUploader] = None
+        self._stores: Dict[str, DiskStore] = {}
+
+    def youtube_session(self) -> YouTubeSession:
+        """Return the shared session, refreshing expired credentials first."""
+
+        with self._lock:
+            if self._youtube is None:
+                self._youtube = YouTubeSession(self.config.youtube, cassette=self.cassette)
+            session = self._youtube
+        session.ensure_fresh()
+        return session
+
+    def summarizer(self) -> GeminiSummarizer:
+        with self._lock:
+            if self._summarizer is None:
+                self._summarizer = GeminiSummarizer(self.config.gemini, cassette=self.cassette)
+            return self._summarizer
+
+    def transcript_fetcher(self) -> TranscriptFetcher:
+        with self._lock:
+            if self._transcript_fetcher is None:
+                proxy_config = self.config.transcript.build_proxy_config()
+                if proxy_config:
+                    logger.info("%s Using Webshare proxy for transcripts.", LOG_PREFIX)
+                self._transcript_fetcher = TranscriptFetcher(
+                    proxy_config=proxy_config,
+                    cassette=self.cassette,
+                    compact_window_seconds=self.config.transcript.compact_window_seconds,
+                )
+            return self._transcript_fetcher
+
+    def notion_uploader(self) -> NotionUploader:
+        with self._lock:
+            if self._notion_uploader is None:
+                self._notion_uploader = NotionUploader(self.config.notion, cassette=self.cassette)
+            return self._notion_uploader
+
+    def disk_store(
+        self,
+        name: str,
+        *,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> DiskStore:
+        """Return the store ``name`` in the cache directory, opening it once."""
+
+        with self._lock:
+            store = self._stores.get(name)
+            if store is None:
+                store = DiskStore(
+                    Path(self.config.cache.directory) / name,
+                    max_bytes=max_bytes,
+                    max_age_seconds=max_age_seconds,
+                )
+                self._stores[name] = store
+            return store
+
+    async def aclose(self) -> None:
+        """Close the asyncio clients as well as everything :meth:`close` does."""
+
+        with self._lock:
+            uploader = self._notion_uploader
+        if uploader is not None:
+            await uploader.aclose()
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            stores, self._stores = list(self._stores.values()), {}
+        for store in stores:
+            store.close()
+
+
+__all__ = ["ClientRegistry"]
@@ -0,0 +1,183 @@
+"""Lightweight per-video span tracing for summary runs."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from youtube_summary.metrics import error_class
+
+
+@dataclass
+class TraceEvent:
+    """A span, or an instant event when ``end`` is ``None``, on a video's track."""
+
+    name: str
+    track: str
+    start: float
+    end: Optional[float] = None
+    attrs: Dict[str, object] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, object]:
+        payload: Dict[str, object] = {"name": self.name}
+        if self.end is None:
+            payload["at"] = round(self.start, 4)
+        else:
+            payload["start"] = round(self.start, 4)
+            payload["end"] = round(self.end, 4)
+            payload["duration"] = round(self.end - self.start, 4)
+        payload.update(self.attrs)
+        return payload
+
+
+class Tracer:
+    """Thread-safe collector of spans and instant events keyed by video ID.
+
+    Times are seconds since the tracer was created. :meth:`to_dict` groups
+    the events per video for the run payload and :meth:`to_chrome_trace`
+    renders them in the Chrome trace event format, which Perfetto and
+    ``chrome://tracing`` open with one track per video. A tracer created
+    with ``enabled=False`` keeps the clock but records nothing, so runs that
+    do not ask for a trace pay no per-event cost.
+    """
+
+    def __init__(self, *, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.started_at = datetime.now(timezone.utc)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[TraceEvent] = []
+        self._labels: Dict[str, str] = {}
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def label(self, track: str, label: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._labels.setdefault(track, label)
+
+    def record(
+        self,
+        name: str,
+        track: str,
+        start: float,
+        end: Optional[float] = None,
+        **attrs: object,
+    ) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._events.append(TraceEvent(name, track, start, end, attrs))
+
+    def instant(self, name: str, track: str, **attrs: object) -> None:
+        if self.enabled:
+            self.record(name, track, self.now(), **attrs)
+
+    @contextmanager
+    def span(self, name: str, track: str, **attrs: object) -> Iterator[Dict[str, object]]:
+        """Record the enclosed block; the yielded dict adds span attributes."""
+
+        if not self.enabled:
+            yield attrs
+            return
+        start = self.now()
+        try:
+            yield attrs
+        except BaseException as error:
+            attrs.setdefault("error", error_class(error))
+            raise
+        finally:
+            self.record(name, track, start, self.now(), **attrs)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return the events grouped per video in first-seen order."""
+
+        with self._lock:
+            events = list(self._events)
+            labels = dict(self._labels)
+        videos: Dict[str, List[TraceEvent]] = {}
+        for event in sorted(events, key=lambda event: event.start):
+            videos.setdefault(event.track, []).append(event)
+        timeline = []
+        for track, track_events in videos.items():
+            first = track_events[0].start
+            last = max(
+                event.end if event.end is not None else event.start
+                for event in track_events
+            )
+            timeline.append(
+                {
+                    "video_id": track,
+                    "title": labels.get(track),
+                    "elapsed": round(last - first, 4),
+                    "events": [event.to_dict() for event in track_events],
+                }
+            )
+        return {"started_at": self.started_at.isoformat(), "videos": timeline}
+
+    def to_chrome_trace(self) -> Dict[str, object]:
+        with self._lock:
+            events = sorted(self._events, key=lambda event: event.start)
+            labels = dict(self._labels)
+        thread_ids: Dict[str, int] = {}
+        trace_events: List[Dict[str, object]] = []
+        for event in events:
+            tid = thread_ids.get(event.track)
+            if tid is None:
+                tid = thread_ids[event.track] = len(thread_ids) + 1
+                label = labels.get(event.track)
+                trace_events.append(
+                    {
+                        "ph": "M",
+                        "name": "thread_name",
+                        "pid": 1,
+                        "tid": tid,
+                        "args": {
+                            "name": f"{event.track} {label}" if label else event.track
+                        },
+                    }
+                )
+            entry: Dict[str, object] = {
+                "name": event.name,
+                "pid": 1,
+                "tid": tid,
+                "ts": round(event.start * 1_000_000),
+                "args": event.attrs,
+            }
+            if event.end is None:
+                entry.update(ph="i", s="t")
+            else:
+                entry.update(ph="X", dur=round((event.end - event.start) * 1_000_000))
+            trace_events.append(entry)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(self.to_chrome_trace(), ensure_ascii=False, default=str),
+            encoding="utf-8",
+        )
+        return path
+
+
+@contextmanager
+def trace_span(
+    tracer: Optional[Tracer], name: str, track: str, **attrs: object
+) -> Iterator[Dict[str, object]]:
+    """:meth:`Tracer.span` that does nothing when ``tracer`` is ``None``."""
+
+    if tracer is None or not tracer.enabled:
+        yield attrs
+        return
+    with tracer.span(name, track, **attrs) as span_attrs:
+        yield span_attrs
+
+
+__all__ = ["TraceEvent", "Tracer", "trace_span"]
@@ -1,17 +1,21 @@
 """Utilities for fetching YouTube video transcripts."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 import logging
-from typing import List, Optional
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
 
-from youtube_transcript_api import (
-    NoTranscriptFound,
-    TranscriptsDisabled,
-    YouTubeTranscriptApi,
-    YouTubeTranscriptApiException,
-)
-from youtube_transcript_api.proxies import ProxyConfig
+from youtube_summary.cache import CacheStats, TranscriptCache
+from youtube_summary.metrics import METRICS, Metrics
+from youtube_summary.rate_limiter import estimate_tokens
+
+if TYPE_CHECKING:
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from youtube_transcript_api.proxies import ProxyConfig
+
+    from youtube_summary.cassette import Cassette
 
 _DEFAULT_LANGUAGES = [
     "zh-Hans",
@@ -29,7 +33,17 @@ def _format_timestamp(seconds: int) -> str:
     return f"{safe_seconds}s"
 
 
-def _build_timestamp_url(video_id: str, video_url: Optional[str], seconds: int) -> str:
+def _snippet_seconds(snippet: Dict[str, object]) -> Optional[int]:
+    start = snippet.get("start")
+    if start is None:
+        return None
+    try:
+        return max(int(float(start)), 0)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_timestamp_url(video_id: str, video_url: Optional[str], seconds: int) -> str:
     """Compose a YouTube URL that jumps to the given timestamp."""
 
     base_url = (video_url or "").strip() or f"https://www.youtube.com/watch?v={video_id}"
@@ -39,11 +53,33 @@ def _build_timestamp_url(video_id: str, video_url: Optional[str], seconds: int)
 
 @dataclass
 class TranscriptFetcher:
-    """Fetch transcripts for YouTube videos."""
+    """Fetch transcripts for YouTube videos.
+
+    With ``compact_window_seconds`` set, :meth:`fetch` merges the captions
+    of each window into one ``[83s] text`` line without the jump URL; the
+    summarizer adds the links back to its output. ``token_stats`` counts
+    the estimated tokens of the ``full`` link-per-line format and of the
+    ``compact`` format actually returned.
+    """
 
     preferred_languages: Optional[List[str]] = None
     proxy_config: Optional[ProxyConfig] = None
-    _client: YouTubeTranscriptApi = field(init=False, repr=False)
+    cache: Optional[TranscriptCache] = None
+    metrics: Metrics = field(default=METRICS, repr=False)
+    cassette: Optional[Cassette] = field(default=None, repr=False)
+    compact_window_seconds: Optional[int] = None
+    token_stats: CacheStats = field(
+        default_factory=lambda: CacheStats("full", "compact"), repr=False
+    )
+    # Idle API clients. Each wraps its own requests session, which is not
+    # thread-safe, so a client is leased by one fetch at a time and returned
+    # with its keep-alive connections for the next one.
+    _idle_clients: List[YouTubeTranscriptApi] = field(
+        default_factory=list, init=False, repr=False
+    )
+    _client_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
     _logger = logging.getLogger(__name__)
     _log_prefix = "[gemini_summary_log]"
 
@@ -55,37 +91,165 @@ class TranscriptFetcher:
     def _log_debug(cls, message: str, *args) -> None:
         cls._logger.debug("%s " + message, cls._log_prefix, *args)
 
-    def __post_init__(self) -> None:
-        self._client = YouTubeTranscriptApi(proxy_config=self.proxy_config)
+    @contextmanager
+    def _lease_client(self) -> Iterator[YouTubeTranscriptApi]:
+        """Borrow an idle API client, creating one when none is free."""
 
-    def fetch(self, video_id: str, *, video_url: Optional[str] = None) -> Optional[str]:
-        """Return the transcript text for the given video ID if available."""
+        with self._client_lock:
+            client = self._idle_clients.pop() if self._idle_clients else None
+        if client is None:
+            client = self._new_client()
+        try:
+            yield client
+        finally:
+            with self._client_lock:
+                self._idle_clients.append(client)
+
+    def _new_client(self) -> YouTubeTranscriptApi:
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        if self.cassette is None:
+            return YouTubeTranscriptApi(proxy_config=self.proxy_config)
+        import requests
+
+        # Mount the cassette after the API client has mounted its own adapters.
+        session = requests.Session()
+        client = YouTubeTranscriptApi(proxy_config=self.proxy_config, http_client=session)
+        self.cassette.mount(session, "transcript")
+        return client
 
+    def with_options(
+        self,
+        *,
+        preferred_languages: Optional[List[str]] = None,
+        cache: Optional[TranscriptCache] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> "TranscriptFetcher":
+        """Return a fetcher for other languages, cache or metrics sharing this client pool.
+
+        The new fetcher starts with empty ``token_stats``.
+        """
+
+        fetcher = replace(
+            self,
+            preferred_languages=preferred_languages,
+            cache=cache,
+            metrics=metrics or METRICS,
+            token_stats=CacheStats("full", "compact"),
+        )
+        fetcher._idle_clients = self._idle_clients
+        fetcher._client_lock = self._client_lock
+        return fetcher
+
+    def _candidate_languages(self) -> List[str]:
         if self.preferred_languages:
-            candidate_languages = list(
-                dict.fromkeys(self.preferred_languages + _DEFAULT_LANGUAGES)
-            )
-        else:
-            candidate_languages = _DEFAULT_LANGUAGES
+            return list(dict.fromkeys(self.preferred_languages + _DEFAULT_LANGUAGES))
+        return _DEFAULT_LANGUAGES
+
+    def fetch_snippets(self, video_id: str) -> Optional[List[Dict[str, object]]]:
+        """Return the raw caption snippets for the given video ID if available.
+
+        Results, including "no transcript" and "transcripts disabled"
+        outcomes, are served from and written to the cache when one is set.
+        """
+
+        candidate_languages = self._candidate_languages()
+        cache_key: Optional[str] = None
+        if self.cache is not None:
+            cache_key = TranscriptCache.make_key(video_id, candidate_languages)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if cached.missing_reason:
+                    self._log_debug(
+                        "Cached negative transcript result for %s: %s",
+                        video_id,
+                        cached.missing_reason,
+                    )
+                    return None
+                return cached.snippets
+
+        from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled
 
         try:
-            transcript = self._client.fetch(video_id, languages=candidate_languages)
+            with self.metrics.call("transcript", "fetch") as call:
+                with self._lease_client() as client:
+                    transcript = client.fetch(video_id, languages=candidate_languages)
+                call.received = sum(
+                    len(snippet.text.encode("utf-8")) for snippet in transcript
+                )
+        except (NoTranscriptFound, TranscriptsDisabled) as error:
+            self._log_error("Transcript unavailable for %s: %s", video_id, error)
+            if self.cache is not None and cache_key is not None:
+                reason = (
+                    "disabled"
+                    if isinstance(error, TranscriptsDisabled)
+                    else "not_found"
+                )
+                self.cache.set_missing(cache_key, reason)
+            return None
         except Exception as error:  # pylint: disable=broad-except
             self._log_error("Transcript fetch failed for %s: %s", video_id, error)
             return None
+
+        snippets = transcript.to_raw_data()
+        if self.cache is not None and cache_key is not None:
+            self.cache.set_snippets(cache_key, snippets)
+        return snippets
+
+    def fetch(self, video_id: str, *, video_url: Optional[str] = None) -> Optional[str]:
+        """Return the transcript text for the given video ID if available."""
+
+        snippets = self.fetch_snippets(video_id)
+        if snippets is None:
+            return None
+        full = self._format_full(snippets, video_id, video_url=video_url)
+        if full is None or not self.compact_window_seconds:
+            text = full
+        else:
+            text = self._format_compact(snippets, self.compact_window_seconds)
+        if text:
+            full_tokens = estimate_tokens(full or "")
+            compact_tokens = estimate_tokens(text)
+            self.token_stats.record("full", full_tokens)
+            self.token_stats.record("compact", compact_tokens)
+            if text is not full:
+                self._log_debug(
+                    "Compact transcript for %s: ~%d tokens instead of ~%d.",
+                    video_id,
+                    compact_tokens,
+                    full_tokens,
+                )
+        return text
+
+    def format_snippets(
+        self,
+        snippets: List[Dict[str, object]],
+        video_id: str,
+        *,
+        video_url: Optional[str] = None,
+    ) -> Optional[str]:
+        """Render raw snippets as timestamped Markdown lines, or compact lines when configured."""
+
+        if self.compact_window_seconds:
+            return self._format_compact(snippets, self.compact_window_seconds)
+        return self._format_full(snippets, video_id, video_url=video_url)
+
+    def _format_full(
+        self,
+        snippets: List[Dict[str, object]],
+        video_id: str,
+        *,
+        video_url: Optional[str] = None,
+    ) -> Optional[str]:
         lines: List[str] = []
-        for snippet in transcript.to_raw_data():
-            text = snippet.get("text", "").strip()
+        for snippet in snippets:
+            text = str(snippet.get("text", "")).strip()
             if not text:
                 continue
-            start = snippet.get("start")
-            if start is not None:
-                try:
-                    timestamp_seconds = max(int(float(start)), 0)
-                except (TypeError, ValueError):
-                    timestamp_seconds = 0
+            timestamp_seconds = _snippet_seconds(snippet)
+            if timestamp_seconds is not None:
                 timestamp = _format_timestamp(timestamp_seconds)
-                timestamp_url = _build_timestamp_url(
+                timestamp_url = build_timestamp_url(
                     video_id, video_url, timestamp_seconds
                 )
                 lines.append(f"[{timestamp}]({timestamp_url}) {text}")
@@ -99,5 +263,42 @@ class TranscriptFetcher:
             )
         return cleaned or None
 
+    @staticmethod
+    def _format_compact(
+        snippets: List[Dict[str, object]], window_seconds: int
+    ) -> Optional[str]:
+        """Merge snippets into ``[83s] text`` lines covering ``window_seconds`` each.
+
+        A window starts at the first snippet after the previous one ended;
+        snippets without a start time join the window they follow.
+        """
+
+        lines: List[str] = []
+        texts: List[str] = []
+        window_start: Optional[int] = None
+        for snippet in snippets:
+            text = " ".join(str(snippet.get("text", "")).split())
+            if not text:
+                continue
+            seconds = _snippet_seconds(snippet)
+            if seconds is not None and (
+                window_start is None or seconds >= window_start + window_seconds
+            ):
+                if texts:
+                    lines.append(_compact_line(window_start, texts))
+                texts = []
+                window_start = seconds
+            texts.append(text)
+        if texts:
+            lines.append(_compact_line(window_start, texts))
+        return "\n".join(lines) or None
+
+
+def _compact_line(window_start: Optional[int], texts: List[str]) -> str:
+    text = " ".join(texts)
+    if window_start is None:
+        return text
+    return f"[{_format_timestamp(window_start)}] {text}"
+
 
-__all__ = ["TranscriptFetcher"]
+__all__ = ["TranscriptFetcher", "build_timestamp_url"]
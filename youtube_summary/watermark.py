@@ -0,0 +1,118 @@
+"""Per-channel high-watermarks for incremental video discovery."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Dict, Optional, Set
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Watermark:
+    """The newest video seen for a channel in a committed run."""
+
+    video_id: str
+    published_at: datetime
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"video_id": self.video_id, "published_at": self.published_at.isoformat()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "Watermark":
+        return cls(
+            video_id=data["video_id"],
+            published_at=datetime.fromisoformat(data["published_at"]),
+        )
+
+
+class WatermarkStore:
+    """JSON-backed store of per-channel watermarks.
+
+    Discovery records the newest video it sees for each channel through
+    :meth:`observe`. Those observations stay pending until :meth:`commit` is
+    called after the run has finished successfully, so a failed run never
+    moves a watermark past videos it did not process. Channels with a video
+    that failed within an otherwise successful run are passed to
+    :meth:`hold` and keep their committed watermark.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._committed: Dict[str, Watermark] = {}
+        self._pending: Dict[str, Watermark] = {}
+        # Channel of every video observed since the last commit.
+        self._channels: Dict[str, str] = {}
+        self._held: Set[str] = set()
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                self._committed = {
+                    channel_id: Watermark.from_dict(entry)
+                    for channel_id, entry in raw.items()
+                }
+            except (ValueError, KeyError, TypeError) as error:
+                logger.error(
+                    "%s Ignoring unreadable watermark file %s: %s", LOG_PREFIX, path, error
+                )
+
+    def get(self, channel_id: str) -> Optional[Watermark]:
+        with self._lock:
+            return self._committed.get(channel_id)
+
+    def observe(self, channel_id: str, video_id: str, published_at: datetime) -> None:
+        with self._lock:
+            self._channels[video_id] = channel_id
+            current = self._pending.get(channel_id)
+            if current is None or published_at > current.published_at:
+                self._pending[channel_id] = Watermark(video_id, published_at)
+
+    def hold(self, video_id: str) -> None:
+        """Keep the channel of ``video_id`` at its committed watermark on the next commit.
+
+        The next run then discovers the video again, along with the
+        channel's other videos since that watermark.
+        """
+
+        with self._lock:
+            channel_id = self._channels.get(video_id)
+            if channel_id is not None:
+                self._held.add(channel_id)
+
+    def commit(self) -> int:
+        """Persist pending watermarks and return how many channels advanced."""
+
+        with self._lock:
+            advanced = 0
+            for channel_id, mark in self._pending.items():
+                if channel_id in self._held:
+                    continue
+                current = self._committed.get(channel_id)
+                if current is None or mark.published_at > current.published_at:
+                    self._committed[channel_id] = mark
+                    advanced += 1
+            held = len(self._held)
+            self._pending = {}
+            self._channels = {}
+            self._held = set()
+            payload = {
+                channel_id: mark.to_dict() for channel_id, mark in self._committed.items()
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            temp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            os.replace(temp_path, self.path)
+        logger.info(
+            "%s Committed watermarks for %d channels (%d held back).", LOG_PREFIX, advanced, held
+        )
+        return advanced
+
+
+__all__ = ["Watermark", "WatermarkStore"]
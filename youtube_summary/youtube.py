@@ -2,23 +2,39 @@
 from __future__ import annotations
 
 import argparse
+from dataclasses import dataclass
 import json
 import logging
 import sys
-import time
+import tempfile
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
 if __package__ in (None, ""):
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from youtube_summary.config import AppConfig, load_config_from_env
-from youtube_summary.document import build_markdown_document
+from youtube_summary.cache import EtagCache, MetadataCache, SummaryCache, TranscriptCache
+from youtube_summary.cassette import Cassette, cassette_config
+from youtube_summary.config import load_config_from_env
+from youtube_summary.document import MarkdownDocumentWriter
 from youtube_summary.gemini_client import GeminiSummary, GeminiSummarizer
+from youtube_summary.journal import RunJournal, make_run_id
+from youtube_summary.metrics import METRICS, Metrics
 from youtube_summary.transcript_client import TranscriptFetcher
-from youtube_summary.notion_client import NotionResult, NotionUploader
+from youtube_summary.watermark import WatermarkStore
+from youtube_summary.notion_client import (
+    AsyncNotionPageStream,
+    NotionPageStream,
+    NotionResult,
+)
+from youtube_summary.pipeline import astage, iterate_in_thread, stage, to_thread
+from youtube_summary.profiling import RunProfiler, aprofile_run, profile_run
+from youtube_summary.progress import RunProgress
+from youtube_summary.registry import ClientRegistry
+from youtube_summary.tracing import Tracer
 from youtube_summary.youtube_client import Video, YouTubeClient
 
 
@@ -94,6 +110,53 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Skip uploading the result to Notion.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of videos to summarise concurrently (default: SUMMARY_WORKERS or 1).",
+    )
+    parser.add_argument(
+        "--bypass-cache",
+        action="store_true",
+        help="Ignore cached Gemini summaries and regenerate them (fresh results are still cached).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process videos newer than each channel's watermark from the last successful run.",
+    )
+    parser.add_argument(
+        "--refresh-metadata",
+        action="store_true",
+        help="Refetch the subscription list and uploads playlists even if the cache is fresh.",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Write a Chrome trace (Perfetto) of the per-video timeline next to the output.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run (cProfile, stack samples, memory) and write the reports next to the output.",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record-cassette",
+        type=Path,
+        help="Record all API traffic of this run to a compressed cassette file.",
+    )
+    cassette_group.add_argument(
+        "--replay-cassette",
+        type=Path,
+        help="Replay a recorded cassette offline; the time window, language and title come from it.",
+    )
+    parser.add_argument(
+        "--replay-latency-scale",
+        type=float,
+        default=1.0,
+        help="Multiply the recorded latencies when replaying (0 replays instantly).",
+    )
     return parser.parse_args(argv)
 
 
@@ -107,115 +170,355 @@ def _parse_datetime(value: str) -> datetime:
     return dt.astimezone(timezone.utc)
 
 
-def _summarise_videos(
-    videos: Iterable[Video],
+_SKIPPED_SUMMARY = (
+    "Gemini summarisation was skipped. Please provide your own notes for this video."
+)
+
+
+def _discover_videos(
+    youtube_client: YouTubeClient,
+    *,
+    start_time: datetime,
+    end_time: datetime,
+    max_per_channel: Optional[int],
+    watermarks: Optional[WatermarkStore] = None,
+    stream: bool = False,
+    reorder_buffer: int = 0,
+) -> Iterator[Video]:
+    _log_info("Fetching subscription list…")
+    channels = youtube_client.list_subscription_channel_ids()
+    _log_info("Found %d subscription channels.", len(channels))
+    if channels:
+        _log_info("Subscription channels: %s", ", ".join(channels))
+
+    _log_info("Fetching videos within the specified range…")
+    if stream:
+        # Hand videos downstream as each details batch resolves instead of
+        # waiting for every channel; the order is only approximately newest
+        # first, within ``reorder_buffer`` videos.
+        count = 0
+        for video in youtube_client.iter_videos_for_channels(
+            channels,
+            start_time=start_time,
+            end_time=end_time,
+            max_videos_per_channel=max_per_channel,
+            watermarks=watermarks,
+            reorder_buffer=reorder_buffer,
+        ):
+            count += 1
+            yield video
+        videos: List[Video] = []
+    else:
+        videos = youtube_client.fetch_videos_for_channels(
+            channels,
+            start_time=start_time,
+            end_time=end_time,
+            max_videos_per_channel=max_per_channel,
+            watermarks=watermarks,
+        )
+        count = len(videos)
+    _log_info("Discovered %d videos within the requested window.", count)
+    rejections = youtube_client.filter_engine.rejection_counts()
+    if rejections:
+        _log_info(
+            "Filtered before detail fetch: %s; after detail fetch: %s",
+            rejections.get("playlist", {}),
+            rejections.get("details", {}),
+        )
+    yield from videos
+
+
+@dataclass
+class _WorkItem:
+    """A video moving through the pipeline stages."""
+
+    video: Video
+    transcript: Optional[str] = None
+    summary: Optional[GeminiSummary] = None
+    # Trace time at which the item started waiting for the summarise stage.
+    ready_at: Optional[float] = None
+
+
+def _queue_video(
+    video: Video, *, journal: Optional[RunJournal], tracer: Tracer
+) -> _WorkItem:
+    _log_info(
+        "Video queued: %s | %s | %s",
+        video.video_id,
+        video.title,
+        video.published_at.isoformat(),
+    )
+    tracer.label(video.video_id, video.title)
+    tracer.instant("discovered", video.video_id, channel=video.channel_title)
+    item = _WorkItem(video=video)
+    journaled = journal.get(video.video_id) if journal else None
+    if journaled is not None:
+        _log_info("Reusing journaled summary for %s", video.video_id)
+        tracer.instant("resumed_from_journal", video.video_id)
+        item.summary = GeminiSummary(video=video, summary=journaled.summary)
+    return item
+
+
+def _fetch_transcript(
+    item: _WorkItem,
     *,
-    config: AppConfig,
-    language: Optional[str],
-    skip_gemini: bool,
     transcript_fetcher: Optional[TranscriptFetcher],
-) -> List[GeminiSummary]:
-    video_list = list(videos)
-    summaries: List[GeminiSummary] = []
+    tracer: Tracer,
+) -> _WorkItem:
+    if item.summary is not None or not transcript_fetcher:
+        return item
+    with tracer.span("transcript", item.video.video_id) as attrs:
+        _fetch_transcript_text(item, transcript_fetcher)
+        attrs["available"] = bool(item.transcript)
+    item.ready_at = tracer.now()
+    return item
 
-    if skip_gemini:
-        _log_info("Skipping Gemini summarisation for %d videos.", len(video_list))
-        for video in video_list:
-            summaries.append(
-                GeminiSummary(
-                    video=video,
-                    summary=(
-                        "Gemini summarisation was skipped. Please provide your own notes for this video."
-                    ),
-                )
+
+def _fetch_transcript_text(item: _WorkItem, transcript_fetcher: TranscriptFetcher) -> None:
+    video = item.video
+    try:
+        _log_info(
+            "Fetching transcript for %s (%s)", video.video_id, video.title
+        )
+        item.transcript = transcript_fetcher.fetch(
+            video.video_id, video_url=video.url
+        )
+        if item.transcript:
+            _log_info(
+                "Retrieved transcript for %s (chars=%d)",
+                video.video_id,
+                len(item.transcript),
             )
-        return summaries
-
-    summarizer = GeminiSummarizer(config.gemini)
-    for video in video_list:
-        transcript: Optional[str] = None
-        if transcript_fetcher:
-            try:
-                _log_info(
-                    "Fetching transcript for %s (%s)", video.video_id, video.title
-                )
-                transcript = transcript_fetcher.fetch(
-                    video.video_id, video_url=video.url
-                )
-                if transcript:
-                    _log_info(
-                        "Retrieved transcript for %s (chars=%d)",
-                        video.video_id,
-                        len(transcript),
-                    )
-                else:
-                    _log_warning(
-                        "Transcript unavailable for %s", video.video_id
-                    )
-            except Exception as error:  # pylint: disable=broad-except
-                _log_error(
-                    "Failed to fetch transcript for %s: %s",
-                    video.video_id,
-                    error,
-                )
-        try:
-            _log_info("Gemini summary start generated for %s", video.video_id)
-            summaries.append(
-                summarizer.summarize(
-                    video,
-                    transcript=transcript,
-                    language=language,
-                )
+        else:
+            _log_warning(
+                "Transcript unavailable for %s", video.video_id
             )
-            _log_info("Gemini summary end generated for %s", video.video_id)
-            time.sleep(3)
-        except Exception as error:  # pylint: disable=broad-except
-            _log_error("Gemini summary failed for %s: %s", video.video_id, error)
-            summaries.append(
-                GeminiSummary(
-                    video=video,
-                    summary=f"Failed to summarise via Gemini: {error}",
-                )
+    except Exception as error:  # pylint: disable=broad-except
+        _log_error(
+            "Failed to fetch transcript for %s: %s",
+            video.video_id,
+            error,
+        )
+
+
+def _trace_queue_wait(item: _WorkItem, tracer: Tracer) -> None:
+    if item.ready_at is not None:
+        tracer.record("gemini.queue_wait", item.video.video_id, item.ready_at, tracer.now())
+
+
+def _summarise_video(
+    item: _WorkItem,
+    *,
+    summarizer: GeminiSummarizer,
+    language: Optional[str],
+    journal: Optional[RunJournal],
+    tracer: Tracer,
+) -> GeminiSummary:
+    if item.summary is not None:
+        return item.summary
+    _start_summary(item, tracer)
+    try:
+        with tracer.span("summarise", item.video.video_id):
+            summary = summarizer.summarize(
+                item.video,
+                transcript=item.transcript,
+                language=language,
             )
+    except Exception as error:  # pylint: disable=broad-except
+        return _failed_summary(item.video, error)
+    _end_summary(summary)
+    if journal is not None:
+        journal.record(summary)
+    return summary
 
-    return summaries
 
+async def _summarise_video_async(
+    item: _WorkItem,
+    *,
+    summarizer: GeminiSummarizer,
+    language: Optional[str],
+    journal: Optional[RunJournal],
+    tracer: Tracer,
+) -> GeminiSummary:
+    if item.summary is not None:
+        return item.summary
+    _start_summary(item, tracer)
+    try:
+        with tracer.span("summarise", item.video.video_id):
+            summary = await summarizer.summarize_async(
+                item.video,
+                transcript=item.transcript,
+                language=language,
+            )
+    except Exception as error:  # pylint: disable=broad-except
+        return _failed_summary(item.video, error)
+    _end_summary(summary)
+    if journal is not None:
+        await to_thread(journal.record, summary)
+    return summary
 
-def _upload_to_notion(
-    config: AppConfig,
-    title: str,
-    summaries: Iterable[GeminiSummary],
-    skip_notion: bool,
-) -> Optional[NotionResult]:
+
+def _start_summary(item: _WorkItem, tracer: Tracer) -> None:
+    _trace_queue_wait(item, tracer)
+    _log_info("Gemini summary start generated for %s", item.video.video_id)
+
+
+def _end_summary(summary: GeminiSummary) -> None:
+    _log_info(
+        "Gemini summary end generated for %s (limiter_wait=%.2fs)",
+        summary.video.video_id,
+        summary.limiter_wait_seconds,
+    )
+
+
+def _failed_summary(video: Video, error: Exception) -> GeminiSummary:
+    _log_error("Gemini summary failed for %s: %s", video.video_id, error)
+    return GeminiSummary(
+        video=video,
+        summary=f"Failed to summarise via Gemini: {error}",
+        failed=True,
+    )
+
+
+def _skipped_summary(item: _WorkItem) -> GeminiSummary:
+    return GeminiSummary(video=item.video, summary=_SKIPPED_SUMMARY)
+
+
+def _open_summary_cache(registry: ClientRegistry, bypass: bool) -> Optional[SummaryCache]:
+    cache_config = registry.config.cache
+    if not cache_config.summary_enabled:
+        return None
+    store = registry.disk_store(
+        "summaries.sqlite3",
+        max_bytes=cache_config.summary_max_bytes,
+        max_age_seconds=cache_config.summary_max_age_days * 86400,
+    )
+    return SummaryCache(store, bypass=bypass)
+
+
+def _open_transcript_cache(registry: ClientRegistry) -> Optional[TranscriptCache]:
+    cache_config = registry.config.cache
+    if not cache_config.transcript_enabled:
+        return None
+    store = registry.disk_store(
+        "transcripts.sqlite3",
+        max_bytes=cache_config.transcript_max_bytes,
+    )
+    return TranscriptCache(
+        store,
+        negative_ttl_seconds=cache_config.transcript_negative_ttl_hours * 3600,
+    )
+
+
+def _open_metadata_cache(registry: ClientRegistry) -> MetadataCache:
+    store = registry.disk_store("metadata.sqlite3")
+    return MetadataCache(
+        store, ttl_seconds=registry.config.cache.metadata_ttl_hours * 3600
+    )
+
+
+def _open_etag_cache(registry: ClientRegistry) -> EtagCache:
+    store = registry.disk_store(
+        "etags.sqlite3",
+        max_bytes=registry.config.cache.etag_max_bytes,
+    )
+    return EtagCache(store)
+
+
+def _notion_enabled(registry: ClientRegistry, skip_notion: bool) -> bool:
     if skip_notion:
         _log_info("Skipping Notion upload by request.")
-        return None
-    if not config.notion.api_key or not (
-        config.notion.database_id or config.notion.parent_page_id
+        return False
+    notion_config = registry.config.notion
+    if not notion_config.api_key or not (
+        notion_config.database_id or notion_config.parent_page_id
     ):
         _log_warning("Notion configuration incomplete; skipping upload.")
+        return False
+    return True
+
+
+def _open_notion_stream(
+    registry: ClientRegistry,
+    title: str,
+    skip_notion: bool,
+    metrics: Metrics,
+    tracer: Tracer,
+) -> Optional[NotionPageStream]:
+    if not _notion_enabled(registry, skip_notion):
         return None
+    return registry.notion_uploader().open_page(title, metrics=metrics, tracer=tracer)
 
-    uploader = NotionUploader(config.notion)
-    result = uploader.upload(title, summaries)
-    if result.success:
-        _log_info("Notion page created: %s", result.url)
-    else:
-        _log_error("Notion upload failed: %s", result.error)
-    return result
+
+def _open_notion_stream_async(
+    registry: ClientRegistry,
+    title: str,
+    skip_notion: bool,
+    metrics: Metrics,
+    tracer: Tracer,
+) -> Optional[AsyncNotionPageStream]:
+    if not _notion_enabled(registry, skip_notion):
+        return None
+    return registry.notion_uploader().open_page_async(
+        title, metrics=metrics, tracer=tracer
+    )
 
 
-def run_youtube_summary(
+@dataclass
+class _RunContext:
+    """Per-run state shared by the synchronous and asyncio pipelines."""
+
+    registry: ClientRegistry
+    start_time: datetime
+    end_time: datetime
+    title: str
+    language: Optional[str]
+    max_per_channel: Optional[int]
+    output_file: Path
+    worker_count: int
+    buffer: int
+    youtube_client: YouTubeClient
+    watermarks: Optional[WatermarkStore]
+    journal: Optional[RunJournal]
+    progress: RunProgress
+    metrics: Metrics
+    tracer: Tracer
+    trace_file: Optional[Path] = None
+    transcript_fetcher: Optional[TranscriptFetcher] = None
+    summarizer: Optional[GeminiSummarizer] = None
+    transcript_cache: Optional[TranscriptCache] = None
+    summary_cache: Optional[SummaryCache] = None
+
+    def discover(self) -> Iterator[Video]:
+        pipeline_config = self.registry.config.pipeline
+        return _discover_videos(
+            self.youtube_client,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            max_per_channel=self.max_per_channel,
+            watermarks=self.watermarks,
+            stream=pipeline_config.stream_discovery,
+            reorder_buffer=pipeline_config.discovery_reorder_buffer,
+        )
+
+
+def _prepare_run(
+    registry: ClientRegistry,
     *,
-    start: Optional[str] = None,
-    end: Optional[str] = None,
-    language: Optional[str] = "zh-CN",
-    max_per_channel: Optional[int] = None,
-    output_path: Path | str = Path("subscription_summaries.md"),
-    title: Optional[str] = None,
-    skip_gemini: bool = False,
-    skip_notion: bool = False,
-) -> dict:
+    start: Optional[str],
+    end: Optional[str],
+    language: Optional[str],
+    max_per_channel: Optional[int],
+    output_path: Path | str,
+    title: Optional[str],
+    skip_gemini: bool,
+    workers: Optional[int],
+    bypass_cache: bool,
+    incremental: bool,
+    refresh_metadata: bool,
+    trace: bool,
+    progress: RunProgress,
+) -> _RunContext:
     default_start, default_end = _default_time_bounds()
     start_time = _parse_datetime(start) if start else default_start
     end_time = _parse_datetime(end) if end else default_end
@@ -230,90 +533,541 @@ def run_youtube_summary(
             datefmt="%Y-%m-%d %H:%M:%S",
         )
 
-    config = load_config_from_env()
-    youtube_client = YouTubeClient(config.youtube)
-
-    _log_info("Fetching subscription list…")
-    channels = youtube_client.list_subscription_channel_ids()
-    _log_info("Found %d subscription channels.", len(channels))
-    if channels:
-        _log_info("Subscription channels: %s", ", ".join(channels))
+    config = registry.config
+    # Observations for this run also land in the process-wide metrics.
+    metrics = Metrics(parent=METRICS)
+    youtube_client = YouTubeClient(
+        config.youtube,
+        metadata_cache=_open_metadata_cache(registry),
+        refresh_metadata=refresh_metadata,
+        etag_cache=_open_etag_cache(registry),
+        session=registry.youtube_session(),
+        metrics=metrics,
+    )
+    worker_count = max(workers or config.pipeline.workers, 1)
+    watermarks: Optional[WatermarkStore] = None
+    if incremental:
+        watermarks = WatermarkStore(Path(config.cache.directory) / "watermarks.json")
+        _log_info("Incremental mode: using watermarks from %s", watermarks.path)
+    journal: Optional[RunJournal] = None
+    if not skip_gemini:
+        journal = RunJournal.open(
+            Path(config.cache.directory) / "journals",
+            make_run_id(resolved_title, start_time, end),
+        )
 
-    _log_info("Fetching videos within the specified range…")
-    videos = youtube_client.fetch_videos_for_channels(
-        channels,
+    context = _RunContext(
+        registry=registry,
         start_time=start_time,
         end_time=end_time,
-        max_videos_per_channel=max_per_channel,
+        title=resolved_title,
+        language=language,
+        max_per_channel=max_per_channel,
+        output_file=Path(output_path),
+        worker_count=worker_count,
+        buffer=worker_count * 2,
+        youtube_client=youtube_client,
+        watermarks=watermarks,
+        journal=journal,
+        progress=progress,
+        metrics=metrics,
+        tracer=Tracer(enabled=trace),
+        trace_file=Path(output_path).with_suffix(".trace.json") if trace else None,
     )
-    videos = list(videos)
-    _log_info("Discovered %d videos within the requested window.", len(videos))
-    for video in videos:
-        _log_info(
-            "Video queued: %s | %s | %s",
-            video.video_id,
-            video.title,
-            video.published_at.isoformat(),
-        )
-
-    transcript_fetcher: Optional[TranscriptFetcher] = None
-    if not skip_gemini:
+    if skip_gemini:
+        _log_info("Skipping Gemini summarisation by request.")
+    else:
         transcript_languages: Optional[List[str]] = None
         if language:
             transcript_languages = [language]
-        proxy_config = config.transcript.build_proxy_config()
-        if proxy_config:
-            _log_info("Using Webshare proxy for transcripts.")
-        transcript_fetcher = TranscriptFetcher(
+        context.transcript_cache = _open_transcript_cache(registry)
+        context.transcript_fetcher = registry.transcript_fetcher().with_options(
             preferred_languages=transcript_languages,
-            proxy_config=proxy_config,
+            cache=context.transcript_cache,
+            metrics=metrics,
         )
+        context.summary_cache = _open_summary_cache(registry, bypass_cache)
+        context.summarizer = registry.summarizer().with_options(
+            cache=context.summary_cache, metrics=metrics, tracer=context.tracer
+        )
+        _log_info("Summarising videos with %d workers.", worker_count)
+    return context
 
-    summaries = _summarise_videos(
-        videos,
-        config=config,
-        language=language,
-        skip_gemini=skip_gemini,
-        transcript_fetcher=transcript_fetcher,
-    )
-
-    document = build_markdown_document(
-        resolved_title,
-        summaries,
-        start_time=start_time,
-        end_time=end_time,
-    )
 
-    output_file = Path(output_path)
-    output_file.write_text(document.body, encoding="utf-8")
+def _finish_run(
+    context: _RunContext,
+    *,
+    video_count: int,
+    limiter_wait: float,
+    failed_videos: List[str],
+    notion_result: Optional[NotionResult],
+) -> dict:
+    output_file = context.output_file
     _log_info("Saved Markdown document to %s", output_file.resolve())
+    if notion_result is not None:
+        if notion_result.success:
+            _log_info("Notion upload finished: %s", notion_result.url)
+        else:
+            _log_error("Notion upload failed: %s", notion_result.error)
 
-    notion_result = _upload_to_notion(
-        config,
-        resolved_title,
-        summaries,
-        skip_notion=skip_notion,
-    )
+    run_committed = not (notion_result and not notion_result.success)
+    watermarks = context.watermarks
+    journal = context.journal
+    watermarks_advanced: Optional[int] = None
+    if watermarks is not None:
+        if run_committed:
+            if failed_videos:
+                _log_warning(
+                    "Holding back the watermarks of channels with %d failed summaries.",
+                    len(failed_videos),
+                )
+            for video_id in failed_videos:
+                watermarks.hold(video_id)
+            watermarks_advanced = watermarks.commit()
+        else:
+            _log_warning("Not advancing watermarks because the Notion upload failed.")
+    resumed_count = journal.resumed_count if journal else 0
+    if journal is not None and run_committed:
+        journal.finish()
+    trace_path: Optional[str] = None
+    if context.trace_file is not None:
+        trace_path = str(context.tracer.write_chrome_trace(context.trace_file).resolve())
+        _log_info("Saved Chrome trace to %s", trace_path)
 
-    if notion_result and not notion_result.success:
-        _log_error("Failed to create Notion page: %s", notion_result.error)
+    if context.transcript_fetcher is not None:
+        tokens = context.transcript_fetcher.token_stats.as_dict()
+        if tokens["full"]:
+            _log_info(
+                "Transcripts came to ~%d prompt tokens (~%d in the linked format).",
+                tokens["compact"],
+                tokens["full"],
+            )
 
+    youtube_client = context.youtube_client
+    summary_cache = context.summary_cache
+    transcript_cache = context.transcript_cache
     output_payload = {
-        "video_count": len(videos),
+        "video_count": video_count,
         "document_path": str(output_file.resolve()),
         "notion_page_url": notion_result.url if notion_result else None,
+        "gemini_limiter_wait_seconds": round(limiter_wait, 3),
+        "summary_cache": summary_cache.stats.as_dict() if summary_cache else None,
+        "transcript_cache": (
+            transcript_cache.stats.as_dict() if transcript_cache else None
+        ),
+        "transcript_tokens": (
+            context.transcript_fetcher.token_stats.as_dict()
+            if context.transcript_fetcher
+            else None
+        ),
+        "metadata_cache": youtube_client.metadata_stats,
+        "youtube_conditional_requests": youtube_client.conditional_stats(),
+        "youtube_transfer": youtube_client.transfer_stats.as_dict(),
+        "filter_rejections": youtube_client.filter_engine.rejection_counts(),
+        "watermarks_advanced": watermarks_advanced,
+        "failed_summaries": failed_videos,
+        "run_id": journal.run_id if journal else None,
+        "resumed_from_journal": resumed_count,
+        "metrics": context.metrics.summary(),
+        "trace": context.tracer.to_dict() if context.tracer.enabled else None,
+        "trace_path": trace_path,
+        "profile": None,
+        "profile_paths": None,
     }
     _log_info(
         "Pipeline finished: %d videos processed. Document=%s NotionURL=%s",
-        len(videos),
+        video_count,
         output_payload["document_path"],
         output_payload["notion_page_url"],
     )
+    context.progress.enter("done")
     return output_payload
 
+
+def run_youtube_summary(
+    *,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    language: Optional[str] = "zh-CN",
+    max_per_channel: Optional[int] = None,
+    output_path: Path | str = Path("subscription_summaries.md"),
+    title: Optional[str] = None,
+    skip_gemini: bool = False,
+    skip_notion: bool = False,
+    workers: Optional[int] = None,
+    bypass_cache: bool = False,
+    incremental: bool = False,
+    refresh_metadata: bool = False,
+    trace: bool = False,
+    profile: bool = False,
+    registry: Optional[ClientRegistry] = None,
+    progress: Optional[RunProgress] = None,
+) -> dict:
+    """Run the summary pipeline and return a JSON-serialisable report.
+
+    ``registry`` supplies warm clients shared with other runs; without one
+    a registry is created for this run and closed when it finishes.
+    ``progress`` receives the current phase and per-stage counts. With
+    ``trace`` the per-video timeline is returned under ``trace`` and also
+    written as a Chrome trace next to ``output_path``. With ``profile`` the run is profiled and the
+    artefacts listed under ``profile_paths`` are written next to it as well.
+    """
+
+    owns_registry = registry is None
+    registry = registry or ClientRegistry()
+    progress = progress or RunProgress()
+    progress.enter("preparing")
+    profiler = RunProfiler(output_path) if profile else None
+    payload: Optional[dict] = None
+    try:
+        with profile_run(profiler):
+            context = _prepare_run(
+                registry,
+                start=start,
+                end=end,
+                language=language,
+                max_per_channel=max_per_channel,
+                output_path=output_path,
+                title=title,
+                skip_gemini=skip_gemini,
+                workers=workers,
+                bypass_cache=bypass_cache,
+                incremental=incremental,
+                refresh_metadata=refresh_metadata,
+                trace=trace,
+                progress=progress,
+            )
+            payload = _run_pipeline(context, skip_notion=skip_notion)
+    finally:
+        if owns_registry:
+            registry.close()
+        _write_profile(profiler, payload)
+    return payload
+
+
+def _write_profile(profiler: Optional[RunProfiler], payload: Optional[dict]) -> None:
+    """Write ``profiler``'s artefacts, also after a failed run, and list them in ``payload``.
+
+    Failures are logged rather than raised so they never mask the run's own
+    result or exception.
+    """
+
+    if profiler is None:
+        return
+    try:
+        report = profiler.write(payload["metrics"]["stages"] if payload is not None else None)
+    except Exception as error:  # pylint: disable=broad-except
+        logger.exception("%s Failed to write the run profile: %s", LOG_PREFIX, error)
+        return
+    if payload is not None:
+        payload.update(report)
+
+
+def _run_pipeline(context: _RunContext, *, skip_notion: bool) -> dict:
+    buffer = context.buffer
+    worker_count = context.worker_count
+    progress = context.progress
+    metrics = context.metrics
+    progress.enter("running")
+
+    # Each stage runs on its own thread and hands videos to the next one
+    # through a bounded queue, so the document and the Notion page fill in
+    # while later videos are still being processed.
+    discovered = progress.count(
+        "discovered",
+        stage(
+            context.discover(),
+            partial(_queue_video, journal=context.journal, tracer=context.tracer),
+            name="discover",
+            buffer=buffer,
+        ),
+    )
+
+    summaries: Iterator[GeminiSummary]
+    if context.summarizer is None:
+        summaries = stage(discovered, _skipped_summary, name="summarise", buffer=buffer)
+    else:
+        transcripts = progress.count(
+            "transcribed",
+            stage(
+                discovered,
+                partial(
+                    _fetch_transcript,
+                    transcript_fetcher=context.transcript_fetcher,
+                    tracer=context.tracer,
+                ),
+                name="transcript",
+                workers=worker_count,
+                buffer=buffer,
+                metrics=metrics,
+            ),
+        )
+        summaries = stage(
+            transcripts,
+            partial(
+                _summarise_video,
+                summarizer=context.summarizer,
+                language=context.language,
+                journal=context.journal,
+                tracer=context.tracer,
+            ),
+            name="summarise",
+            workers=worker_count,
+            buffer=buffer,
+            metrics=metrics,
+        )
+
+    summaries = progress.count("summarised", summaries)
+    notion_stream = _open_notion_stream(
+        context.registry, context.title, skip_notion, metrics, context.tracer
+    )
+    video_count = 0
+    limiter_wait = 0.0
+    failed_videos: List[str] = []
+    with MarkdownDocumentWriter(
+        context.output_file,
+        context.title,
+        start_time=context.start_time,
+        end_time=context.end_time,
+    ) as writer:
+        completed = progress.count(
+            "rendered",
+            stage(
+                summaries, writer.write, name="render", buffer=buffer, metrics=metrics
+            ),
+        )
+        if notion_stream is not None:
+            completed = progress.count(
+                "uploaded",
+                stage(
+                    completed,
+                    notion_stream.append,
+                    name="upload",
+                    buffer=buffer,
+                    metrics=metrics,
+                ),
+            )
+        for entry in completed:
+            video_count += 1
+            limiter_wait += entry.limiter_wait_seconds
+            if entry.failed:
+                failed_videos.append(entry.video.video_id)
+
+    progress.enter("finishing")
+    notion_result = notion_stream.close() if notion_stream is not None else None
+    return _finish_run(
+        context,
+        video_count=video_count,
+        limiter_wait=limiter_wait,
+        failed_videos=failed_videos,
+        notion_result=notion_result,
+    )
+
+
+async def run_youtube_summary_async(
+    *,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    language: Optional[str] = "zh-CN",
+    max_per_channel: Optional[int] = None,
+    output_path: Path | str = Path("subscription_summaries.md"),
+    title: Optional[str] = None,
+    skip_gemini: bool = False,
+    skip_notion: bool = False,
+    workers: Optional[int] = None,
+    bypass_cache: bool = False,
+    incremental: bool = False,
+    refresh_metadata: bool = False,
+    trace: bool = False,
+    profile: bool = False,
+    registry: Optional[ClientRegistry] = None,
+    progress: Optional[RunProgress] = None,
+) -> dict:
+    """Asyncio counterpart of :func:`run_youtube_summary`.
+
+    Gemini and Notion requests run on the event loop; only the blocking
+    libraries (googleapiclient discovery, transcript fetching) and file or
+    SQLite work (setup and commit, the summary cache, the journal and the
+    Markdown document) are offloaded to threads. Several
+    runs can therefore share one event loop without starving it.
+    """
+
+    owns_registry = registry is None
+    registry = registry or ClientRegistry()
+    progress = progress or RunProgress()
+    progress.enter("preparing")
+    profiler = RunProfiler(output_path) if profile else None
+    payload: Optional[dict] = None
+    try:
+        # Entered and left on the event loop; to_thread and the stages
+        # profile the worker threads the run hands work to.
+        async with aprofile_run(profiler):
+            context = await to_thread(
+                _prepare_run,
+                registry,
+                start=start,
+                end=end,
+                language=language,
+                max_per_channel=max_per_channel,
+                output_path=output_path,
+                title=title,
+                skip_gemini=skip_gemini,
+                workers=workers,
+                bypass_cache=bypass_cache,
+                incremental=incremental,
+                refresh_metadata=refresh_metadata,
+                trace=trace,
+                progress=progress,
+            )
+            payload = await _run_pipeline_async(context, skip_notion=skip_notion)
+    finally:
+        if owns_registry:
+            await registry.aclose()
+        await to_thread(_write_profile, profiler, payload)
+    return payload
+
+
+async def _run_pipeline_async(context: _RunContext, *, skip_notion: bool) -> dict:
+    buffer = context.buffer
+    worker_count = context.worker_count
+    progress = context.progress
+    metrics = context.metrics
+    progress.enter("running")
+
+    discovered = progress.acount(
+        "discovered",
+        astage(
+            iterate_in_thread(context.discover()),
+            partial(_queue_video, journal=context.journal, tracer=context.tracer),
+            name="discover",
+            buffer=buffer,
+        ),
+    )
+
+    summaries: AsyncIterator[GeminiSummary]
+    if context.summarizer is None:
+        summaries = astage(discovered, _skipped_summary, name="summarise", buffer=buffer)
+    else:
+        transcripts = progress.acount(
+            "transcribed",
+            astage(
+                discovered,
+                partial(
+                    to_thread,
+                    _fetch_transcript,
+                    transcript_fetcher=context.transcript_fetcher,
+                    tracer=context.tracer,
+                ),
+                name="transcript",
+                workers=worker_count,
+                buffer=buffer,
+                metrics=metrics,
+            ),
+        )
+        summaries = astage(
+            transcripts,
+            partial(
+                _summarise_video_async,
+                summarizer=context.summarizer,
+                language=context.language,
+                journal=context.journal,
+                tracer=context.tracer,
+            ),
+            name="summarise",
+            workers=worker_count,
+            buffer=buffer,
+            metrics=metrics,
+        )
+
+    summaries = progress.acount("summarised", summaries)
+    notion_stream = _open_notion_stream_async(
+        context.registry, context.title, skip_notion, metrics, context.tracer
+    )
+    video_count = 0
+    limiter_wait = 0.0
+    failed_videos: List[str] = []
+    with MarkdownDocumentWriter(
+        context.output_file,
+        context.title,
+        start_time=context.start_time,
+        end_time=context.end_time,
+    ) as writer:
+        completed = progress.acount(
+            "rendered",
+            astage(
+                summaries,
+                partial(to_thread, writer.write),
+                name="render",
+                buffer=buffer,
+                metrics=metrics,
+            ),
+        )
+        if notion_stream is not None:
+            completed = progress.acount(
+                "uploaded",
+                astage(
+                    completed,
+                    notion_stream.append,
+                    name="upload",
+                    buffer=buffer,
+                    metrics=metrics,
+                ),
+            )
+        async for entry in completed:
+            video_count += 1
+            limiter_wait += entry.limiter_wait_seconds
+            if entry.failed:
+                failed_videos.append(entry.video.video_id)
+
+    progress.enter("finishing")
+    notion_result = await notion_stream.close() if notion_stream is not None else None
+    return await to_thread(
+        _finish_run,
+        context,
+        video_count=video_count,
+        limiter_wait=limiter_wait,
+        failed_videos=failed_videos,
+        notion_result=notion_result,
+    )
+
+
+# Run options that shape the API requests and are stored in a cassette.
+_CASSETTE_RUN_OPTIONS = ("start", "end", "language", "max_per_channel", "title")
+
+
+def _run_with_cassette(args: argparse.Namespace, options: dict) -> dict:
+    """Run the pipeline while recording or replaying a cassette.
+
+    The run uses an empty temporary cache directory, so a recording holds
+    every request of the run and a replay makes the same requests.
+    """
+
+    if args.replay_cassette:
+        cassette = Cassette.load(args.replay_cassette, latency_scale=args.replay_latency_scale)
+        options.update(cassette.metadata.get("run") or {})
+    else:
+        default_start, default_end = _default_time_bounds()
+        options["start"] = options["start"] or default_start.isoformat()
+        options["end"] = options["end"] or default_end.isoformat()
+        cassette = Cassette(args.record_cassette)
+        cassette.metadata["run"] = {name: options[name] for name in _CASSETTE_RUN_OPTIONS}
+
+    with tempfile.TemporaryDirectory(prefix="youtube-summary-cassette-") as cache_directory:
+        config = cassette_config(load_config_from_env(), cassette, cache_directory)
+        registry = ClientRegistry(config, cassette=cassette)
+        try:
+            payload = run_youtube_summary(**options, registry=registry)
+        finally:
+            registry.close()
+            if not cassette.replaying:
+                cassette.save()
+    payload["cassette"] = cassette.summary()
+    return payload
+
+
 def cli_main(argv: Optional[Iterable[str]] = None) -> int:
     args = parse_args(argv)
-    payload = run_youtube_summary(
+    options = dict(
         start=args.start,
         end=args.end,
         language=args.language,
@@ -322,7 +1076,17 @@ def cli_main(argv: Optional[Iterable[str]] = None) -> int:
         title=args.title,
         skip_gemini=args.skip_gemini,
         skip_notion=args.skip_notion,
+        workers=args.workers,
+        bypass_cache=args.bypass_cache,
+        incremental=args.incremental,
+        refresh_metadata=args.refresh_metadata,
+        trace=args.trace,
+        profile=args.profile,
     )
+    if args.record_cassette or args.replay_cassette:
+        payload = _run_with_cassette(args, options)
+    else:
+        payload = run_youtube_summary(**options)
     print(json.dumps(payload, ensure_ascii=False, indent=2))
     return 0
 
@@ -1,18 +1,74 @@
 """Utilities for interacting with the YouTube Data API."""
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+import heapq
+import logging
 import re
-from typing import Dict, Iterable, List, Optional, Sequence
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    import httplib2
+    from googleapiclient.discovery import Resource
+    from googleapiclient.http import HttpRequest
+    from google_auth_httplib2 import AuthorizedHttp
+    from google.oauth2.credentials import Credentials
 
-from googleapiclient.discovery import Resource, build
-from googleapiclient.http import HttpRequest
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+    from youtube_summary.cassette import Cassette
 
+from youtube_summary.cache import CacheStats, EtagCache, MetadataCache, hash_text
 from youtube_summary.config import YouTubeConfig
+from youtube_summary.filters import DETAILS_FIELDS, PLAYLIST_FIELDS, FilterEngine
+from youtube_summary.metrics import METRICS, Metrics, error_class
+from youtube_summary.watermark import WatermarkStore
+
+LOG_PREFIX = "[gemini_summary_log]"
+logger = logging.getLogger(__name__)
+
+# Partial-response projections: request only the attributes the pipeline reads.
+_SUBSCRIPTION_FIELDS = "nextPageToken,items/snippet/resourceId/channelId"
+_CHANNEL_FIELDS = "items(id,contentDetails/relatedPlaylists/uploads)"
+_PLAYLIST_ITEM_FIELDS = (
+    "etag,nextPageToken,"
+    "items(snippet(publishedAt,title,description,channelTitle,videoOwnerChannelTitle),"
+    "contentDetails(videoId,videoPublishedAt))"
+)
+_VIDEO_FIELDS = (
+    "etag,"
+    "items(id,snippet(publishedAt,title,description,channelTitle,liveBroadcastContent),"
+    "contentDetails/duration)"
+)
+# playlistItems.list page size bounds.
+_MIN_PAGE_SIZE = 10
+_MAX_PAGE_SIZE = 50
+
+# The videos.list endpoint accepts up to 50 IDs per request.
+_DETAILS_BATCH_SIZE = 50
+# Number of sub-requests sent in one batched HTTP call.
+_BATCH_LIMIT = 50
+# Extra rounds a failed sub-request is retried in before the error is raised.
+_BATCH_RETRIES = 2
+
+
+def _log_info(message: str, *args) -> None:
+    logger.info("%s " + message, LOG_PREFIX, *args)
 
 
 @dataclass
@@ -30,40 +86,92 @@ class Video:
     def url(self) -> str:
         return f"https://www.youtube.com/watch?v={self.video_id}"
 
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "video_id": self.video_id,
+            "title": self.title,
+            "description": self.description,
+            "channel_title": self.channel_title,
+            "published_at": self.published_at.isoformat(),
+            "duration_seconds": self.duration_seconds,
+        }
 
-class YouTubeClient:
-    """Client wrapper around the YouTube Data API."""
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "Video":
+        return cls(
+            video_id=str(data["video_id"]),
+            title=str(data.get("title", "")),
+            description=str(data.get("description", "")),
+            channel_title=str(data.get("channel_title", "")),
+            published_at=datetime.fromisoformat(str(data["published_at"])),
+            duration_seconds=data.get("duration_seconds"),  # type: ignore[arg-type]
+        )
 
-    def __init__(self, config: YouTubeConfig):
+
+class YouTubeSession:
+    """Credentials, service resource and pooled transports for the API.
+
+    A session can outlive a single run: the HTTP server keeps one for the
+    lifetime of the process so later runs skip the OAuth flow and service
+    construction and reuse open connections. The Google client libraries
+    are imported on first use so that starting the server does not pay for
+    them. With a ``cassette`` all API traffic is recorded to it, or replayed
+    from it without credentials.
+    """
+
+    def __init__(self, config: YouTubeConfig, *, cassette: Optional[Cassette] = None):
         self._config = config
+        self._cassette = cassette
+        self._lock = threading.Lock()
+        self._credentials: Optional[Credentials] = None
         self._service: Optional[Resource] = None
+        self._idle: List[Tuple[AuthorizedHttp, httplib2.Http]] = []
 
     def authenticate(self) -> Resource:
-        """Authenticate with the YouTube API and return a service resource."""
+        """Authenticate with the YouTube API once and return the service resource.
 
-        creds: Optional[Credentials] = None
-        if self._config.token_file:
-            try:
-                creds = Credentials.from_authorized_user_file(
-                    self._config.token_file, self._config.scopes
-                )
-            except FileNotFoundError:
-                creds = None
+        Threads racing on first use wait for the first one to finish; the
+        service and its pooled transports are then reused.
+        """
 
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self._config.client_secrets_file, self._config.scopes
-                )
-                creds = flow.run_local_server(port=0)
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        with self._lock:
+            if self._service is not None:
+                return self._service
+            if self._cassette is not None and self._cassette.replaying:
+                from google.auth.credentials import AnonymousCredentials
+
+                self._credentials = AnonymousCredentials()
+                self._idle = []
+                self._service = self._build_service(self._new_http()[0])
+                return self._service
+
+            creds: Optional[Credentials] = None
             if self._config.token_file:
-                with open(self._config.token_file, "w", encoding="utf-8") as token_file:
-                    token_file.write(creds.to_json())
+                try:
+                    creds = Credentials.from_authorized_user_file(
+                        self._config.token_file, self._config.scopes
+                    )
+                except FileNotFoundError:
+                    creds = None
 
-        self._service = build("youtube", "v3", credentials=creds)
-        return self._service
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                else:
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        self._config.client_secrets_file, self._config.scopes
+                    )
+                    creds = flow.run_local_server(port=0)
+                self._save_credentials(creds)
+
+            self._credentials = creds
+            self._idle = []
+            self._service = self._build_service(self._new_http()[0])
+            return self._service
 
     @property
     def service(self) -> Resource:
@@ -71,19 +179,228 @@ class YouTubeClient:
             return self.authenticate()
         return self._service
 
+    def ensure_fresh(self) -> None:
+        """Refresh expired credentials ahead of a run and persist the new token.
+
+        The authorised transports would also refresh on demand, but doing it
+        once here keeps concurrent workers from racing to refresh and keeps
+        the token file current. A session that has not authenticated yet is
+        left alone, since it loads fresh credentials on first use.
+        """
+
+        with self._lock:
+            creds = self._credentials
+            if creds is None or creds.valid or not creds.refresh_token:
+                return
+            from google.auth.transport.requests import Request
+
+            creds.refresh(Request())
+            self._save_credentials(creds)
+        _log_info("Refreshed YouTube credentials.")
+
+    def _save_credentials(self, creds: Credentials) -> None:
+        if self._config.token_file:
+            with open(self._config.token_file, "w", encoding="utf-8") as token_file:
+                token_file.write(creds.to_json())
+
+    def _build_service(self, http: AuthorizedHttp) -> Resource:
+        """Build the service from a static discovery document.
+
+        A document configured through ``discovery_document`` is used as is;
+        otherwise the copy bundled with googleapiclient is loaded, so no
+        request to the discovery endpoint is made either way.
+        """
+
+        from googleapiclient.discovery import build, build_from_document
+
+        if self._config.discovery_document:
+            document = _read_discovery_document(self._config.discovery_document)
+            return build_from_document(document, http=http)
+        return build("youtube", "v3", http=http, static_discovery=True)
+
+    def _new_http(self) -> Tuple[AuthorizedHttp, httplib2.Http]:
+        from google_auth_httplib2 import AuthorizedHttp
+
+        transport = _metered_http(None, cassette=self._cassette, timeout=60)
+        return AuthorizedHttp(self._credentials, http=transport), transport
+
+    @contextmanager
+    def lease_http(
+        self,
+        stats: Optional[CacheStats] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> Iterator[AuthorizedHttp]:
+        """Borrow an authorised transport for the calling thread.
+
+        httplib2 connections are not thread-safe, so each transport is used
+        by one thread at a time. Returned transports keep their connections
+        open for the next request. Traffic is metered into ``stats`` and the
+        byte counters of ``metrics``.
+        """
+
+        self.authenticate()
+        with self._lock:
+            pair = self._idle.pop() if self._idle else None
+        if pair is None:
+            pair = self._new_http()
+        http, transport = pair
+        transport.stats = stats
+        transport.metrics = metrics
+        try:
+            yield http
+        finally:
+            transport.stats = None
+            transport.metrics = None
+            with self._lock:
+                self._idle.append(pair)
+
+
+class YouTubeClient:
+    """Client wrapper around the YouTube Data API."""
+
+    def __init__(
+        self,
+        config: YouTubeConfig,
+        *,
+        metadata_cache: Optional[MetadataCache] = None,
+        refresh_metadata: bool = False,
+        etag_cache: Optional[EtagCache] = None,
+        filter_engine: Optional[FilterEngine] = None,
+        session: Optional[YouTubeSession] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self._config = config
+        self._metadata_cache = metadata_cache
+        self._etag_cache = etag_cache
+        self._refresh_metadata = refresh_metadata
+        self.metadata_stats: Dict[str, Dict[str, object]] = {}
+        self.transfer_stats = CacheStats("requests", "bytes_received", "bytes_sent")
+        self.filter_engine = filter_engine or FilterEngine()
+        self._session = session or YouTubeSession(config)
+        self._metrics = metrics or METRICS
+
+    def authenticate(self) -> Resource:
+        """Authenticate with the YouTube API and return a service resource."""
+
+        return self._session.authenticate()
+
+    @property
+    def service(self) -> Resource:
+        return self._session.service
+
+    def _execute(self, request: HttpRequest) -> Dict[str, object]:
+        """Execute ``request`` on a pooled transport leased by this thread.
+
+        Batches are metered as one ``batch`` call; their sub-requests are
+        counted by :meth:`_execute_batch`.
+        """
+
+        from googleapiclient.errors import HttpError
+
+        with self._metrics.call("youtube", _operation(request)) as call:
+            try:
+                with self._session.lease_http(self.transfer_stats, self._metrics) as http:
+                    return request.execute(http=http)
+            except HttpError as error:
+                if _is_not_modified(error):
+                    call.outcome = "not_modified"
+                raise
+
+    def _prepare_conditional(
+        self, request: HttpRequest
+    ) -> Optional[Tuple[str, Dict[str, object]]]:
+        """Attach ``If-None-Match`` when an etag for the request is stored."""
+
+        if self._etag_cache is None:
+            return None
+        cached = self._etag_cache.get(EtagCache.make_key(request.uri))
+        if cached is not None:
+            request.headers["If-None-Match"] = cached[0]
+        return cached
+
+    def _resolve_conditional(
+        self,
+        request: HttpRequest,
+        cached: Optional[Tuple[str, Dict[str, object]]],
+        response: Optional[Dict[str, object]],
+        error: Optional[Exception],
+    ) -> Tuple[Optional[Dict[str, object]], Optional[Exception]]:
+        """Serve a 304 from the stored copy and remember fresh etags."""
+
+        if self._etag_cache is None:
+            return response, error
+        if error is not None:
+            if cached is not None and _is_not_modified(error):
+                self._etag_cache.stats.record("hits")
+                return cached[1], None
+            return response, error
+        self._etag_cache.stats.record("misses")
+        etag = (response or {}).get("etag")
+        if etag:
+            self._etag_cache.set(EtagCache.make_key(request.uri), str(etag), response)
+        return response, None
+
+    def conditional_stats(self) -> Optional[Dict[str, int]]:
+        """Return 304 (``hits``) and full-download (``misses``) counts."""
+
+        if self._etag_cache is None:
+            return None
+        return self._etag_cache.stats.as_dict()
+
+    def _execute_conditional(self, request: HttpRequest) -> Dict[str, object]:
+        """Execute ``request`` as a conditional GET when an etag is known."""
+
+        from googleapiclient.errors import HttpError
+
+        cached = self._prepare_conditional(request)
+        try:
+            response: Optional[Dict[str, object]] = self._execute(request)
+            error: Optional[Exception] = None
+        except HttpError as http_error:
+            response, error = None, http_error
+        response, error = self._resolve_conditional(request, cached, response, error)
+        if error is not None:
+            raise error
+        return response or {}
+
     def list_subscription_channel_ids(self) -> List[str]:
-        """Return the list of channel IDs the user is subscribed to."""
+        """Return the list of channel IDs the user is subscribed to.
+
+        The list is served from the metadata cache while it is younger than
+        the configured TTL, unless a refresh was requested.
+        """
+
+        cache_key = hash_text("subscriptions", self._config.token_file or "")
+        if self._metadata_cache is not None and not self._refresh_metadata:
+            cached = self._metadata_cache.get(cache_key)
+            if cached is not None:
+                value, age = cached
+                self.metadata_stats["subscriptions"] = {
+                    "hit": True,
+                    "age_seconds": round(age, 1),
+                }
+                _log_info("Subscription list served from cache (age=%.0fs).", age)
+                return list(value)  # type: ignore[arg-type]
+
+        channel_ids = self._fetch_subscription_channel_ids()
+        if self._metadata_cache is not None:
+            self._metadata_cache.set(cache_key, channel_ids)
+            self.metadata_stats["subscriptions"] = {"hit": False, "age_seconds": 0.0}
+            _log_info("Subscription list fetched and cached.")
+        return channel_ids
 
+    def _fetch_subscription_channel_ids(self) -> List[str]:
         channel_ids: List[str] = []
         request: Optional[HttpRequest] = self.service.subscriptions().list(
             part="snippet",
             mine=True,
             maxResults=50,
+            fields=_SUBSCRIPTION_FIELDS,
             order="alphabetical",
         )
 
         while request is not None:
-            response = request.execute()
+            response = self._execute(request)
             for item in response.get("items", []):
                 snippet = item.get("snippet", {})
                 resource_id = snippet.get("resourceId", {})
@@ -101,86 +418,165 @@ class YouTubeClient:
         start_time: datetime,
         end_time: Optional[datetime] = None,
         max_videos_per_channel: Optional[int] = None,
+        watermarks: Optional[WatermarkStore] = None,
     ) -> List[Video]:
-        """Fetch videos for the provided channel IDs within the time window."""
+        """Fetch videos for the provided channel IDs within the time window.
+
+        When ``watermarks`` is given, paging for a channel stops at the video
+        recorded by the last committed run or an older one, and the newest video seen
+        in this run is recorded as that channel's pending watermark.
+        """
+
+        videos = list(
+            self.iter_videos_for_channels(
+                channel_ids,
+                start_time=start_time,
+                end_time=end_time,
+                max_videos_per_channel=max_videos_per_channel,
+                watermarks=watermarks,
+            )
+        )
+        videos.sort(key=lambda v: v.published_at, reverse=True)
+        return videos
+
+    def iter_videos_for_channels(
+        self,
+        channel_ids: Iterable[str],
+        *,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        max_videos_per_channel: Optional[int] = None,
+        watermarks: Optional[WatermarkStore] = None,
+        reorder_buffer: Optional[int] = None,
+    ) -> Iterator[Video]:
+        """Yield videos as soon as each ``videos.list`` details batch resolves.
+
+        Candidates are handed on once their channel (or, with batched
+        requests, their page round) has been paged, and at most one details
+        batch of them waits here for its ``videos.list`` call. Memory grows
+        with that batch, the in-window candidates of the channels being
+        paged (at most ``discovery_workers`` of them with threaded paging)
+        and the set of video IDs already seen, but not with the full
+        candidate details of the whole window. Videos are yielded in discovery order unless ``reorder_buffer`` is
+        set, in which case up to that many videos are held back and released
+        newest first. The output is fully time-ordered whenever the buffer is
+        at least as large as the number of videos.
+        """
+
+        videos = self._iter_unordered_videos(
+            channel_ids,
+            start_time=start_time,
+            end_time=end_time,
+            max_videos_per_channel=max_videos_per_channel,
+            watermarks=watermarks,
+        )
+        if not reorder_buffer:
+            yield from videos
+            return
+
+        heap: List[Tuple[float, int, Video]] = []
+        for sequence, video in enumerate(videos):
+            heapq.heappush(heap, (-video.published_at.timestamp(), sequence, video))
+            if len(heap) > reorder_buffer:
+                yield heapq.heappop(heap)[2]
+        while heap:
+            yield heapq.heappop(heap)[2]
 
-        videos: List[Video] = []
+    def _iter_unordered_videos(
+        self,
+        channel_ids: Iterable[str],
+        *,
+        start_time: datetime,
+        end_time: Optional[datetime],
+        max_videos_per_channel: Optional[int],
+        watermarks: Optional[WatermarkStore],
+    ) -> Iterator[Video]:
         playlist_map = self._map_upload_playlists(list(channel_ids))
-        candidate_ids: List[str] = []
-        metadata: Dict[str, Dict[str, object]] = {}
+        pagers = [
+            _PlaylistPager(
+                channel_id,
+                playlist_id,
+                start_time=start_time,
+                end_time=end_time,
+                max_videos=max_videos_per_channel,
+                watermarks=watermarks,
+                filter_engine=self.filter_engine,
+            )
+            for channel_id, playlist_id in playlist_map.items()
+            if playlist_id
+        ]
 
-        for channel_id, playlist_id in playlist_map.items():
-            if not playlist_id:
+        seen: Set[str] = set()
+        pending: Dict[str, Dict[str, object]] = {}
+        for video_id, info in self._iter_candidates(pagers):
+            if video_id in seen:
                 continue
+            seen.add(video_id)
+            pending[video_id] = info
+            if len(pending) >= _DETAILS_BATCH_SIZE:
+                yield from self._resolve_candidates(pending)
+                pending = {}
+        if pending:
+            yield from self._resolve_candidates(pending)
 
-            page_token: Optional[str] = None
-            fetched_for_channel = 0
+    def _iter_candidates(
+        self, pagers: List["_PlaylistPager"]
+    ) -> Iterator[Tuple[str, Dict[str, object]]]:
+        """Page every playlist and yield candidates as channels are paged.
 
-            while True:
-                request_kwargs = {
-                    "part": "contentDetails,snippet",
-                    "playlistId": playlist_id,
-                    "maxResults": 10,
-                }
-                if page_token:
-                    request_kwargs["pageToken"] = page_token
-
-                response = self.service.playlistItems().list(**request_kwargs).execute()
-                items = response.get("items", [])
-                if not items:
-                    break
-
-                stop_paging = False
-                for item in items:
-                    snippet = item.get("snippet", {})
-                    content_details = item.get("contentDetails", {})
-                    video_id = content_details.get("videoId")
-                    if not video_id:
-                        continue
-
-                    published_at_value = (
-                        content_details.get("videoPublishedAt")
-                        or snippet.get("publishedAt")
-                    )
-                    published_at = _parse_datetime(published_at_value)
-                    if published_at is None:
-                        continue
-                    if end_time and published_at > end_time:
-                        continue
-                    if published_at < start_time:
-                        stop_paging = True
-                        break
-
-                    candidate_ids.append(video_id)
-                    metadata[video_id] = {
-                        "published_at": published_at,
-                        "playlist_snippet": snippet,
-                    }
-                    fetched_for_channel += 1
-                    if max_videos_per_channel and fetched_for_channel >= max_videos_per_channel:
-                        stop_paging = True
-                        break
-
-                if stop_paging:
-                    break
-
-                page_token = response.get("nextPageToken")
-                if not page_token:
-                    break
-
-        unique_ids = list(dict.fromkeys(candidate_ids))
-        details_map = self._fetch_video_details(unique_ids)
-
-        for video_id in unique_ids:
-            info = metadata.get(video_id)
+        Sequential and threaded paging yield channel by channel in
+        ``playlist_map`` order. Batched paging yields round by round
+        instead: the first page of every channel, then the second page of
+        the channels that have more, and so on.
+        """
+
+        workers = max(self._config.discovery_workers, 1)
+        if self._config.batch_requests and len(pagers) > 1:
+            yield from self._page_uploads_playlists_batched(pagers)
+        elif workers > 1 and len(pagers) > 1:
+            # Only ``workers`` channels are paged ahead of the consumer, and
+            # they are drained in submission order, so candidates arrive in
+            # the same order as with sequential paging.
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="discovery"
+            ) as executor:
+                pending: Deque[Future] = deque()
+                for pager in pagers:
+                    pending.append(executor.submit(self._page_uploads_playlist, pager))
+                    if len(pending) >= workers:
+                        yield from pending.popleft().result().drain()
+                while pending:
+                    yield from pending.popleft().result().drain()
+        else:
+            for pager in pagers:
+                yield from self._page_uploads_playlist(pager).drain()
+
+    def _resolve_candidates(
+        self, candidates: Dict[str, Dict[str, object]]
+    ) -> Iterator[Video]:
+        """Fetch details for one batch of candidates and yield accepted videos."""
+
+        details_map = self._fetch_video_details(list(candidates))
+        for video_id, info in candidates.items():
             details = details_map.get(video_id)
-            if not info or not details:
+            if not details:
                 continue
 
             snippet = details.get("snippet", {}) or info["playlist_snippet"]
             content_details = details.get("contentDetails", {})
             duration_seconds = _parse_duration_seconds(content_details.get("duration"))
-            if _is_probable_short(snippet, duration_seconds):
+            record = {
+                "title": snippet.get("title", ""),
+                "description": snippet.get("description", ""),
+                "live_broadcast_content": snippet.get("liveBroadcastContent", ""),
+                "duration_seconds": duration_seconds,
+            }
+            if self.filter_engine.check(
+                record,
+                stage="details",
+                available=DETAILS_FIELDS,
+                already_checked=PLAYLIST_FIELDS,
+            ):
                 continue
 
             title = snippet.get("title") or info["playlist_snippet"].get("title", "")
@@ -198,35 +594,171 @@ class YouTubeClient:
                 or info["published_at"]
             )
 
-            videos.append(
-                Video(
-                    video_id=video_id,
-                    title=title,
-                    description=description,
-                    channel_title=channel_title,
-                    published_at=published_at,
-                    duration_seconds=duration_seconds,
-                )
+            yield Video(
+                video_id=video_id,
+                title=title,
+                description=description,
+                channel_title=channel_title,
+                published_at=published_at,
+                duration_seconds=duration_seconds,
             )
 
-        videos.sort(key=lambda v: v.published_at, reverse=True)
-        return videos
+    def _page_uploads_playlist(self, pager: "_PlaylistPager") -> "_PlaylistPager":
+        """Page one channel's uploads playlist until the pager is done."""
+
+        while not pager.done:
+            pager.consume(self._execute_conditional(pager.next_request(self.service)))
+        return pager
+
+    def _page_uploads_playlists_batched(
+        self, pagers: List["_PlaylistPager"]
+    ) -> Iterator[Tuple[str, Dict[str, object]]]:
+        """Page many uploads playlists together, one batch per round.
+
+        Every round sends the next page request of each unfinished channel
+        in batched HTTP calls and yields the candidates it collected. Failed
+        sub-requests are retried in the following rounds and re-raised once
+        they run out of attempts.
+        """
+
+        failures: Dict[str, int] = {}
+        active = [pager for pager in pagers if not pager.done]
+        while active:
+            requests = {
+                pager.channel_id: pager.next_request(self.service) for pager in active
+            }
+            results = self._execute_batch(requests, conditional=True)
+            for pager in active:
+                response, error = results.get(pager.channel_id, (None, None))
+                if error is not None or response is None:
+                    failures[pager.channel_id] = failures.get(pager.channel_id, 0) + 1
+                    if failures[pager.channel_id] > _BATCH_RETRIES:
+                        raise error or RuntimeError(
+                            f"No batch response for channel {pager.channel_id}"
+                        )
+                    self._metrics.record_retry("youtube", "playlistItems.list")
+                    continue
+                pager.consume(response)
+                yield from pager.drain()
+            active = [pager for pager in active if not pager.done]
+
+    def _execute_batch(
+        self,
+        requests: Dict[str, HttpRequest],
+        *,
+        conditional: bool = False,
+    ) -> Dict[str, Tuple[Optional[Dict[str, object]], Optional[Exception]]]:
+        """Execute ``requests`` in batched HTTP calls keyed by request ID."""
+
+        results: Dict[str, Tuple[Optional[Dict[str, object]], Optional[Exception]]] = {}
+        cached_entries = {
+            key: self._prepare_conditional(request) if conditional else None
+            for key, request in requests.items()
+        }
+
+        def _callback(request_id: str, response, exception) -> None:
+            self._metrics.record_outcome(
+                "youtube", _operation(requests[request_id]), _outcome(exception)
+            )
+            if conditional:
+                response, exception = self._resolve_conditional(
+                    requests[request_id], cached_entries[request_id], response, exception
+                )
+            results[request_id] = (response, exception)
+
+        keys = list(requests)
+        for index in range(0, len(keys), _BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=_callback)
+            for key in keys[index : index + _BATCH_LIMIT]:
+                batch.add(requests[key], request_id=key)
+            self._execute(batch)
+        return results
+
+    def _execute_all(
+        self,
+        requests: List[HttpRequest],
+        *,
+        conditional: bool = False,
+    ) -> List[Dict[str, object]]:
+        """Execute independent requests, batching them when enabled."""
+
+        if not self._config.batch_requests or len(requests) <= 1:
+            execute = self._execute_conditional if conditional else self._execute
+            return [execute(request) for request in requests]
+        results = self._execute_batch(
+            {str(index): request for index, request in enumerate(requests)},
+            conditional=conditional,
+        )
+        responses: List[Dict[str, object]] = []
+        for index in range(len(requests)):
+            response, error = results.get(str(index), (None, None))
+            if error is not None:
+                raise error
+            responses.append(response or {})
+        return responses
 
     def _map_upload_playlists(self, channel_ids: Sequence[str]) -> Dict[str, str]:
-        """Return mapping of channel IDs to their uploads playlist."""
+        """Return mapping of channel IDs to their uploads playlist.
+
+        Cached mappings younger than the metadata TTL are reused; only the
+        remaining channels are looked up through ``channels.list``.
+        """
 
-        playlist_map: Dict[str, str] = {}
         ids = list(channel_ids)
+        if self._metadata_cache is None:
+            return self._fetch_upload_playlists(ids)
+
+        playlist_map: Dict[str, str] = {}
+        missing: List[str] = []
+        oldest = 0.0
+        for channel_id in ids:
+            cached = (
+                None
+                if self._refresh_metadata
+                else self._metadata_cache.get(f"uploads:{channel_id}")
+            )
+            if cached is None:
+                missing.append(channel_id)
+                continue
+            value, age = cached
+            oldest = max(oldest, age)
+            if value:
+                playlist_map[channel_id] = str(value)
+
+        fetched = self._fetch_upload_playlists(missing)
+        for channel_id in missing:
+            # Channels without an uploads playlist are cached as empty so they
+            # are not looked up again on every run.
+            self._metadata_cache.set(f"uploads:{channel_id}", fetched.get(channel_id, ""))
+        playlist_map.update(fetched)
+
+        self.metadata_stats["upload_playlists"] = {
+            "hits": len(ids) - len(missing),
+            "misses": len(missing),
+            "max_age_seconds": round(oldest, 1),
+        }
+        _log_info(
+            "Uploads playlists: %d from cache (max age %.0fs), %d fetched.",
+            len(ids) - len(missing),
+            oldest,
+            len(missing),
+        )
+        return playlist_map
+
+    def _fetch_upload_playlists(self, ids: List[str]) -> Dict[str, str]:
+        playlist_map: Dict[str, str] = {}
         if not ids:
             return playlist_map
 
-        for index in range(0, len(ids), 50):
-            batch = ids[index : index + 50]
-            response = (
-                self.service.channels()
-                .list(part="contentDetails", id=",".join(batch))
-                .execute()
+        requests = [
+            self.service.channels().list(
+                part="contentDetails",
+                id=",".join(ids[index : index + 50]),
+                fields=_CHANNEL_FIELDS,
             )
+            for index in range(0, len(ids), 50)
+        ]
+        for response in self._execute_all(requests):
             for item in response.get("items", []):
                 channel_id = item.get("id")
                 uploads = (
@@ -245,13 +777,15 @@ class YouTubeClient:
             return {}
         details: Dict[str, Dict[str, object]] = {}
         # The videos.list endpoint accepts up to 50 IDs per request.
-        for index in range(0, len(video_ids), 50):
-            batch = video_ids[index : index + 50]
-            response = (
-                self.service.videos()
-                .list(part="contentDetails,snippet", id=",".join(batch))
-                .execute()
+        requests = [
+            self.service.videos().list(
+                part="contentDetails,snippet",
+                id=",".join(video_ids[index : index + 50]),
+                fields=_VIDEO_FIELDS,
             )
+            for index in range(0, len(video_ids), 50)
+        ]
+        for response in self._execute_all(requests, conditional=True):
             for item in response.get("items", []):
                 video_id = item.get("id")
                 if not video_id:
@@ -263,6 +797,211 @@ class YouTubeClient:
         return details
 
 
+class _PlaylistPager:
+    """Paging state for one channel's uploads playlist."""
+
+    def __init__(
+        self,
+        channel_id: str,
+        playlist_id: str,
+        *,
+        start_time: datetime,
+        end_time: Optional[datetime],
+        max_videos: Optional[int],
+        watermarks: Optional[WatermarkStore],
+        filter_engine: FilterEngine,
+    ):
+        self.channel_id = channel_id
+        self.playlist_id = playlist_id
+        self.candidates: List[Tuple[str, Dict[str, object]]] = []
+        self.page_token: Optional[str] = None
+        self.done = False
+        self._start_time = start_time
+        self._end_time = end_time
+        self._max_videos = max_videos
+        self._watermarks = watermarks
+        self._watermark = watermarks.get(channel_id) if watermarks else None
+        self._filter_engine = filter_engine
+        self._accepted = 0
+        self._page_size = _page_size_for_window(start_time, end_time, max_videos)
+
+    def drain(self) -> List[Tuple[str, Dict[str, object]]]:
+        """Return the candidates collected so far and forget them."""
+
+        candidates, self.candidates = self.candidates, []
+        return candidates
+
+    def next_request(self, service: Resource) -> HttpRequest:
+        request_kwargs = {
+            "part": "contentDetails,snippet",
+            "playlistId": self.playlist_id,
+            "maxResults": self._page_size,
+            "fields": _PLAYLIST_ITEM_FIELDS,
+        }
+        if self.page_token:
+            request_kwargs["pageToken"] = self.page_token
+        return service.playlistItems().list(**request_kwargs)
+
+    def consume(self, response: Dict[str, object]) -> None:
+        """Collect in-window items from ``response`` and advance the page."""
+
+        items = response.get("items", [])
+        if not items:
+            self.done = True
+            return
+
+        for item in items:
+            snippet = item.get("snippet", {})
+            content_details = item.get("contentDetails", {})
+            video_id = content_details.get("videoId")
+            if not video_id:
+                continue
+
+            published_at_value = (
+                content_details.get("videoPublishedAt")
+                or snippet.get("publishedAt")
+            )
+            published_at = _parse_datetime(published_at_value)
+            if published_at is None:
+                continue
+            if self._end_time and published_at > self._end_time:
+                continue
+            # Other videos published in the same second as the watermark may
+            # not have been seen yet, so only an older one ends the channel.
+            if self._watermark and (
+                video_id == self._watermark.video_id
+                or published_at < self._watermark.published_at
+            ):
+                self.done = True
+                return
+            if published_at < self._start_time:
+                self.done = True
+                return
+
+            if self._watermarks:
+                self._watermarks.observe(self.channel_id, video_id, published_at)
+            # Videos rejected here still count towards the per-channel limit,
+            # as they did when every rule ran after the detail fetch.
+            self._accepted += 1
+            if not self._filter_engine.check(
+                snippet, stage="playlist", available=PLAYLIST_FIELDS
+            ):
+                self.candidates.append(
+                    (
+                        video_id,
+                        {
+                            "published_at": published_at,
+                            "playlist_snippet": snippet,
+                        },
+                    )
+                )
+            if self._max_videos and self._accepted >= self._max_videos:
+                self.done = True
+                return
+
+        self.page_token = response.get("nextPageToken")
+        if not self.page_token:
+            self.done = True
+
+
+@lru_cache(maxsize=None)
+def _metered_http_class() -> type:
+    """Return the metered transport class, importing httplib2 on first use."""
+
+    import httplib2
+
+    class _MeteredHttp(httplib2.Http):
+        """httplib2 transport that counts requests and response bytes."""
+
+        def __init__(
+            self, stats: Optional[CacheStats], cassette: Optional[Cassette] = None, **kwargs
+        ):
+            super().__init__(**kwargs)
+            self.stats = stats
+            self.cassette = cassette
+            self.metrics: Optional[Metrics] = None
+
+        def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            if self.cassette is not None:
+                response, content = self.cassette.httplib2_request(
+                    super().request, uri, method, body, headers, *args, **kwargs
+                )
+            else:
+                response, content = super().request(
+                    uri, method, body, headers, *args, **kwargs
+                )
+            stats = self.stats
+            if stats is not None:
+                stats.record("requests")
+                stats.record("bytes_received", len(content or b""))
+                if body:
+                    stats.record("bytes_sent", len(body))
+            metrics = self.metrics
+            if metrics is not None:
+                metrics.record_bytes(
+                    "youtube", sent=len(body or b""), received=len(content or b"")
+                )
+            return response, content
+
+    return _MeteredHttp
+
+
+def _metered_http(
+    stats: Optional[CacheStats], *, cassette: Optional[Cassette] = None, **kwargs
+) -> httplib2.Http:
+    return _metered_http_class()(stats, cassette, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _read_discovery_document(path: str) -> str:
+    """Read a discovery document once per process."""
+
+    with open(path, "r", encoding="utf-8") as handle:
+        return handle.read()
+
+
+def _page_size_for_window(
+    start_time: datetime,
+    end_time: Optional[datetime],
+    max_videos: Optional[int],
+) -> int:
+    """Pick a playlistItems page size that usually covers the window in one page.
+
+    Channels rarely publish more than a handful of videos a day, so the page
+    grows by ten items per day the window reaches back, capped at the API
+    maximum of 50. A per-channel limit caps the page size as well.
+    """
+
+    end = end_time or datetime.now(timezone.utc)
+    days = max((end - start_time).total_seconds() / 86400, 0.0)
+    size = _MIN_PAGE_SIZE * max(int(days + 0.999), 1)
+    if max_videos:
+        size = min(size, max_videos)
+    return max(1, min(size, _MAX_PAGE_SIZE))
+
+
+def _outcome(error: Optional[Exception]) -> str:
+    """Label a sub-request result for the request metrics."""
+
+    if error is None:
+        return "ok"
+    if _is_not_modified(error):
+        return "not_modified"
+    return error_class(error)
+
+
+def _operation(request) -> str:
+    """Metric label for ``request``: its API method without the ``youtube.`` prefix."""
+
+    method_id = getattr(request, "methodId", None) or "batch"
+    return method_id[len("youtube."):] if method_id.startswith("youtube.") else method_id
+
+
+def _is_not_modified(error: Exception) -> bool:
+    resp = getattr(error, "resp", None)
+    return getattr(resp, "status", None) == 304
+
+
 def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
@@ -293,21 +1032,4 @@ def _parse_duration_seconds(value: Optional[str]) -> Optional[int]:
     return total_seconds
 
 
-def _is_probable_short(snippet: Dict[str, object], duration_seconds: Optional[int]) -> bool:
-    """Best-effort heuristic to filter out YouTube Shorts style videos."""
-
-    if duration_seconds is not None and duration_seconds <= 480:
-        return True
-    text_fragments = [
-        str(snippet.get("title", "")),
-        str(snippet.get("description", "")),
-    ]
-    lowered = " ".join(fragment.lower() for fragment in text_fragments)
-    if "#short" in lowered:
-        return True
-    if str(snippet.get("liveBroadcastContent", "")).lower() == "shorts":
-        return True
-    return False
-
-
-__all__ = ["Video", "YouTubeClient"]
+__all__ = ["Video", "YouTubeClient", "YouTubeSession"]